@@ -15,8 +15,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from orchestrator.data_loader import get_real_stock_data
+from orchestrator.data_loader import TickerSnapshot
 from orchestrator.main import run_analysis
+from orchestrator.top_picks import TopPicksRefresher, load_top_picks, refresh_top_picks, top_picks
 from neural_engine.ml_predictor import StockReturnPredictor
 
 # Page config
@@ -94,6 +95,30 @@ def load_model():
 
 model = load_model()
 
+# One fetch per symbol per TTL, shared by every session and rerun. Snapshots
+# are read-only once built (stock_data() hands out copies), so the cached
+# object itself is shared rather than copied like st.cache_data would do.
+SNAPSHOT_TTL_SECONDS = 15 * 60
+
+@st.cache_resource(ttl=SNAPSHOT_TTL_SECONDS, max_entries=256, show_spinner=False)
+def load_snapshot(symbol: str) -> TickerSnapshot:
+    snapshot = TickerSnapshot(symbol)
+    # Fetch info and history inside the cached call; raising keeps failed
+    # fetches out of the cache
+    if snapshot.stock_data()["current_price"] == 0.0:
+        raise ValueError(f"Could not fetch financial data for {symbol}")
+    return snapshot
+
+# Top picks are precomputed; one refresher per process rebuilds them when
+# the dataset or model changes
+@st.cache_resource
+def start_top_picks_refresher():
+    refresher = TopPicksRefresher()
+    refresher.start()
+    return refresher
+
+start_top_picks_refresher()
+
 # ============================================================================
 # MODE 1: TOP PICKS
 # ============================================================================
@@ -103,29 +128,38 @@ if mode == "📊 Top Picks":
     
     # Load pre-computed recommendations
     try:
-        df = pd.read_csv("results/dataset_n600_plus.csv")
+        pointer, view = load_top_picks()
+        if view is None:
+            with st.spinner("Building top picks..."):
+                refresh_top_picks()
+            pointer, view = load_top_picks()
         
-        # Get top 10 by Trust Score
-        top_picks = df.nlargest(10, 'Trust_Score')[['Symbol', 'Trust_Score', 'Verdict', 'Actual_Return_1Y', 'sector']]
+        ranking = st.radio("Rank by:", ["🤖 Model Prediction", "🎯 Trust Score"], horizontal=True)
+        by = "prediction" if ranking == "🤖 Model Prediction" and pointer["has_predictions"] else "trust"
+        if ranking == "🤖 Model Prediction" and by == "trust":
+            st.info("Model predictions unavailable, ranking by Trust Score.")
+        picks = top_picks(view, by=by, n=pointer["n"])
         
         # Display metrics
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Top Pick", top_picks.iloc[0]['Symbol'], f"{top_picks.iloc[0]['Trust_Score']:.0f} Trust")
+            st.metric("Top Pick", picks.iloc[0]['Symbol'], f"{picks.iloc[0]['Trust_Score']:.0f} Trust")
         with col2:
-            avg_trust = top_picks['Trust_Score'].mean()
+            avg_trust = picks['Trust_Score'].mean()
             st.metric("Avg Trust Score", f"{avg_trust:.0f}")
         with col3:
-            trusted_count = (top_picks['Verdict'] == 'TRUSTED').sum()
-            st.metric("Trusted Stocks", f"{trusted_count}/10")
+            trusted_count = (picks['Verdict'] == 'TRUSTED').sum()
+            st.metric("Trusted Stocks", f"{trusted_count}/{len(picks)}")
         with col4:
-            avg_return = top_picks['Actual_Return_1Y'].mean()
+            avg_return = picks['Actual_Return_1Y'].mean()
             st.metric("Avg Return (1Y)", f"{avg_return:.1f}%")
         
+        st.caption(f"View {pointer['version']} · {pointer['rows']} stocks · built "
+                   f"{datetime.fromtimestamp(pointer['built_at']):%Y-%m-%d %H:%M}")
         st.markdown("---")
         
         # Display top picks
-        for idx, row in top_picks.iterrows():
+        for idx, row in picks.iterrows():
             col1, col2, col3, col4 = st.columns([2, 2, 2, 4])
             
             with col1:
@@ -136,7 +170,8 @@ if mode == "📊 Top Picks":
             with col3:
                 st.metric("Trust Score", f"{row['Trust_Score']:.0f}/100")
             with col4:
-                st.markdown(f"*{row['sector']}* | 1Y Return: **{row['Actual_Return_1Y']:.1f}%**")
+                predicted = "" if pd.isna(row['Predicted_Return']) else f" | Predicted: **{row['Predicted_Return']:.1f}%**"
+                st.markdown(f"*{row['sector']}* | 1Y Return: **{row['Actual_Return_1Y']:.1f}%**{predicted}")
             
             st.markdown("---")
         
@@ -154,71 +189,78 @@ elif mode == "🔍 Analyze Stock":
     symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, MSFT, GOOGL):", "AAPL").upper()
     
     if st.button("🔍 Analyze", type="primary"):
-        with st.spinner(f"Analyzing {symbol}..."):
-            try:
-                # Get data and analysis
-                raw_data = get_real_stock_data(symbol)
-                analysis = run_analysis(symbol)
-                
-                # Display results
-                st.success(f"✅ Analysis complete for {symbol}")
-                
-                # Metrics
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Trust Score", f"{analysis['trust_score']:.0f}/100")
-                with col2:
-                    verdict_emoji = {"TRUSTED": "🟢", "CAUTION": "🟡", "RISKY": "🔴"}
-                    st.metric("Verdict", f"{verdict_emoji.get(analysis['verdict'], '⚪')} {analysis['verdict']}")
-                with col3:
-                    st.metric("Current Price", f"${raw_data['current_price']:.2f}")
-                with col4:
-                    st.metric("Sector", raw_data.get('sector', 'Unknown'))
-                
-                st.markdown("---")
-                
-                # Detailed Analysis
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader("📊 Financial Metrics")
-                    metrics_df = pd.DataFrame({
-                        'Metric': ['P/E Ratio', 'Debt/Equity', 'Revenue Growth', 'Profit Margins', 'ROE'],
-                        'Value': [
-                            f"{raw_data.get('pe_ratio', 0):.2f}",
-                            f"{raw_data.get('debt_to_equity', 0):.2f}",
-                            f"{raw_data.get('revenue_growth', 0)*100:.1f}%",
-                            f"{raw_data.get('profit_margins', 0)*100:.1f}%",
-                            f"{raw_data.get('roe', 0)*100:.1f}%"
-                        ]
-                    })
-                    st.dataframe(metrics_df, hide_index=True, use_container_width=True)
-                
-                with col2:
-                    st.subheader("📈 Technical Indicators")
-                    tech_df = pd.DataFrame({
-                        'Indicator': ['RSI', 'MACD', 'Price vs SMA200', 'Volatility', 'Trend Strength'],
-                        'Value': [
-                            f"{raw_data.get('rsi', 50):.1f}",
-                            f"{raw_data.get('macd', 0):.2f}",
-                            f"{raw_data.get('price_vs_sma200', 0):.1f}%",
-                            f"{raw_data.get('volatility', 0):.1f}%",
-                            f"{raw_data.get('trend_strength', 0):.2f}"
-                        ]
-                    })
-                    st.dataframe(tech_df, hide_index=True, use_container_width=True)
-                
-                # Rule Breakdown
-                st.markdown("---")
-                st.subheader("🎯 Rule-Based Analysis")
-                
-                for rule in analysis['breakdown']:
-                    status = "✅" if rule['passed'] else "❌"
-                    st.markdown(f"{status} **{rule['rule']}**: {rule['reason']}")
-                
-            except Exception as e:
-                st.error(f"Error analyzing {symbol}: {e}")
-                st.info("Make sure the symbol is valid and data is available.")
+        try:
+            # Only the data fetch blocks: the rules take microseconds and the
+            # LLM reasoning is streamed in after everything else is on screen
+            with st.spinner(f"Fetching data for {symbol}..."):
+                snapshot = load_snapshot(symbol)
+            raw_data = snapshot.stock_data()
+            analysis = run_analysis(snapshot=snapshot, reasoning="lazy")
+            
+            # Display results
+            st.success(f"✅ Analysis complete for {symbol}")
+            
+            # Metrics
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Trust Score", f"{analysis['trust_score']:.0f}/100")
+            with col2:
+                verdict_emoji = {"TRUSTED": "🟢", "CAUTION": "🟡", "RISKY": "🔴"}
+                st.metric("Verdict", f"{verdict_emoji.get(analysis['verdict'], '⚪')} {analysis['verdict']}")
+            with col3:
+                st.metric("Current Price", f"${raw_data['current_price']:.2f}")
+            with col4:
+                st.metric("Sector", raw_data.get('sector', 'Unknown'))
+            
+            st.markdown("---")
+            
+            # Detailed Analysis
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📊 Financial Metrics")
+                metrics_df = pd.DataFrame({
+                    'Metric': ['P/E Ratio', 'Debt/Equity', 'Revenue Growth', 'Profit Margins', 'ROE'],
+                    'Value': [
+                        f"{raw_data.get('pe_ratio', 0):.2f}",
+                        f"{raw_data.get('debt_to_equity', 0):.2f}",
+                        f"{raw_data.get('revenue_growth', 0)*100:.1f}%",
+                        f"{raw_data.get('profit_margins', 0)*100:.1f}%",
+                        f"{raw_data.get('roe', 0)*100:.1f}%"
+                    ]
+                })
+                st.dataframe(metrics_df, hide_index=True, use_container_width=True)
+            
+            with col2:
+                st.subheader("📈 Technical Indicators")
+                tech_df = pd.DataFrame({
+                    'Indicator': ['RSI', 'MACD', 'Price vs SMA200', 'Volatility', 'Trend Strength'],
+                    'Value': [
+                        f"{raw_data.get('rsi', 50):.1f}",
+                        f"{raw_data.get('macd', 0):.2f}",
+                        f"{raw_data.get('price_vs_sma200', 0):.1f}%",
+                        f"{raw_data.get('volatility', 0):.1f}%",
+                        f"{raw_data.get('trend_strength', 0):.2f}"
+                    ]
+                })
+                st.dataframe(tech_df, hide_index=True, use_container_width=True)
+            
+            # Rule Breakdown
+            st.markdown("---")
+            st.subheader("🎯 Rule-Based Analysis")
+            
+            for rule in analysis['breakdown']:
+                status = "✅" if rule['status'] == "PASS" else "❌"
+                st.markdown(f"{status} **{rule['rule']}**: {rule['detail']}")
+            
+            # LLM Reasoning, token by token
+            st.markdown("---")
+            st.subheader("🧠 LLM Reasoning")
+            st.write_stream(analysis['llm_reasoning'].stream())
+            
+        except Exception as e:
+            st.error(f"Error analyzing {symbol}: {e}")
+            st.info("Make sure the symbol is valid and data is available.")
 
 # ============================================================================
 # MODE 3: PORTFOLIO TRACKER
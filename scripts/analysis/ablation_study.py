@@ -18,17 +18,15 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src"))
 
 from xgboost import XGBRegressor
+from orchestrator.dataset_store import load_dataset
 
 print("="*80)
 print("ABLATION STUDY: COMPONENT CONTRIBUTION ANALYSIS")
 print("="*80)
 
-# Load dataset
-df = pd.read_csv("results/datasets/dataset_n600_plus.csv")
-print(f"\nDataset: {len(df)} stocks")
-
 # Features
 all_features = [
     'price_vs_sma200', 'volume_ratio', 'volatility', 'revenue_growth',
@@ -36,6 +34,10 @@ all_features = [
     'rsi', 'profit_margins'
 ]
 
+# Load dataset (only the columns used)
+df = load_dataset("dataset_n600_plus", columns=all_features + ['Actual_Return_1Y'])
+print(f"\nDataset: {len(df)} stocks")
+
 # Temporal split (same as validation)
 df = df.sort_values('volatility')  # Proxy for temporal ordering
 n = len(df)
@@ -64,7 +64,7 @@ def main():
         "Profitability": 0,
         "Efficiency": 0,
         "Free Cash Flow": 0,
-        "Liquidity": 0
+        "Liquidity Runway": 0
     }
     total_checks = 0
     
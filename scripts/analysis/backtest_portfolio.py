@@ -12,11 +12,13 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src"))
 
 from neural_engine.ml_predictor import StockReturnPredictor
+from orchestrator.dataset_store import load_dataset
 
 # Load data and model
-df = pd.read_csv("results/enhanced_dataset_v3_full.csv")
+df = load_dataset("enhanced_dataset_v3_full")
 predictor = StockReturnPredictor.load("models/final_model_v3.pkl")
 
 print("="*80)
@@ -0,0 +1,81 @@
+"""
+IMPORT TIME BENCHMARK
+=====================
+Measures the cold import time of the pipeline entry points, each in a fresh
+interpreter (python -X importtime, cumulative microseconds of the module,
+interpreter startup excluded), and appends the medians to a CSV so
+regressions show up across runs.
+
+orchestrator.main is expected to stay in the tens of milliseconds: it must
+not pull in groq, yfinance or pydantic until an engine is actually used.
+
+Run from project root:
+    python scripts/analysis/benchmark_import_time.py [--runs 7] [--budget-ms 50]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SRC_DIR = os.path.join(PROJECT_ROOT, 'src')
+
+OUTPUT_FILE = "results/metrics/import_time_benchmark.csv"
+MODULES = [
+    "orchestrator.main",
+    "symbolic_engine.rule_checker",
+    "orchestrator.data_loader",
+    "neural_engine.llm_interface",
+]
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, in milliseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(proc.stderr.splitlines()):
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per module")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Limit for orchestrator.main")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    print(f"⏱️  IMPORT TIME ({args.runs} runs, median)")
+    rows = []
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    for module in MODULES:
+        timings = [import_time_ms(module) for _ in range(args.runs)]
+        median = statistics.median(timings)
+        rows.append((timestamp, module, median, min(timings), max(timings)))
+        print(f"   {module:<32} {median:8.1f} ms  (min {min(timings):.1f}, max {max(timings):.1f})")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    new_file = not os.path.exists(args.output)
+    with open(args.output, "a") as f:
+        if new_file:
+            f.write("timestamp,module,median_ms,min_ms,max_ms\n")
+        for row in rows:
+            f.write("{},{},{:.2f},{:.2f},{:.2f}\n".format(*row))
+    print(f"\n✅ Appended to {args.output}")
+
+    main_ms = rows[0][2]
+    if main_ms > args.budget_ms:
+        print(f"❌ orchestrator.main imports in {main_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
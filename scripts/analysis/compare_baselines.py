@@ -17,17 +17,15 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src"))
 
 from xgboost import XGBRegressor
+from orchestrator.dataset_store import load_dataset
 
 print("="*80)
 print("ENHANCEMENT 3: COMPREHENSIVE BASELINE COMPARISON")
 print("="*80)
 
-# Load dataset
-df = pd.read_csv("results/dataset_n600_plus.csv")
-print(f"\nDataset: {len(df)} stocks")
-
 # Features
 selected_features = [
     'price_vs_sma200', 'volume_ratio', 'volatility', 'revenue_growth',
@@ -35,6 +33,10 @@ selected_features = [
     'rsi', 'profit_margins'
 ]
 
+# Load dataset (only the columns used)
+df = load_dataset("dataset_n600_plus", columns=selected_features + ['Actual_Return_1Y'])
+print(f"\nDataset: {len(df)} stocks")
+
 # Temporal split
 df = df.sort_values('volatility')
 n = len(df)
@@ -0,0 +1,67 @@
+"""
+RULE THRESHOLD SWEEP
+====================
+Sensitivity of the symbolic engine to its thresholds: every combination of
+the candidate values below is scored against the dataset in one vectorized
+pass, reporting the Trust_Score / Actual_Return_1Y correlation per grid point.
+
+Run from project root:
+    python scripts/analysis/sweep_thresholds.py [--data CSV] [--top 15]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add project root and src to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from symbolic_engine.rule_checker import GROWTH_SECTORS
+from symbolic_engine.threshold_sweep import sweep_thresholds
+
+DATA_PATH = "results/datasets/dataset_n600_plus.csv"
+OUTPUT_FILE = "results/metrics/threshold_sweep_results.csv"
+
+# Candidate thresholds (current values: 30 / 60, 200, 5%, 10%, 15%)
+GRID = {
+    "Valuation": np.arange(15, 55, 5.0),                                  # P/E limit
+    "Valuation:" + ",".join(GROWTH_SECTORS): np.arange(30, 110, 10.0),   # Growth-sector P/E limit
+    "Solvency": np.arange(100, 425, 25.0),                                # Debt/Equity (%)
+    "Growth": np.arange(-0.05, 0.2001, 0.025).round(3),                   # Revenue growth
+    "Profitability": np.arange(0.0, 0.2501, 0.025).round(3),              # Net margin
+    "Efficiency": np.arange(0.05, 0.3001, 0.05).round(3),                 # ROE
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=DATA_PATH, help="Dataset with rule inputs and Actual_Return_1Y")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--top", type=int, default=15, help="Grid points to print")
+    parser.add_argument("--workers", type=int, help="Threads (default: all cores)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    points = int(np.prod([len(values) for values in GRID.values()]))
+    print(f"🔬 SWEEPING {points:,} THRESHOLD COMBINATIONS over {len(df)} stocks")
+
+    results = sweep_thresholds(df, GRID, workers=args.workers)
+    baseline = sweep_thresholds(df, {"Solvency": [200.0]})["correlation"].iloc[0]
+
+    ranked = results.sort_values("correlation", ascending=False)
+    print(f"\n📊 Current thresholds: r = {baseline:.4f}")
+    print(f"\n🏆 TOP {args.top} GRID POINTS")
+    print(ranked.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    ranked.to_csv(args.output, index=False, float_format="%.6g")
+    print(f"\n✅ Saved full sweep to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,9 @@ import numpy as np
 
 # Add src to path
 sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from symbolic_engine.rule_checker import FinancialRuleEngine, StockData, to_stock_data
 
 def demo_prediction():
     print("🚀 NEURO-SYMBOLIC INFERENCE DEMO")
@@ -47,19 +50,17 @@ def demo_prediction():
         if f in sample:
             print(f"   - {f:<15}: {sample[f]:.4f}")
     
-    # 3. Symbolic Logic (Simulated for Demo or Extracted)
-    # In production, this calls RuleChecker. Here we show the Trust Score concept.
-    trust_score = sample.get('Trust_Score', 0) # If not in CSV, we calculate/mock
-    
-    # If Trust Score missing in CSV (it might be calculated runtime), let's simulate the check
+    # 3. Symbolic Logic (same rule set as production)
     print("\n🧠 2. SYMBOLIC REASONING (The 'Conscience')")
-    if 'pe_ratio' in sample and sample['pe_ratio'] > 40:
-        print("   ⚠️ Rule Hit: High Valuation (PE > 40)")
-        calc_trust = 40
-    else:
-        print("   ✅ Rule Pass: Valuation Reasonable")
-        calc_trust = 85
-    
+    engine = FinancialRuleEngine()
+    if not any(field in sample for field in StockData.model_fields if field not in ('symbol', 'sector')):
+        print("   ⚠️ No fundamentals in this dataset; rules run on StockData defaults")
+    rule_result = engine.evaluate(to_stock_data(sample))
+    for item in rule_result['breakdown']:
+        icon = "✅ Rule Pass" if item['status'] == "PASS" else "⚠️ Rule Hit"
+        print(f"   {icon}: {item['rule']} - {item['detail']}")
+    calc_trust = rule_result['score']
+
     print(f"   -> System Trust Score: {calc_trust}/100")
     
     # 4. ML Prediction
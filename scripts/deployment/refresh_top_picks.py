@@ -0,0 +1,49 @@
+"""
+TOP PICKS REFRESHER
+===================
+Rebuilds the precomputed Top Picks view read by the dashboard
+(results/top_picks/) whenever the dataset or the model changes.
+
+Run from project root:
+    python scripts/deployment/refresh_top_picks.py            # one refresh
+    python scripts/deployment/refresh_top_picks.py --watch 300  # keep refreshing every 5 min
+"""
+
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from orchestrator.top_picks import (DATASET_NAME, MODEL_PATH, TOP_N, VIEW_DIR,
+                                    TopPicksRefresher, refresh_top_picks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", help=f"Dataset CSV (default: the {DATASET_NAME} dataset store snapshot)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=VIEW_DIR)
+    parser.add_argument("--top", type=int, default=TOP_N, help="Picks per ranking")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if inputs are unchanged")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="Keep running, checking inputs at this interval")
+    args = parser.parse_args()
+
+    kwargs = dict(data_path=args.data, model_path=args.model, view_dir=args.output, n=args.top)
+    version = refresh_top_picks(force=args.force, **kwargs)
+    print(f"📊 Top picks view: {version}")
+
+    if args.watch:
+        print(f"👀 Watching inputs every {args.watch:.0f}s (Ctrl+C to stop)")
+        refresher = TopPicksRefresher(interval=args.watch, **kwargs)
+        refresher.start()
+        try:
+            refresher.join()
+        except KeyboardInterrupt:
+            refresher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,43 +3,55 @@ Expand Dataset to N=600+
 
 Processes 150 additional stocks to reach N=612.
 Uses multi-key system for fast processing.
+
+The N=500 rows are imported into the work ledger once, so a re-run only
+processes additional stocks that are not done yet (and retries failures).
 """
 
+import argparse
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 from datetime import datetime
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'utils'))
 
-from orchestrator.data_loader import get_real_stock_data, get_historical_price
+from orchestrator.data_loader import TickerSnapshot
+from orchestrator.dataset_store import SOURCE_DIR, load_dataset, write_dataset
 from orchestrator.main import run_analysis
+from orchestrator.stage_pipeline import CPU_WORKERS, StagedPipeline, run_staged_job
+from orchestrator.work_ledger import WorkLedger
+from adaptive_scheduler import get_scheduler
 
 # Configuration
-MAX_WORKERS = 15  # Increased for 3 API keys
-RATE_LIMIT_DELAY = 0.05  # Very fast with 3 keys
+MAX_WORKERS = get_scheduler().max_workers("yahoo")  # Pool ceiling; the scheduler sets live concurrency
+JOB_NAME = "dataset_n600_plus"  # Work ledger job
+OUTPUT_FILE = os.path.join(SOURCE_DIR, "dataset_n600_plus.csv")
 
-def process_single_stock(symbol, index, total):
-    """Process a single stock"""
+def fetch_stock(symbol):
+    """I/O stage: info and price history"""
+    snapshot = TickerSnapshot.fetch(symbol)
+    return snapshot.info, snapshot.history
+
+def build_stock_row(symbol, payload):
+    """CPU stage: one dataset row from fetched data"""
     try:
-        print(f"[{index}/{total}] {symbol}...", end=" ")
-        
-        raw_data = get_real_stock_data(symbol)
+        # One fetch shared by rules, indicators and the return
+        info, history = payload
+        snapshot = TickerSnapshot(symbol, info=info, history=history)
+        # Strict: a failed download raises (ledger "failed", retried next run);
+        # a zero price then means the ticker has none (ledger "skipped")
+        raw_data = snapshot.stock_data(strict=True)
         
         if raw_data["current_price"] == 0.0:
-            print("SKIP")
+            print(f"{symbol}: SKIP")
             return None
         
-        analysis = run_analysis(symbol)
-        hist_price = get_historical_price(symbol, days_ago=365)
+        analysis = run_analysis(snapshot=snapshot, reasoning="none")
         current_price = raw_data["current_price"]
-        
-        if hist_price > 0:
-            actual_return = ((current_price - hist_price) / hist_price) * 100
-        else:
-            actual_return = 0.0
+        actual_return = snapshot.actual_return(days_ago=365)
         
         result = {
             'Symbol': symbol,
@@ -79,23 +91,31 @@ def process_single_stock(symbol, index, total):
             'trend_strength': raw_data.get('trend_strength', 0)
         }
         
-        print(f"✅ T:{analysis['trust_score']:.0f}, R:{actual_return:.1f}%")
-        time.sleep(RATE_LIMIT_DELAY)
+        print(f"{symbol}: ✅ T:{analysis['trust_score']:.0f}, R:{actual_return:.1f}%")
         
         return result
         
     except Exception as e:
-        print(f"ERR: {str(e)[:30]}")
-        return None
+        print(f"{symbol}: ERR: {str(e)[:30]}")
+        raise  # Recorded as failed in the ledger and retried next run
+
+def process_single_stock(symbol, index, total):
+    """Process a single stock in the calling thread"""
+    print(f"[{index}/{total}] {symbol}...")
+    return build_stock_row(symbol, fetch_stock(symbol))
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fresh", action="store_true", help="Discard ledger progress and fetch every stock again")
+    args = parser.parse_args()
+    
     print("="*80)
     print("EXPANDING DATASET TO N=600+")
     print("="*80)
     print(f"Start: {datetime.now().strftime('%H:%M:%S')}\n")
     
     # Load existing and additional stocks
-    existing_df = pd.read_csv("results/dataset_n500_enhanced.csv")
+    existing_df = load_dataset("dataset_n500_enhanced")
     additional_df = pd.read_csv("data/additional_stocks.csv")
     
     existing_symbols = set(existing_df['Symbol'].tolist())
@@ -107,38 +127,35 @@ def main():
     print(f"Target: {len(existing_symbols) + len(additional_symbols)} stocks")
     print(f"Est. time: ~15-20 minutes\n")
     
-    # Process additional stocks
-    new_results = []
+    # Process additional stocks (existing rows count as done)
+    ledger = WorkLedger()
+    if args.fresh:
+        ledger.reset(JOB_NAME)
+    ledger.import_results(JOB_NAME, existing_df.to_dict("records"))
     start_time = time.time()
-    
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(process_single_stock, symbol, i+1, len(additional_symbols)): symbol
-            for i, symbol in enumerate(additional_symbols)
-        }
-        
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                new_results.append(result)
+    pipeline = StagedPipeline(fetch_stock, build_stock_row, io_workers=MAX_WORKERS, cpu_workers=CPU_WORKERS)
+    counts = run_staged_job(ledger, JOB_NAME, additional_symbols, pipeline)
+    results = ledger.results(JOB_NAME)
+    new_results = [row for row in results if row['Symbol'] not in existing_symbols]
     
     elapsed = time.time() - start_time
     
     # Combine datasets
     if new_results:
-        new_df = pd.DataFrame(new_results)
-        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
+        combined_df = pd.DataFrame(results)
         combined_df = combined_df.sort_values('Trust_Score', ascending=False)
         
-        # Save
-        combined_df.to_csv("results/dataset_n600_plus.csv", index=False)
+        # Save (Parquet store + CSV export next to the tracked copy load_dataset compares against)
+        write_dataset(combined_df, "dataset_n600_plus", csv_path=OUTPUT_FILE)
         
         print("\n" + "="*80)
         print("DATASET EXPANSION COMPLETE!")
         print("="*80)
         print(f"\nTotal stocks: {len(combined_df)}")
         print(f"New stocks added: {len(new_results)}")
+        print(f"Ledger: {counts['skipped']} skipped, {counts['failed']} failed (re-run to retry failures)")
         print(f"Processing time: {elapsed/60:.1f} minutes")
+        print(f"Scheduler: {get_scheduler().summary('yahoo')}")
         print(f"Features: {len(combined_df.columns)}")
         
         print(f"\n📊 Statistics:")
@@ -149,7 +166,7 @@ def main():
         print(f"\n📋 Verdict Distribution:")
         print(combined_df['Verdict'].value_counts())
         
-        print(f"\n💾 Saved to: results/dataset_n600_plus.csv")
+        print(f"\n💾 Saved to: {OUTPUT_FILE}")
     else:
         print("\n❌ No new stocks processed")
     
@@ -2,12 +2,17 @@
 N=500+ Dataset Generator with Parallel Processing
 
 Efficiently fetches data for 500+ stocks using parallel processing
-with rate limiting and error handling.
+with rate limiting and error handling. Downloads run in threads and the
+indicator / rule computation in a process pool (orchestrator/stage_pipeline.py).
+
+Progress is kept in the work ledger (orchestrator/work_ledger.py): each
+finished stock is committed as it completes, so an interrupted run resumes
+where it stopped and only retries failures. Pass --fresh to start over.
 """
 
+import argparse
 import pandas as pd
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 from datetime import datetime
 import sys
@@ -15,15 +20,20 @@ import os
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'utils'))
 
-from orchestrator.data_loader import get_real_stock_data, get_historical_price
+from orchestrator.data_loader import TickerSnapshot
+from orchestrator.dataset_store import SOURCE_DIR, write_dataset
 from orchestrator.main import run_analysis
+from orchestrator.stage_pipeline import CPU_WORKERS, StagedPipeline, run_staged_job
+from orchestrator.work_ledger import WorkLedger
+from adaptive_scheduler import get_scheduler
 
 # Load stock list
 STOCK_LIST_FILE = "data/sp500_tickers.csv"
-RESULTS_FILE = "results/dataset_n500_enhanced.csv"
-MAX_WORKERS = 10  # Parallel threads
-RATE_LIMIT_DELAY = 0.2  # Seconds between requests
+RESULTS_FILE = os.path.join(SOURCE_DIR, "dataset_n500_enhanced.csv")  # Where load_dataset looks for the CSV
+MAX_WORKERS = get_scheduler().max_workers("yahoo")  # Pool ceiling; the scheduler sets live concurrency
+JOB_NAME = "dataset_n500_enhanced"  # Work ledger job
 
 def load_stock_list():
     """Load stock tickers from CSV"""
@@ -36,39 +46,44 @@ def load_stock_list():
         print(f"❌ Error loading stock list: {e}")
         return []
 
-def process_single_stock(symbol, index, total):
+def fetch_stock(symbol):
+    """I/O stage: download a stock's info and price history (through the cache)."""
+    snapshot = TickerSnapshot.fetch(symbol)
+    return snapshot.info, snapshot.history
+
+def build_stock_row(symbol, payload):
     """
-    Process a single stock: fetch data, run analysis, calculate returns.
+    CPU stage: indicators, rules and the realized return from fetched data.
     
     Args:
         symbol: Stock ticker
-        index: Current index (for progress tracking)
-        total: Total number of stocks
+        payload: (info, history) from fetch_stock
     
     Returns:
-        dict: Stock data with all features and analysis
+        dict: Stock data with all features and analysis, or None if the stock has no data
+    
+    Raises:
+        Exception: Analysis errors, recorded as failures in the work ledger
     """
     try:
-        print(f"[{index}/{total}] Processing {symbol}...", end=" ")
-        
         # Get enhanced data (includes technical indicators)
-        raw_data = get_real_stock_data(symbol)
+        # One snapshot is shared by rules, indicators and the return
+        info, history = payload
+        snapshot = TickerSnapshot(symbol, info=info, history=history)
+        # Strict: a failed download raises (ledger "failed", retried next run);
+        # a zero price then means the ticker has none (ledger "skipped")
+        raw_data = snapshot.stock_data(strict=True)
         
         if raw_data["current_price"] == 0.0:
-            print("⚠️  SKIP (no data)")
+            print(f"{symbol}: ⚠️  SKIP (no data)")
             return None
         
-        # Run analysis
-        analysis = run_analysis(symbol)
+        # Run analysis (rules only: the dataset has no reasoning column)
+        analysis = run_analysis(snapshot=snapshot, reasoning="none")
         
-        # Get historical price
-        hist_price = get_historical_price(symbol, days_ago=365)
+        # Realized return from the same snapshot history
         current_price = raw_data["current_price"]
-        
-        if hist_price > 0:
-            actual_return = ((current_price - hist_price) / hist_price) * 100
-        else:
-            actual_return = 0.0
+        actual_return = snapshot.actual_return(days_ago=365)
         
         # Combine all data
         result = {
@@ -113,79 +128,77 @@ def process_single_stock(symbol, index, total):
             'trend_strength': raw_data.get('trend_strength', 0)
         }
         
-        print(f"✅ Trust:{analysis['trust_score']:.0f}, Return:{actual_return:.1f}%, RSI:{raw_data.get('rsi', 0):.0f}")
-        
-        # Rate limiting
-        time.sleep(RATE_LIMIT_DELAY)
+        print(f"{symbol}: ✅ Trust:{analysis['trust_score']:.0f}, Return:{actual_return:.1f}%, RSI:{raw_data.get('rsi', 0):.0f}")
         
         return result
         
     except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+        print(f"{symbol}: ❌ Error: {e}")
+        raise
 
-def process_stocks_parallel(symbols, max_workers=MAX_WORKERS):
+def process_single_stock(symbol, index, total):
+    """Fetch and process one stock in the calling thread (no pipeline)."""
+    print(f"[{index}/{total}] Processing {symbol}...")
+    return build_stock_row(symbol, fetch_stock(symbol))
+
+def process_stocks_parallel(symbols, max_workers=MAX_WORKERS, cpu_workers=CPU_WORKERS, ledger=None, job=JOB_NAME):
     """
     Process multiple stocks in parallel with progress tracking.
     
+    Stocks already done in the work ledger are not fetched again.
+    
     Args:
         symbols: List of stock tickers
-        max_workers: Number of parallel threads
+        max_workers: Number of download threads
+        cpu_workers: Number of processes computing indicators and rules
+        ledger: WorkLedger keeping per-stock status (defaults to the shared one)
+        job: Ledger job name
     
     Returns:
-        list: List of processed stock data
+        list: List of processed stock data (this run and earlier ones)
     """
-    results = []
-    total = len(symbols)
+    ledger = ledger or WorkLedger()
+    ledger.add(job, symbols)
+    total = len(ledger.todo(job))
     
-    print(f"\n🚀 Starting parallel processing of {total} stocks...")
-    print(f"Workers: {max_workers}, Rate limit: {RATE_LIMIT_DELAY}s")
+    print(f"\n🚀 Starting parallel processing of {total} stocks "
+          f"({len(symbols) - total} already in the ledger)...")
+    print(f"Workers: up to {max_workers} downloads (adaptive, Yahoo budget), {cpu_workers} compute processes")
     print("="*80)
     
     start_time = time.time()
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_symbol = {
-            executor.submit(process_single_stock, symbol, i+1, total): symbol
-            for i, symbol in enumerate(symbols)
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_symbol):
-            symbol = future_to_symbol[future]
-            try:
-                result = future.result()
-                if result is not None:
-                    results.append(result)
-            except Exception as e:
-                print(f"❌ Exception for {symbol}: {e}")
-    
+    pipeline = StagedPipeline(fetch_stock, build_stock_row, io_workers=max_workers, cpu_workers=cpu_workers)
+    counts = run_staged_job(ledger, job, symbols, pipeline)
     elapsed_time = time.time() - start_time
+    results = ledger.results(job)
     
     print("="*80)
     print(f"✅ Processing complete!")
     print(f"Time elapsed: {elapsed_time/60:.1f} minutes")
-    print(f"Successful: {len(results)}/{total} stocks ({len(results)/total*100:.1f}%)")
-    print(f"Average: {elapsed_time/total:.1f} seconds per stock")
+    print(f"Ledger: {counts['done']} done, {counts['skipped']} skipped, {counts['failed']} failed "
+          f"(re-run to retry failures)")
+    print(f"Successful: {len(results)}/{len(symbols)} stocks ({len(results)/len(symbols)*100:.1f}%)")
+    print(f"Scheduler: {get_scheduler().summary('yahoo')}")
+    if total:
+        print(f"Average: {elapsed_time/total:.1f} seconds per stock")
     
     return results
 
 def save_dataset(results, filename=RESULTS_FILE):
     """
-    Save processed data to CSV.
+    Save processed data to the dataset store, with a CSV export.
     
     Args:
         results: List of stock data dictionaries
-        filename: Output filename
+        filename: CSV export filename (its stem names the dataset)
     """
     df = pd.DataFrame(results)
     
     # Sort by Trust_Score descending
     df = df.sort_values('Trust_Score', ascending=False)
     
-    # Save to CSV
-    df.to_csv(filename, index=False)
+    # Save to the Parquet store (typed, snapshot-dated) and export the CSV
+    write_dataset(df, Path(filename).stem, csv_path=filename)
     
     print(f"\n💾 Dataset saved to: {filename}")
     print(f"Total stocks: {len(df)}")
@@ -206,6 +219,10 @@ def save_dataset(results, filename=RESULTS_FILE):
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fresh", action="store_true", help="Discard ledger progress and fetch every stock again")
+    args = parser.parse_args()
+    
     print("="*80)
     print("N=500+ DATASET GENERATION")
     print("="*80)
@@ -219,10 +236,12 @@ def main():
         return
     
     print(f"\nTarget: {len(symbols)} stocks")
-    print(f"Estimated time: {len(symbols) * RATE_LIMIT_DELAY / 60 / MAX_WORKERS:.1f} minutes")
     
     # Process stocks in parallel
-    results = process_stocks_parallel(symbols, max_workers=MAX_WORKERS)
+    ledger = WorkLedger()
+    if args.fresh:
+        ledger.reset(JOB_NAME)
+    results = process_stocks_parallel(symbols, max_workers=MAX_WORKERS, ledger=ledger)
     
     if not results:
         print("❌ No results to save. Exiting.")
@@ -8,9 +8,13 @@ Generates a dataset where:
 
 Usage:
     python scripts/generate_temporal_dataset.py
+    python scripts/generate_temporal_dataset.py --record data/recordings   # save bulk responses
+    python scripts/generate_temporal_dataset.py --replay data/recordings   # offline re-run
+    python scripts/generate_temporal_dataset.py --cutoffs 2020-01-01 2021-01-01 2022-01-01 2023-01-01 2024-01-01
+    python scripts/generate_temporal_dataset.py --cutoffs ... --fundamentals   # + point-in-time fundamentals
+    python scripts/generate_temporal_dataset.py --cutoffs ... --from-store     # no download, no recompute
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import time
@@ -18,34 +22,156 @@ from datetime import datetime, timedelta
 import sys
 import os
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add src to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(PROJECT_ROOT, "src"))
 
-from src.orchestrator.technical_indicators import (
+from orchestrator.technical_indicators import (
     calculate_rsi, calculate_macd, calculate_roc, 
     calculate_bollinger_bands, calculate_atr, 
-    calculate_volume_trend, calculate_trend_strength
+    calculate_volume_trend, calculate_trend_strength,
+    calculate_indicator_history, indicators_as_of
 )
+from orchestrator.market_cache import fetch_history
+from orchestrator.bulk_loader import download_price_panel, load_universe, panel_field, RecordedDownloader
+from orchestrator.dataset_store import write_dataset
+from orchestrator.feature_store import add_price_ratios, get_feature_store, refresh_fundamentals
 
 # Configuration
 CUTOFF_DATE = "2024-01-01"
 TARGET_END_DATE = "2024-12-01"  # 11 months later for return
+TARGET_HORIZON_MONTHS = 11  # Outcome window for each cutoff in multi-cutoff mode
+INDICATOR_LOOKBACK = 252  # Bars behind each cutoff (one trading year)
+FEATURE_COLUMNS = ['rsi', 'macd', 'macd_signal', 'roc', 'price_vs_sma50', 'price_vs_sma200', 'volatility', 'trend_strength']
+FUNDAMENTAL_FEATURES = ['pe_ratio', 'revenue_growth', 'profit_margins', 'roe', 'debt_to_equity', 'free_cash_flow']
 STOCK_LIST_FILE = "data/sp500_tickers.csv"
 OUTPUT_FILE = "results/datasets/dataset_temporal_valid.csv"
+MULTI_OUTPUT_FILE = "results/datasets/dataset_temporal_multiyear.csv"
 
-def get_temporal_data(symbol, cutoff_date):
+def history_window(cutoff_date):
+    """Download window: 400 days before cutoff (for indicators) to today (for target)."""
+    start_date = (datetime.strptime(cutoff_date, "%Y-%m-%d") - timedelta(days=400)).strftime("%Y-%m-%d")
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    return start_date, end_date
+
+def build_temporal_dataset(panel, cutoffs, lookback=INDICATOR_LOOKBACK, store=None, fundamentals=False):
+    """
+    Features and targets for every (symbol, cutoff) from one pass over history.
+
+    Indicator history is computed once for the whole panel; features at each
+    cutoff are an as-of lookup of the last bar strictly BEFORE the cutoff, and
+    targets use only bars on/after it.
+
+    Args:
+        panel: Bulk price panel ((field, ticker) columns)
+        cutoffs: List of (cutoff_date, target_end_date) pairs
+        lookback: Bars behind each cutoff used for indicators. None uses every
+                  bar since the panel start, which reproduces get_temporal_data
+                  exactly for a single cutoff.
+        store: Feature store that receives the indicator history (so later runs
+               can use build_temporal_dataset_from_store)
+        fundamentals: Add the fundamentals published before each cutoff (from `store`)
+
+    Returns:
+        DataFrame with the single-cutoff columns, plus Cutoff_Date when
+        several cutoffs are requested
+    """
+    close = panel_field(panel, 'Close')
+    history = calculate_indicator_history(
+        close,
+        high=panel_field(panel, 'High'),
+        low=panel_field(panel, 'Low'),
+        volume=panel_field(panel, 'Volume'),
+        lookback=lookback,
+    )
+    if store is not None:
+        store.put("technical", history)
+
+    def features_at(cutoff_date):
+        features = indicators_as_of(history, cutoff_date)
+        if fundamentals:
+            published = store.features_as_of(features.index, cutoff_date, tables=("fundamentals",))
+            features = add_price_ratios(features.join(published.drop(columns="pe_ratio", errors="ignore")))
+        return features
+
+    columns = FEATURE_COLUMNS + (FUNDAMENTAL_FEATURES if fundamentals else [])
+    return temporal_rows(close, cutoffs, features_at, columns)
+
+def build_temporal_dataset_from_store(store, symbols, cutoffs, fundamentals=False):
+    """
+    build_temporal_dataset from stored features: no download, no recompute.
+
+    Closes for the targets come from the technical table, which holds every
+    bar (including those after each cutoff); features are as-of joins.
+    """
+    stored = store.read("technical", symbols, columns=["close"])
+    close = stored.pivot(index="date", columns="symbol", values="close").sort_index()
+    tables = ("technical", "fundamentals") if fundamentals else ("technical",)
+    columns = FEATURE_COLUMNS + (FUNDAMENTAL_FEATURES if fundamentals else [])
+    return temporal_rows(close, cutoffs, lambda cutoff_date: store.features_as_of(close.columns, cutoff_date, tables),
+                         columns)
+
+def temporal_rows(close, cutoffs, features_at, columns=FEATURE_COLUMNS):
+    """
+    Dataset rows from a (dates x tickers) close panel.
+
+    Args:
+        close: Close prices, used for the sufficiency checks and the targets
+        cutoffs: List of (cutoff_date, target_end_date) pairs
+        features_at: features_at(cutoff_date) -> (tickers x features) including
+                     'close', from data strictly before the cutoff
+        columns: Feature columns to keep
+    """
+    total_bars = close.notna().sum()
+
+    frames = []
+    for cutoff_date, target_end_date in cutoffs:
+        features = features_at(cutoff_date)
+
+        # Same sufficiency checks as get_temporal_data
+        bars_before = close[close.index < cutoff_date].notna().sum()
+        future = close[close.index >= cutoff_date]
+        ok = (total_bars >= 200) & (bars_before >= 50) & (future.notna().sum() >= 20)
+        ok &= future[future.index <= target_end_date].notna().any()
+        features = features[features.index.isin(ok[ok].index)].copy()
+        # get_temporal_data uses a strict 200-bar SMA: NaN with fewer bars (the
+        # live indicators fall back to the mean of the bars so far)
+        short = bars_before.reindex(features.index) < 200
+        features.loc[short, 'price_vs_sma200'] = np.nan
+
+        target_window = future[future.index <= target_end_date]
+        if target_window.empty:
+            continue
+        price_future = target_window.ffill().iloc[-1]
+
+        df = features[columns].copy()
+        df['Symbol'] = df.index
+        df['Close_Cutoff'] = features['close']
+        df['Close_Future'] = price_future.reindex(df.index)
+        df['Actual_Return'] = (df['Close_Future'] - df['Close_Cutoff']) / df['Close_Cutoff'] * 100
+        if len(cutoffs) > 1:
+            df['Cutoff_Date'] = cutoff_date
+        frames.append(df.reset_index(drop=True))
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def get_temporal_data(symbol, cutoff_date, hist=None):
     """
     Fetch data and calculate features strictly at the cutoff date.
+
+    Args:
+        symbol: Stock ticker
+        cutoff_date: Decision date (YYYY-MM-DD)
+        hist: Pre-fetched OHLCV covering history_window(cutoff_date), e.g. a
+              slice of the bulk price panel. Downloaded if omitted.
+
     Returns: (features_dict, actual_return)
     """
     try:
-        # Fetch data: 1 year before cutoff (for indicators) to 1 year after (for target)
-        start_date = (datetime.strptime(cutoff_date, "%Y-%m-%d") - timedelta(days=400)).strftime("%Y-%m-%d")
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        
         # Download OHLCV
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date, end=end_date)
+        if hist is None:
+            start_date, end_date = history_window(cutoff_date)
+            hist = fetch_history(symbol, start=start_date, end=end_date)
         
         if len(hist) < 200:
             return None, None
@@ -111,20 +237,37 @@ def main():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--limit", type=int, help="Limit number of stocks (for Smoke Test)")
+    parser.add_argument("--record", metavar="DIR", help="Record bulk download responses to DIR")
+    parser.add_argument("--replay", metavar="DIR", help="Serve bulk downloads from recordings in DIR (offline)")
+    parser.add_argument("--cutoffs", nargs="+", metavar="DATE",
+                        help="Several cutoff dates (e.g. 2020-01-01 ... 2024-01-01) in one pass; "
+                             f"targets end {TARGET_HORIZON_MONTHS} months after each")
+    parser.add_argument("--fundamentals", action="store_true",
+                        help="Add fundamentals from the annual reports published before each cutoff")
+    parser.add_argument("--from-store", action="store_true",
+                        help="Build from the feature store (filled by an earlier run) instead of downloading")
     args = parser.parse_args()
 
+    if args.cutoffs:
+        cutoffs = [(c, (pd.Timestamp(c) + pd.DateOffset(months=TARGET_HORIZON_MONTHS)).strftime("%Y-%m-%d"))
+                   for c in sorted(args.cutoffs)]
+        output_file = MULTI_OUTPUT_FILE
+    else:
+        cutoffs = [(CUTOFF_DATE, TARGET_END_DATE)]
+        output_file = OUTPUT_FILE
+
     print(f"🚀 GENERATING TEMPORAL DATASET")
     if args.limit:
         print(f"⚠️ SMOKE MODE: Limiting to {args.limit} stocks")
-    print(f"📅 Cutoff Date (Decision Time): {CUTOFF_DATE}")
-    print(f"📅 Target Date (Outcome Time):  {TARGET_END_DATE}")
+    for cutoff_date, target_end_date in cutoffs:
+        print(f"📅 Cutoff Date (Decision Time): {cutoff_date}")
+        print(f"📅 Target Date (Outcome Time):  {target_end_date}")
     print("="*60)
     
     # Load tickers
     try:
-        df_tickers = pd.read_csv(STOCK_LIST_FILE)
-        tickers = df_tickers['ticker'].tolist() 
-    except:
+        tickers = load_universe(STOCK_LIST_FILE)
+    except Exception:
         print("Using limited ticker list for test...")
         tickers = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "META", "AMD", "INTC", "IBM"]
     
@@ -132,25 +275,39 @@ def main():
         tickers = tickers[:args.limit]
 
     
-    dataset = []
-    
-    print(f"Processing {len(tickers)} stocks...")
-    
-    for i, symbol in enumerate(tickers):
-        if i % 10 == 0:
-            print(f"Processing {i}/{len(tickers)}...", end="\r")
-            
-        features, target = get_temporal_data(symbol, CUTOFF_DATE)
-        
-        if features:
-            dataset.append(features)
+    store = get_feature_store()
+    if args.fundamentals:
+        added = refresh_fundamentals(tickers, store)
+        print(f"📚 Fundamentals: {added} symbols downloaded, {len(store.symbols('fundamentals'))} in store")
+
+    if args.from_store:
+        print(f"Reading {len(tickers)} stocks from the feature store...")
+        dataset = build_temporal_dataset_from_store(store, tickers, cutoffs, fundamentals=args.fundamentals)
+    else:
+        # Bulk download: chunked multi-ticker requests instead of one per symbol
+        downloader = None
+        if args.replay:
+            downloader = RecordedDownloader(args.replay)
+        elif args.record:
+            downloader = RecordedDownloader(args.record, record=True)
+        start_date, end_date = history_window(cutoffs[0][0])
+        panel = download_price_panel(tickers, start=start_date, end=end_date, downloader=downloader)
+
+        print(f"Processing {len(tickers)} stocks...")
+
+        # Single pass: indicator history once, then an as-of lookup per cutoff
+        lookback = INDICATOR_LOOKBACK if len(cutoffs) > 1 else None
+        dataset = (build_temporal_dataset(panel, cutoffs, lookback=lookback, store=store,
+                                          fundamentals=args.fundamentals)
+                   if not panel.empty else pd.DataFrame())
             
     print(f"\n✅ Completed. Valid samples: {len(dataset)}")
     
     if len(dataset) > 0:
-        df_out = pd.DataFrame(dataset)
-        df_out.to_csv(OUTPUT_FILE, index=False)
-        print(f"💾 Saved to {OUTPUT_FILE}")
+        df_out = dataset
+        # Multi-cutoff sets are partitioned by Cutoff_Date in the store
+        write_dataset(df_out, os.path.splitext(os.path.basename(output_file))[0], csv_path=output_file)
+        print(f"💾 Saved to {output_file}")
         
         # Quick Stats
         print("\n📊 DATASET STATS (REALITY CHECK)")
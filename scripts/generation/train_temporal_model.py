@@ -13,18 +13,21 @@ from sklearn.metrics import mean_squared_error, r2_score
 import sys
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src"))
+from orchestrator.dataset_store import load_dataset
+
 # Configuration
-DATASET_FILE = "results/datasets/dataset_temporal_valid.csv"
+DATASET_NAME = "dataset_temporal_valid"
 
 def train_temporal_model():
     print("🚀 TRAINING STRICT TEMPORAL MODEL")
     
     # Load data
-    if not os.path.exists(DATASET_FILE):
-        print(f"❌ Dataset not found: {DATASET_FILE}")
+    try:
+        df = load_dataset(DATASET_NAME)
+    except FileNotFoundError as e:
+        print(f"❌ Dataset not found: {e}")
         return
-        
-    df = pd.read_csv(DATASET_FILE)
     print(f"Loaded {len(df)} samples")
     
     # Features
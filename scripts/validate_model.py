@@ -11,15 +11,17 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
 
 from xgboost import XGBRegressor
+from orchestrator.dataset_store import load_dataset
 
 print("="*80)
 print("WALK-FORWARD VALIDATION - N=564 DATASET")
 print("="*80)
 
 # Load dataset
-df = pd.read_csv("results/dataset_n600_plus.csv")
+df = load_dataset("dataset_n600_plus")
 print(f"\nDataset: {len(df)} stocks, {len(df.columns)} features")
 
 # Temporal split
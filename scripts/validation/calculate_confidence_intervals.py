@@ -10,12 +10,15 @@ Goal: Prove that r=0.25 is statistically significant and not a fluke.
 
 import sys
 import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "src"))
+from orchestrator.dataset_store import load_dataset
 import pandas as pd
 import numpy as np
 import scipy.stats as stats
 
 # Configuration
-DATASET_FILE = "results/datasets/dataset_temporal_valid.csv"
+DATASET_NAME = "dataset_temporal_valid"
 N_BOOTSTRAPS = 10000
 CONFIDENCE_LEVEL = 0.95
 
@@ -24,11 +27,11 @@ def calculate_intervals():
     print("==================================================")
     
     # Load strict temporal dataset
-    if not os.path.exists(DATASET_FILE):
-        print(f"❌ Dataset not found: {DATASET_FILE}")
+    try:
+        df = load_dataset(DATASET_NAME)
+    except FileNotFoundError as e:
+        print(f"❌ Dataset not found: {e}")
         return
-
-    df = pd.read_csv(DATASET_FILE)
     n_samples = len(df)
     
     print(f"Samples: {n_samples}")
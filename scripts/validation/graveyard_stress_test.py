@@ -14,9 +14,9 @@ import os
 import pandas as pd
 
 # Add project root AND src to path to ensure imports work
-# We need to go up one level from 'scripts' to get to project root
+# We need to go up two levels from 'scripts/validation' to get to project root
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
+project_root = os.path.dirname(os.path.dirname(current_dir))
 src_path = os.path.join(project_root, 'src')
 
 sys.path.append(project_root)
@@ -13,77 +13,15 @@ import os
 import pandas as pd
 import numpy as np
 import scipy.stats as stats
-from pydantic import BaseModel
-from typing import List, Dict, Any
 
-# ==============================================================================
-# INLINED SYMBOLIC ENGINE (To bypass import issues)
-# ==============================================================================
-
-class StockData(BaseModel):
-    symbol: str = "UNKNOWN"
-    sector: str = "Unknown"
-    current_price: float = 0.0
-    pe_ratio: float = 0.0
-    debt_to_equity: float = 0.0
-    revenue_growth: float = 0.0
-    cash_reserves: float = 0.0
-    operating_costs: float = 0.0
-    net_income: float = 0.0
-    profit_margins: float = 0.0
-    roe: float = 0.0
-    free_cash_flow: float = 0.0
-    dividend_yield: float = 0.0
-    analyst_target: float = 0.0
-
-class RuleChecker:  # Simplified wrapper around FinancialRuleEngine logic
-    def evaluate_stock(self, data_dict):
-        # Convert dict to pydantic model
-        data = StockData(**data_dict)
-        
-        rules_passed = 0
-        total_rules = 0
-        breakdown = []
-
-        def check_rule(name, condition, reason_pass, reason_fail):
-            nonlocal rules_passed, total_rules
-            total_rules += 1
-            if condition:
-                rules_passed += 1
-                breakdown.append(f"PASS: {name} - {reason_pass}")
-            else:
-                breakdown.append(f"FAIL: {name} - {reason_fail}")
-
-        # --- RULE 1: VALUATION ---
-        pe_limit = 60.0 if data.sector in ["Technology", "Communication Services"] else 30.0
-        check_rule("Valuation", data.pe_ratio < pe_limit and data.pe_ratio > 0, "Reasonable PE", "Overvalued")
-
-        # --- RULE 2: SOLVENCY ---
-        check_rule("Solvency", data.debt_to_equity < 200.0, "Healthy Debt", "High Debt")
+# Symbolic engine (rules are defined once in src/symbolic_engine/rule_checker.py)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
-        # --- RULE 3: GROWTH ---
-        check_rule("Growth", data.revenue_growth > 0.05, "Growing", "Stagnant")
-
-        # --- RULE 4: PROFITABILITY ---
-        check_rule("Profitability", data.profit_margins > 0.10, "Healthy Margin", "Thin Margin")
-
-        # --- RULE 5: EFFICIENCY ---
-        check_rule("Efficiency", data.roe > 0.15, "Strong ROE", "Weak ROE")
-
-        # --- RULE 6: CASH HEALTH ---
-        check_rule("Free Cash Flow", data.free_cash_flow > 0, "Positive FCF", "Negative FCF")
-
-        # --- RULE 7: LIQUIDITY ---
-        if data.net_income < 0:
-            check_rule("Liquidity", data.cash_reserves > data.operating_costs, "Runway Secure", "Runway Valid")
-        else:
-            check_rule("Liquidity", True, "Profitable", "N/A")
-
-        final_score = (rules_passed / total_rules) * 100 if total_rules > 0 else 0.0
-        
-        verdict = "TRUSTED" if final_score >= 70 else "CAUTION" if final_score >= 40 else "RISKY"
-        
-        return round(final_score, 1), verdict, breakdown
+try:
+    from symbolic_engine.rule_checker import RuleChecker, StockData
+except ImportError:
+    from src.symbolic_engine.rule_checker import RuleChecker, StockData
 
 # ==============================================================================
 # TEST RUNNERS
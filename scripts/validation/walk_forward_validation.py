@@ -13,16 +13,18 @@ import os
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "src"))
 
 from neural_engine.ml_predictor import StockReturnPredictor
 from xgboost import XGBRegressor
+from orchestrator.dataset_store import load_dataset
 
 print("="*80)
 print("WALK-FORWARD VALIDATION - TRUE OUT-OF-SAMPLE TESTING")
 print("="*80)
 
 # Load full dataset
-df = pd.read_csv("results/enhanced_dataset_v3_full.csv")
+df = load_dataset("enhanced_dataset_v3_full")
 print(f"\nTotal dataset: {len(df)} stocks")
 
 # For demonstration, we'll simulate temporal split using stock characteristics
@@ -1,29 +1,107 @@
 
+import asyncio
 import json
 import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional
+
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, Groq, RateLimitError
+
+sys.path.append(str(Path(__file__).parent.parent / 'utils'))
+from groq_key_manager import KeyPool, estimate_tokens, load_api_keys
+from adaptive_scheduler import get_scheduler
+
+try:
+    from neural_engine.output_parser import AnalysisStream, clean_analysis, parse_analysis, parse_batch
+    from neural_engine.response_cache import LLMResponseCache, get_response_cache, prompt_key
+except ImportError:  # Imported as src.neural_engine.llm_interface
+    from src.neural_engine.output_parser import AnalysisStream, clean_analysis, parse_analysis, parse_batch
+    from src.neural_engine.response_cache import LLMResponseCache, get_response_cache, prompt_key
 
 # Load environment variables from .env file
 load_dotenv()
 
+DEFAULT_MODEL_ID = "llama-3.1-8b-instant"
+
+SYSTEM_PROMPT = (
+    "You are a Financial Analyst. Output JSON with keys: reasoning, extracted_metrics. "
+    "extracted_metrics MUST contain: symbol, current_price, pe_ratio, debt_to_equity, "
+    "revenue_growth, cash_reserves, operating_costs, net_income. "
+    "CRITICAL FORMATTING RULE: Return the metrics as a FLAT JSON object. "
+    "Do NOT nest them under the ticker symbol. Do NOT create a key like 'TSLA': {...}. "
+    "The keys 'current_price', 'pe_ratio', etc., must be at the root of the 'extracted_metrics' object."
+)
+
+
+def build_messages(symbol: str, data: dict) -> List[Dict[str, str]]:
+    """Chat messages for one stock analysis request."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Symbol: {symbol}\nData: {data}"}
+    ]
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a Financial Analyst. You receive a JSON array of stocks, each with a symbol and its data. "
+    "Output a JSON object with one key, results: an array with exactly one entry per input stock, "
+    "in the input order. Each entry has keys: symbol, reasoning, extracted_metrics. "
+    "extracted_metrics MUST contain: symbol, current_price, pe_ratio, debt_to_equity, "
+    "revenue_growth, cash_reserves, operating_costs, net_income, as a FLAT JSON object."
+)
+DEFAULT_BATCH_SIZE = 8  # Symbols per batched request
+
+
+def build_batch_messages(symbols: List[str], data: Mapping[str, dict]) -> List[Dict[str, str]]:
+    """Chat messages analyzing several stocks in one request (system prompt sent once)."""
+    stocks = [{"symbol": symbol, "data": data[symbol]} for symbol in symbols]
+    return [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(stocks, default=str)}
+    ]
+
+
+def chunked(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+RESPONSE_FORMAT = {"type": "json_object"}
+
+
+def error_json(e: Exception) -> str:
+    """Response body used when the API call fails."""
+    return json.dumps({"reasoning": f"API Error: {str(e)}", "extracted_metrics": {}})
+
+
 class LLMRunner:
     """
     Interface for the Groq API to handle text analysis.
     """
-    def __init__(self, api_key: str = None, model_id: str = "llama-3.1-8b-instant"):
+    def __init__(self, api_key: str = None, model_id: str = DEFAULT_MODEL_ID,
+                 use_cache: bool = True, cache: Optional[LLMResponseCache] = None):
         """
         Initialize the LLM Interface with Groq client.
         
         Args:
             api_key (str): Groq API key.
             model_id (str): Groq model identifier.
+            use_cache (bool): Reuse stored responses for identical prompts.
+            cache (LLMResponseCache): Cache to use (defaults to the global one).
         """
         self.model_id = model_id
+        self.use_cache = use_cache
+        self._cache = cache
         # Use provided key or fallback to env var
         key = api_key or os.environ.get("GROQ_API_KEY")
         self.client = Groq(api_key=key)
         
+    @property
+    def cache(self) -> Optional[LLMResponseCache]:
+        if not self.use_cache:
+            return None
+        return self._cache if self._cache is not None else get_response_cache()
+
     def load_model(self):
         """
         Placeholder for compatibility. API client is initialized in __init__.
@@ -42,64 +120,35 @@ class LLMRunner:
             dict: Parsed and sanitized JSON response.
         """
         json_str = self.analyze_json(symbol, price_data)
-        
-        try:
-            # 1. Parse string to dict
-            try:
-                raw_data = json.loads(json_str)
-            except:
-                # Fallback: try to find the first { and last }
-                start = json_str.find('{')
-                end = json_str.rfind('}') + 1
-                raw_data = json.loads(json_str[start:end])
-            
-            # Preserve reasoning if available before flattening
-            reasoning = raw_data.get("reasoning", "Parsed via Universal Translator")
-            
-            # 2. Handle Nesting (The "TSLA" wrapper)
-            # Flatten the dict if the first value is also a dict
-            if len(raw_data) == 1 and isinstance(list(raw_data.values())[0], dict):
-                raw_data = list(raw_data.values())[0]
-            elif "extracted_metrics" in raw_data:
-                raw_data = raw_data["extracted_metrics"]
-                # Double check if extracted_metrics is ALSO nested
-                if len(raw_data) == 1 and isinstance(list(raw_data.values())[0], dict):
-                    raw_data = list(raw_data.values())[0]
-            
-            # 3. Fuzzy Key Mapping (The Nuclear Fix)
-            clean_data = {}
-            key_map = {
-                "symbol": ["symbol", "ticker"],
-                "current_price": ["price", "current"],
-                "pe_ratio": ["pe_", "p/e", "price_to_earnings"],
-                "debt_to_equity": ["debt", "d/e"],
-                "revenue_growth": ["revenue", "growth"],
-                "cash_reserves": ["cash", "reserves"],
-                "operating_costs": ["operating", "costs", "expenses"],
-                "net_income": ["income", "profit", "net"]
-            }
-            
-            # Iterate over every messy key from the AI
-            for dirty_key, value in raw_data.items():
-                dirty_key_lower = dirty_key.lower()
-                # Check which standard key it matches
-                for standard_key, aliases in key_map.items():
-                    if any(alias in dirty_key_lower for alias in aliases):
-                        clean_data[standard_key] = value
-                        break
-                else:
-                    # Keep original if no match found (fallback)
-                    clean_data[dirty_key] = value
-            
-            # Ensure symbol is present if missing
-            if "symbol" not in clean_data:
-                clean_data["symbol"] = symbol
-                
-            return {"reasoning": reasoning, "extracted_metrics": clean_data}
-            
-        except Exception as e:
-            print(f"Error in analyze_stock: {e}")
-            return {"reasoning": f"Error: {str(e)}", "extracted_metrics": {}}
+        return parse_analysis(json_str, symbol)
+
+    def stream_stock(self, symbol: str, price_data: dict) -> AnalysisStream:
+        """
+        Analyze the stock data, streaming the completion.
+
+        Iterate the returned AnalysisStream for the reasoning text as tokens
+        arrive; its result() is the same dict analyze_stock returns. A cached
+        response is replayed as one chunk; analyze_stock's JSON-mode replies
+        are reused, but the streamed text (sent without JSON mode) is cached
+        under its own key so it is never served as a JSON-mode reply.
+
+        Args:
+            symbol (str): Stock symbol.
+            price_data (dict): Dictionary containing price and financial metrics.
+        """
+        messages = build_messages(symbol, price_data)
+        cache = self.cache
+        if cache is None:
+            return AnalysisStream(self._stream(messages), symbol)
+
+        key = prompt_key(self.model_id, messages)  # The options _stream actually sends
+        cached = cache.get(key)
+        if cached is None:
+            cached = cache.get(prompt_key(self.model_id, messages, RESPONSE_FORMAT))
+        if cached is not None:
+            return AnalysisStream([cached], symbol)
+        return AnalysisStream(self._stream(messages), symbol,
+                              on_complete=lambda content: cache.put(key, self.model_id, content))
 
     def analyze_json(self, symbol: str, data: dict, mock: bool = False) -> str:
         """
@@ -127,29 +176,235 @@ class LLMRunner:
                 }
             })
 
-        system_prompt = (
-            "You are a Financial Analyst. Output JSON with keys: reasoning, extracted_metrics. "
-            "extracted_metrics MUST contain: symbol, current_price, pe_ratio, debt_to_equity, "
-            "revenue_growth, cash_reserves, operating_costs, net_income. "
-            "CRITICAL FORMATTING RULE: Return the metrics as a FLAT JSON object. "
-            "Do NOT nest them under the ticker symbol. Do NOT create a key like 'TSLA': {...}. "
-            "The keys 'current_price', 'pe_ratio', etc., must be at the root of the 'extracted_metrics' object."
-        )
-        user_content = f"Symbol: {symbol}\nData: {data}"
-        
+        return self._complete(build_messages(symbol, data))
+
+    def analyze_batch(self, symbols: List[str], data: Mapping[str, dict],
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, dict]:
+        """
+        Analyze many stocks with one request per `batch_size` symbols.
+
+        Args:
+            symbols (list): Stock symbols.
+            data (dict): {symbol: metrics dict}.
+            batch_size (int): Symbols packed into each request.
+
+        Returns:
+            dict: {symbol: analyze_stock result}, in the order of `symbols`.
+                  Symbols missing from a batch reply are re-asked individually.
+        """
+        results = {}
+        for chunk in chunked(list(symbols), batch_size):
+            results.update(parse_batch(self._complete(build_batch_messages(chunk, data)), chunk))
+        for symbol in symbols:
+            if symbol not in results:
+                results[symbol] = self.analyze_stock(symbol, data[symbol])
+        return {symbol: results[symbol] for symbol in symbols}
+
+    def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """One JSON-mode chat completion, served from the response cache when possible."""
+        cache = self.cache
+        if cache is not None:
+            key = prompt_key(self.model_id, messages, RESPONSE_FORMAT)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model_id,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                response_format={"type": "json_object"}
-            )
-            return completion.choices[0].message.content
+            with get_scheduler().slot("groq"):
+                completion = self.client.chat.completions.create(
+                    model=self.model_id,
+                    messages=messages,
+                    response_format=RESPONSE_FORMAT
+                )
+            content = completion.choices[0].message.content
         except Exception as e:
             print(f"Groq API Error: {e}")
-            return json.dumps({"reasoning": f"API Error: {str(e)}", "extracted_metrics": {}})
+            return error_json(e)
+
+        if cache is not None:
+            cache.put(key, self.model_id, content)
+        return content
+
+    def _stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Content deltas of a streamed chat completion."""
+        # Sent without JSON mode, which is not available for streamed requests;
+        # the parser skips any text around the object
+        # The request holds its "groq" slot until the last chunk arrives
+        with get_scheduler().slot("groq"):
+            stream = self.client.chat.completions.create(
+                model=self.model_id,
+                messages=messages,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+class AsyncLLMRunner:
+    """
+    Asyncio counterpart of LLMRunner for analyzing many stocks concurrently.
+
+    In-flight requests are bounded by one global semaphore (`max_concurrency`)
+    and a per-key limit (`per_key_concurrency`). Keys are leased from a
+    KeyPool, which hands out the key with the most rate-limit budget left and
+    refills budgets from the response headers, so throughput is set by the
+    API quota rather than by a thread count. Waiting never blocks the event
+    loop.
+
+    Usage:
+        runner = AsyncLLMRunner()
+        results = runner.run_many(symbols, data_by_symbol)        # from sync code
+        results = await runner.analyze_many(symbols, data_by_symbol)  # from async code
+    """
+    def __init__(self, api_keys: Optional[List[str]] = None, model_id: str = DEFAULT_MODEL_ID,
+                 max_concurrency: int = 8, per_key_concurrency: int = 4,
+                 base_url: Optional[str] = None, max_retries: int = 3, timeout: float = 60.0,
+                 use_cache: bool = True, cache: Optional[LLMResponseCache] = None,
+                 pool: Optional[KeyPool] = None):
+        """
+        Args:
+            api_keys: Groq keys (defaults to GROQ_API_KEY, GROQ_API_KEY_2, ... from the environment)
+            model_id: Groq model identifier.
+            max_concurrency: Requests in flight across all keys.
+            per_key_concurrency: Requests in flight per key.
+            base_url: API endpoint override (e.g. a local mock server in tests).
+            max_retries: Attempts per symbol when rate limited.
+            timeout: Per-request timeout in seconds.
+            use_cache: Reuse stored responses for identical prompts.
+            cache: Cache to use (defaults to the global one).
+            pool: Key pool to lease from (overrides api_keys / per_key_concurrency).
+        """
+        if pool is None:
+            named_keys = load_api_keys() if api_keys is None else [(f"key_{i + 1}", key) for i, key in enumerate(api_keys)]
+            pool = KeyPool(named_keys, max_in_flight=per_key_concurrency)
+
+        self.pool = pool
+        self.model_id = model_id
+        self.max_concurrency = max_concurrency
+        self.per_key_concurrency = per_key_concurrency
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self._cache = cache
+
+        self.requests = 0
+        self.rate_limited = 0
+        self._loop = None
+
+    @property
+    def cache(self) -> Optional[LLMResponseCache]:
+        if not self.use_cache:
+            return None
+        return self._cache if self._cache is not None else get_response_cache()
+
+    def _bind_loop(self):
+        """(Re)create the loop-bound primitives and clients on first use in an event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._clients = [
+                AsyncGroq(api_key=key, base_url=self.base_url, max_retries=0, timeout=self.timeout)
+                for key in self.pool.keys
+            ]
+
+    async def analyze_json(self, symbol: str, data: dict) -> str:
+        """Async LLMRunner.analyze_json: raw completion text (or an error JSON)."""
+        return await self._complete(build_messages(symbol, data))
+
+    async def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """One JSON-mode chat completion with key leasing, 429 retries and the response cache."""
+        cache = self.cache
+        if cache is not None:
+            key = prompt_key(self.model_id, messages, RESPONSE_FORMAT)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        self._bind_loop()
+        last_error = None
+        async with self._semaphore:
+            for _ in range(self.max_retries):
+                lease = await self.pool.acquire_async(estimate_tokens(messages))
+                self.requests += 1
+                try:
+                    raw = await self._clients[lease.index].chat.completions.with_raw_response.create(
+                        model=self.model_id,
+                        messages=messages,
+                        response_format=RESPONSE_FORMAT
+                    )
+                    completion = await raw.parse()
+                except RateLimitError as e:
+                    self.rate_limited += 1
+                    self.pool.release(lease, headers=e.response.headers, rate_limited=True)
+                    last_error = e
+                    continue
+                except Exception as e:
+                    self.pool.release(lease)
+                    print(f"Groq API Error: {e}")
+                    return error_json(e)
+
+                usage = getattr(completion, "usage", None)
+                self.pool.release(lease, headers=raw.headers, tokens_used=usage.total_tokens if usage else None)
+                content = completion.choices[0].message.content
+                if cache is not None:
+                    cache.put(key, self.model_id, content)
+                return content
+
+        print(f"Groq API Error: rate limited {self.max_retries} times")
+        return error_json(last_error)
+
+    async def analyze_stock(self, symbol: str, price_data: dict) -> dict:
+        """Async LLMRunner.analyze_stock: parsed {"reasoning", "extracted_metrics"}."""
+        return parse_analysis(await self.analyze_json(symbol, price_data), symbol)
+
+    async def analyze_batch(self, symbols: List[str], data: Mapping[str, dict]) -> Dict[str, dict]:
+        """Async LLMRunner.analyze_batch for one batch (a single request)."""
+        results = parse_batch(await self._complete(build_batch_messages(symbols, data)), symbols)
+        missing = [symbol for symbol in symbols if symbol not in results]
+        for symbol, result in zip(missing, await asyncio.gather(*(self.analyze_stock(s, data[s]) for s in missing))):
+            results[symbol] = result
+        return results
+
+    async def analyze_many(self, symbols: List[str], data: Mapping[str, dict],
+                           batch_size: Optional[int] = None) -> Dict[str, dict]:
+        """
+        Analyze every symbol concurrently.
+
+        Args:
+            symbols: Stock symbols
+            data: {symbol: metrics dict}
+            batch_size: Pack this many symbols into each request (None = one request per symbol)
+
+        Returns:
+            {symbol: analyze_stock result}, in the order of `symbols`
+        """
+        if batch_size and batch_size > 1:
+            batches = await asyncio.gather(*(self.analyze_batch(chunk, data) for chunk in chunked(list(symbols), batch_size)))
+            merged = {symbol: result for batch in batches for symbol, result in batch.items()}
+            return {symbol: merged[symbol] for symbol in symbols}
+
+        results = await asyncio.gather(*(self.analyze_stock(symbol, data[symbol]) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    def run_many(self, symbols: List[str], data: Mapping[str, dict],
+                 batch_size: Optional[int] = None) -> Dict[str, dict]:
+        """Blocking wrapper around analyze_many for synchronous scripts."""
+        async def run():
+            try:
+                return await self.analyze_many(symbols, data, batch_size)
+            finally:
+                await self.aclose()
+        return asyncio.run(run())
+
+    async def aclose(self):
+        """Close the HTTP clients of the current event loop."""
+        if self._loop is not None:
+            for client in self._clients:
+                await client.close()
+            self._loop = None
+
 
 # Legacy stub for backward compatibility
 class LLMInterface(LLMRunner):
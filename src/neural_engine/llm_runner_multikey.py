@@ -5,16 +5,22 @@ Automatically rotates between multiple Groq API keys on rate limits.
 """
 
 import os
-from groq import Groq
-import json
+import time
+from groq import Groq, RateLimitError
 import sys
 from pathlib import Path
 
 # Add utils to path
 sys.path.append(str(Path(__file__).parent.parent / 'utils'))
+from adaptive_scheduler import get_scheduler
 
 try:
-    from groq_key_manager import get_groq_api_key, handle_groq_error
+    from neural_engine.output_parser import parse_sentiment
+except ImportError:  # Imported as src.neural_engine.llm_runner_multikey
+    from src.neural_engine.output_parser import parse_sentiment
+
+try:
+    from groq_key_manager import estimate_tokens, get_key_pool
     USE_KEY_MANAGER = True
 except ImportError:
     USE_KEY_MANAGER = False
@@ -23,7 +29,8 @@ except ImportError:
 
 def analyze_stock(symbol: str, data: dict, max_retries=3):
     """
-    Analyze stock using Groq LLM with automatic key rotation on rate limits.
+    Analyze stock using Groq LLM, leasing the key with the most rate-limit
+    budget from the shared key pool (waits only until a budget refills).
     
     Args:
         symbol: Stock ticker
@@ -34,16 +41,8 @@ def analyze_stock(symbol: str, data: dict, max_retries=3):
         dict: Analysis results
     """
     for attempt in range(max_retries):
+        lease = None
         try:
-            # Get current API key
-            if USE_KEY_MANAGER:
-                api_key = get_groq_api_key()
-            else:
-                api_key = os.getenv("GROQ_API_KEY")
-            
-            # Create Groq client
-            client = Groq(api_key=api_key)
-            
             # Prepare prompt
             prompt = f"""
             Analyze this stock and provide a brief assessment:
@@ -61,74 +60,65 @@ def analyze_stock(symbol: str, data: dict, max_retries=3):
             - confidence: 0-100
             - brief_reason: one sentence explanation
             """
+            messages = [{"role": "user", "content": prompt}]
+
+            # Lease an API key
+            if USE_KEY_MANAGER:
+                pool = get_key_pool()
+                lease = pool.acquire(estimate_tokens(messages, completion_tokens=200))
+                api_key = lease.key
+            else:
+                api_key = os.getenv("GROQ_API_KEY")
+            
+            # Create Groq client
+            client = Groq(api_key=api_key, max_retries=0)
             
             # Query LLM
-            response = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200
-            )
+            with get_scheduler().slot("groq"):
+                raw = client.chat.completions.with_raw_response.create(
+                    model="llama-3.1-8b-instant",
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=200
+                )
+            response = raw.parse()
+            if lease is not None:
+                usage = getattr(response, "usage", None)
+                pool.release(lease, headers=raw.headers, tokens_used=usage.total_tokens if usage else None)
             
             # Parse response
             content = response.choices[0].message.content
             
-            # Try to extract JSON
-            try:
-                # Find JSON in response
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                if start >= 0 and end > start:
-                    json_str = content[start:end]
-                    result = json.loads(json_str)
-                else:
-                    # Fallback if no JSON found
-                    result = {
-                        "sentiment": "neutral",
-                        "confidence": 50,
-                        "brief_reason": "Analysis completed"
-                    }
-            except json.JSONDecodeError:
-                result = {
-                    "sentiment": "neutral",
-                    "confidence": 50,
-                    "brief_reason": "Analysis completed"
-                }
+            # Extract and validate the JSON object
+            result = parse_sentiment(content)
             
             return result
             
+        except RateLimitError as e:
+            if lease is not None:
+                # Bench this key until its reset; the next attempt leases another one
+                pool.release(lease, headers=e.response.headers, rate_limited=True)
+                print(f"   Rate limit on {lease.name}, retrying (attempt {attempt + 1}/{max_retries})...")
+                continue
+            # Single key mode - wait and retry
+            if attempt < max_retries - 1:
+                print(f"   Rate limit hit, waiting 5 seconds...")
+                time.sleep(5)
+                continue
+            error_str = str(e)
+
         except Exception as e:
+            if lease is not None:
+                pool.release(lease)
             error_str = str(e)
             
-            # Check if it's a rate limit error
-            if "rate_limit" in error_str.lower() or "429" in error_str:
-                if USE_KEY_MANAGER:
-                    # Try to rotate key
-                    if handle_groq_error(e):
-                        print(f"   Retrying with different key (attempt {attempt + 1}/{max_retries})...")
-                        continue
-                    else:
-                        # All keys exhausted
-                        if attempt < max_retries - 1:
-                            print(f"   All keys rate-limited, waiting before retry...")
-                            import time
-                            time.sleep(5)
-                            continue
-                else:
-                    # Single key mode - wait and retry
-                    if attempt < max_retries - 1:
-                        print(f"   Rate limit hit, waiting 5 seconds...")
-                        import time
-                        time.sleep(5)
-                        continue
-            
-            # Other errors or max retries reached
-            print(f"   LLM Error: {error_str}")
-            return {
-                "sentiment": "neutral",
-                "confidence": 0,
-                "brief_reason": f"Error: {error_str[:50]}"
-            }
+        # Other errors or max retries reached
+        print(f"   LLM Error: {error_str}")
+        return {
+            "sentiment": "neutral",
+            "confidence": 0,
+            "brief_reason": f"Error: {error_str[:50]}"
+        }
     
     # Max retries exhausted
     return {
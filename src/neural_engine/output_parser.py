@@ -0,0 +1,443 @@
+"""
+LLM Output Parser
+
+One parser for every completion the neural engine reads:
+
+- An incremental JSON scanner (StreamingJSONParser) that consumes the text
+  in chunks as they stream in. It tracks nesting and string/escape state,
+  so it skips chatty text around the object, knows exactly where the
+  top-level object ends (no find('{') / rfind('}') guessing), and decodes
+  the "reasoning" string while it is still arriving. The completed object
+  is decoded once with json.loads.
+- Precomputed alias tables mapping the model's free-form metric names
+  ("P/E Ratio", "currentPrice", ...) onto the canonical keys with one dict
+  lookup instead of a substring scan over every alias.
+- Schema checks on the decoded object, so downstream code always gets
+  {"reasoning": str, "extracted_metrics": dict}.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Canonical metric -> substrings that identify it. Order matters: the first
+# standard key with a matching alias wins (e.g. "price_to_earnings" -> current_price).
+METRIC_ALIASES = {
+    "symbol": ["symbol", "ticker"],
+    "current_price": ["price", "current"],
+    "pe_ratio": ["pe_", "p/e", "price_to_earnings"],
+    "debt_to_equity": ["debt", "d/e"],
+    "revenue_growth": ["revenue", "growth"],
+    "cash_reserves": ["cash", "reserves"],
+    "operating_costs": ["operating", "costs", "expenses"],
+    "net_income": ["income", "profit", "net"]
+}
+NUMERIC_METRICS = set(METRIC_ALIASES) - {"symbol"}
+
+MAX_KEY_TABLE = 4096  # Bound on memoized spellings (model output is untrusted)
+STREAM_KEY = "reasoning"
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'[{}\[\]":,]')
+
+
+def _match_alias(key: str) -> Optional[str]:
+    lowered = key.lower()
+    for standard_key, aliases in METRIC_ALIASES.items():
+        if any(alias in lowered for alias in aliases):
+            return standard_key
+    return None
+
+
+# Spelling -> canonical key (None = keep the spelling). Seeded with the names
+# models actually emit; new spellings are resolved once and memoized.
+_KEY_TABLE: Dict[str, Optional[str]] = {
+    spelling: _match_alias(spelling) for spelling in [
+        *METRIC_ALIASES, "reasoning", "sector", "P/E", "P/E Ratio", "PE Ratio", "pe",
+        "Symbol", "Ticker", "ticker", "Price", "Current Price", "currentPrice", "peRatio",
+        "Debt/Equity", "D/E", "debtToEquity", "Revenue Growth", "revenueGrowth",
+        "Cash Reserves", "cashReserves", "Operating Costs", "operatingCosts",
+        "Net Income", "netIncome", "Profit Margins", "profit_margins", "roe", "ROE",
+    ]
+}
+
+
+def canonical_key(key: str) -> str:
+    """Canonical metric name for a model-chosen key; unknown keys pass through unchanged."""
+    try:
+        standard_key = _KEY_TABLE[key]
+    except KeyError:
+        standard_key = _match_alias(key)
+        if len(_KEY_TABLE) < MAX_KEY_TABLE:
+            _KEY_TABLE[key] = standard_key
+    return standard_key or key
+
+
+def _number(value: Any) -> Any:
+    """Numeric metric values sometimes arrive as "1,234.5" or "$200"; leave anything else as is."""
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").replace("$", "").strip())
+        except ValueError:
+            return value
+    return value
+
+
+class StreamingJSONParser:
+    """
+    Incremental scanner for the first top-level JSON object in a text stream.
+
+    Usage:
+        parser = StreamingJSONParser()
+        for chunk in chunks:
+            text = parser.feed(chunk)    # newly decoded characters of the "reasoning" value
+        obj = parser.value()             # the complete object (json.loads of its exact span)
+
+    Only structural characters are visited one by one; string bodies are
+    skipped (or copied, for keys and the streamed value) in slices.
+    """
+
+    def __init__(self, stream_key: str = STREAM_KEY):
+        self.stream_key = stream_key
+        self._chunks: List[str] = []
+        self._offset = 0           # Characters consumed before the current chunk
+        self._start = None         # Offset of the opening '{'
+        self._end = None           # Offset just past the closing '}'
+        self._stack: List[str] = []
+        self._expect_key = False
+
+        # String state
+        self._in_string = False
+        self._is_key = False
+        self._escape = False
+        self._hex: Optional[str] = None   # Pending \\uXXXX digits
+        self._high_surrogate: Optional[int] = None
+        self._key_parts: List[str] = []
+        self._last_key: Optional[str] = None
+        self._capturing = False
+        self._captured = False
+        self._streamed: List[str] = []
+
+    @property
+    def started(self) -> bool:
+        return self._start is not None
+
+    @property
+    def done(self) -> bool:
+        return self._end is not None
+
+    @property
+    def streamed(self) -> str:
+        """Decoded text of the streamed value received so far."""
+        return "".join(self._streamed)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> str:
+        """Consume the next chunk. Returns the streamed value's newly decoded text."""
+        self._chunks.append(chunk)
+        delta: List[str] = []
+        i, n = 0, len(chunk)
+
+        if self._start is None:
+            i = chunk.find('{')
+            if i < 0:
+                self._offset += n
+                return ""
+            self._start = self._offset + i
+
+        while i < n and self._end is None:
+            if self._in_string:
+                i = self._scan_string(chunk, i, delta)
+                continue
+            match = _STRUCTURAL.search(chunk, i)
+            if match is None:
+                break
+            i = match.end()
+            char = match.group()
+            if char == '"':
+                self._open_string()
+            elif char in '{[':
+                self._stack.append(char)
+                self._expect_key = char == '{'
+            elif char in '}]':
+                self._stack.pop()
+                self._expect_key = False
+                if not self._stack:
+                    self._end = self._offset + i
+            elif char == ',':
+                self._expect_key = bool(self._stack) and self._stack[-1] == '{'
+            else:  # ':'
+                self._expect_key = False
+
+        self._offset += n
+        text = "".join(delta)
+        if text:
+            self._streamed.append(text)
+        return text
+
+    def _open_string(self):
+        self._in_string = True
+        self._is_key = self._expect_key
+        if self._is_key:
+            self._key_parts = []
+        else:
+            self._capturing = self._last_key == self.stream_key and not self._captured
+            self._last_key = None
+
+    def _emit(self, text: str, delta: List[str]):
+        if self._is_key:
+            self._key_parts.append(text)
+        elif self._capturing:
+            delta.append(text)
+
+    def _scan_string(self, chunk: str, i: int, delta: List[str]) -> int:
+        """Advance through string content starting at chunk[i]; returns the next index."""
+        if self._hex is not None:
+            while i < len(chunk) and len(self._hex) < 4:
+                self._hex += chunk[i]
+                i += 1
+            if len(self._hex) == 4:
+                self._code_point(int(self._hex, 16), delta)
+                self._hex = None
+            return i
+        if self._escape:
+            self._escape = False
+            char = chunk[i]
+            if char == 'u':
+                self._hex = ""
+            else:
+                self._emit(_ESCAPES.get(char, char), delta)
+            return i + 1
+
+        match = _STRING_SPECIAL.search(chunk, i)
+        stop = match.start() if match else len(chunk)
+        if stop > i and (self._is_key or self._capturing):
+            self._emit(chunk[i:stop], delta)
+        if match is None:
+            return stop
+        if match.group() == '\\':
+            self._escape = True
+        else:
+            self._close_string()
+        return stop + 1
+
+    def _code_point(self, code: int, delta: List[str]):
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(code), delta)
+
+    def _close_string(self):
+        self._in_string = False
+        if self._is_key:
+            self._last_key = "".join(self._key_parts)
+        elif self._capturing:
+            self._capturing = False
+            self._captured = True
+
+    def value(self) -> Any:
+        """The decoded top-level object. Raises ValueError if none was found or it is incomplete."""
+        if self._start is None:
+            raise ValueError("No JSON object in completion")
+        if self._end is None:
+            raise ValueError("Incomplete JSON object in completion")
+        return json.loads(self.text[self._start:self._end])
+
+
+def extract_json(text: str) -> Any:
+    """Decode a completion: the whole text if it is JSON, else the first complete {...} in it."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        parser = StreamingJSONParser()
+        parser.feed(text)
+        return parser.value()
+
+
+def clean_analysis(raw_data: dict, symbol: str) -> dict:
+    """
+    Normalize one parsed analysis object into {"reasoning", "extracted_metrics"}.
+
+    Args:
+        raw_data (dict): Decoded model output for one stock.
+        symbol (str): Stock symbol, filled in if the model omitted it.
+    """
+    if not isinstance(raw_data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(raw_data).__name__}")
+
+    # Preserve reasoning if available before flattening
+    reasoning = raw_data.get("reasoning", "Parsed via Universal Translator")
+    if not isinstance(reasoning, str):
+        reasoning = json.dumps(reasoning) if isinstance(reasoning, (dict, list)) else str(reasoning)
+
+    # Handle Nesting (The "TSLA" wrapper)
+    # Flatten the dict if the first value is also a dict
+    if len(raw_data) == 1 and isinstance(list(raw_data.values())[0], dict):
+        raw_data = list(raw_data.values())[0]
+    elif "extracted_metrics" in raw_data:
+        raw_data = raw_data["extracted_metrics"]
+        # Double check if extracted_metrics is ALSO nested
+        if isinstance(raw_data, dict) and len(raw_data) == 1 and isinstance(list(raw_data.values())[0], dict):
+            raw_data = list(raw_data.values())[0]
+    if not isinstance(raw_data, dict):
+        raw_data = {}
+
+    # Alias mapping (keys that match no alias are kept as they are)
+    clean_data = {}
+    for dirty_key, value in raw_data.items():
+        key = canonical_key(dirty_key)
+        clean_data[key] = _number(value) if key in NUMERIC_METRICS else value
+
+    # Ensure symbol is present if missing
+    if "symbol" not in clean_data:
+        clean_data["symbol"] = symbol
+
+    return {"reasoning": reasoning, "extracted_metrics": clean_data}
+
+
+def parse_analysis(json_str: str, symbol: str) -> dict:
+    """
+    Parse and sanitize a raw completion into {"reasoning", "extracted_metrics"}.
+
+    Args:
+        json_str (str): Completion text (ideally a JSON object).
+        symbol (str): Stock symbol, filled in if the model omitted it.
+
+    Returns:
+        dict: Parsed and sanitized JSON response.
+    """
+    try:
+        return clean_analysis(extract_json(json_str), symbol)
+    except Exception as e:
+        print(f"Error in analyze_stock: {e}")
+        return {"reasoning": f"Error: {str(e)}", "extracted_metrics": {}}
+
+
+def parse_batch(json_str: str, symbols: List[str]) -> Dict[str, dict]:
+    """
+    Split a batched completion into per-symbol analyze_stock results.
+
+    Accepts {"results": [...]}, a bare array, or an object keyed by symbol.
+    Entries are matched to `symbols` by their symbol/ticker (any case), else
+    by position. Symbols the model skipped are absent from the result.
+    """
+    try:
+        raw = extract_json(json_str)
+    except Exception as e:
+        print(f"Error in analyze_batch: {e}")
+        return {}
+
+    if isinstance(raw, dict):
+        lists = [value for value in raw.values() if isinstance(value, list)]
+        if lists:
+            raw = lists[0]  # {"results": [...]} under whatever key the model chose
+        else:
+            raw = [dict(value, symbol=key) for key, value in raw.items() if isinstance(value, dict)]
+
+    wanted = {symbol.upper(): symbol for symbol in symbols}
+    results = {}
+    for position, item in enumerate(raw if isinstance(raw, list) else []):
+        if not isinstance(item, dict):
+            continue
+        hint = next((str(v) for k, v in item.items() if k.lower() in ("symbol", "ticker")), None)
+        parsed = clean_analysis(item, hint or "")
+        candidates = [hint, parsed["extracted_metrics"].get("symbol")]
+        symbol = next((wanted[str(c).upper()] for c in candidates if c and str(c).upper() in wanted), None)
+        if symbol is None and position < len(symbols):
+            symbol = symbols[position]
+        if symbol is not None and symbol not in results:
+            parsed["extracted_metrics"]["symbol"] = symbol
+            results[symbol] = parsed
+    return results
+
+
+SENTIMENTS = ("positive", "neutral", "negative")
+DEFAULT_SENTIMENT = {"sentiment": "neutral", "confidence": 50, "brief_reason": "Analysis completed"}
+
+
+def parse_sentiment(text: str) -> dict:
+    """
+    Parse a {"sentiment", "confidence", "brief_reason"} completion.
+
+    Falls back to DEFAULT_SENTIMENT when no JSON object is found; an
+    unknown sentiment becomes "neutral" and confidence is clamped to 0-100.
+    """
+    try:
+        raw = extract_json(text)
+    except ValueError:
+        return dict(DEFAULT_SENTIMENT)
+    if not isinstance(raw, dict):
+        return dict(DEFAULT_SENTIMENT)
+
+    result = dict(DEFAULT_SENTIMENT, **raw)
+    sentiment = str(result["sentiment"]).strip().lower()
+    result["sentiment"] = sentiment if sentiment in SENTIMENTS else "neutral"
+    try:
+        result["confidence"] = min(max(int(float(result["confidence"])), 0), 100)
+    except (TypeError, ValueError):
+        result["confidence"] = DEFAULT_SENTIMENT["confidence"]
+    result["brief_reason"] = str(result["brief_reason"])
+    return result
+
+
+class AnalysisStream:
+    """
+    A streamed single-stock analysis.
+
+    Iterating yields the reasoning text as it is decoded from the incoming
+    chunks; result() drains the stream and returns the analyze_stock dict.
+    `on_complete` receives the full completion text once a complete object
+    has arrived (used to fill the response cache).
+    """
+
+    def __init__(self, chunks: Iterable[str], symbol: str,
+                 on_complete: Optional[Callable[[str], None]] = None):
+        self.symbol = symbol
+        self.parser = StreamingJSONParser()
+        self._chunks = iter(chunks)
+        self._on_complete = on_complete
+        self._error: Optional[Exception] = None
+        self._result: Optional[dict] = None
+
+    def __iter__(self) -> Iterator[str]:
+        while self._result is None:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._finish()
+                break
+            except Exception as e:
+                print(f"Groq API Error: {e}")
+                self._error = e
+                self._finish()
+                break
+            delta = self.parser.feed(chunk)
+            if delta:
+                yield delta
+
+    def _finish(self):
+        if self.parser.done:
+            try:
+                self._result = clean_analysis(self.parser.value(), self.symbol)
+            except Exception as e:  # Balanced but malformed object (streams are not in JSON mode)
+                print(f"Error in analyze_stock: {e}")
+                self._result = {"reasoning": f"Error: {str(e)}", "extracted_metrics": {}}
+                return
+            if self._on_complete is not None:
+                self._on_complete(self.parser.text)
+        elif self._error is not None:
+            self._result = {"reasoning": f"API Error: {str(self._error)}", "extracted_metrics": {}}
+        else:
+            self._result = parse_analysis(self.parser.text, self.symbol)
+
+    def result(self) -> dict:
+        for _ in self:
+            pass
+        return self._result
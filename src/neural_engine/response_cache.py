@@ -0,0 +1,153 @@
+"""
+LLM Response Cache
+
+Persistent cache for chat completions, so re-analyzing a symbol whose
+fundamentals have not changed (dashboard refreshes, reruns of batch_run.py)
+skips the Groq round trip entirely.
+
+Entries are keyed by a sha256 over the model id and the normalized request
+(messages with whitespace collapsed, plus request options), stored in a
+local SQLite file with a TTL, and evicted least-recently-used once the
+cache holds more than `max_entries` responses.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Configuration
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("data", "cache", "llm_cache.sqlite"))
+TTL_SECONDS = 24 * 60 * 60  # Fundamentals change at most daily
+MAX_ENTRIES = 5000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Collapse whitespace runs so formatting-only prompt edits share a cache entry."""
+    return [{**message, "content": _WHITESPACE.sub(" ", message["content"]).strip()} for message in messages]
+
+
+def prompt_key(model_id: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> str:
+    """Content address of a request: sha256 over model id, normalized messages and options."""
+    blob = json.dumps(
+        {"model": model_id, "messages": normalize_messages(messages), "options": options or {}},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed completion cache with TTL and LRU eviction.
+
+    Every hit refreshes the entry's last-used time; inserts beyond
+    `max_entries` evict the least recently used rows. Each operation opens a
+    short-lived connection, so one instance can be shared between threads.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY,"
+                    " model TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " last_used REAL NOT NULL,"
+                    " response TEXT NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits and closes on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached completion text for `key`, or None if missing or older than the TTL."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT created_at, response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] + self.ttl <= now:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[1]
+
+    def put(self, key: str, model_id: str, response: str):
+        """Store a completion and evict least-recently-used entries beyond max_entries."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, created_at, last_used, response) VALUES (?, ?, ?, ?, ?)",
+                (key, model_id, now, now, response),
+            )
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        """Drop every cached response."""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def purge_expired(self) -> int:
+        """Delete entries older than the TTL. Returns the number of rows removed."""
+        if not self.enabled:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl,)).rowcount
+
+
+# Global cache instance
+_cache = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Get or create the global LLM response cache"""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
+
+
+def set_response_cache(cache: Optional[LLMResponseCache]):
+    """Replace the global cache (e.g. with a temporary one in tests, or a disabled one)."""
+    global _cache
+    _cache = cache
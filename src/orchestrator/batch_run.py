@@ -21,7 +21,7 @@ def batch_run():
         for symbol in symbols:
             print(f"\nProcessing {symbol}...")
             try:
-                result = run_analysis(symbol)
+                result = run_analysis(symbol, reasoning="none")
                 
                 # Extract data
                 metrics = result.get("metrics", {})
@@ -0,0 +1,199 @@
+"""
+Bulk Price Loader
+
+Downloads OHLCV history for a whole ticker universe with chunked multi-ticker
+`yf.download` calls and returns one wide price panel:
+
+    columns: MultiIndex (field, ticker), e.g. ("Close", "AAPL")
+    index:   trading dates
+
+Dataset generation is then bounded by the number of chunk requests instead of
+per-ticker round trips. For offline runs and tests, `RecordedDownloader`
+replays previously recorded chunk responses from disk in place of the network.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Callable, Iterable, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+try:
+    from orchestrator.market_cache import get_cache, next_market_close, HISTORICAL_TTL_SECONDS
+except ImportError:  # Imported as src.orchestrator.bulk_loader
+    from src.orchestrator.market_cache import get_cache, next_market_close, HISTORICAL_TTL_SECONDS
+
+# Configuration
+STOCK_LIST_FILE = "data/sp500_tickers.csv"
+CHUNK_SIZE = 100  # Tickers per yf.download request
+CHUNK_DELAY = 1.0  # Seconds between chunk requests
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def load_universe(path: str = STOCK_LIST_FILE) -> List[str]:
+    """Load the ticker universe (a CSV with a `ticker` column)."""
+    df = pd.read_csv(path)
+    return df['ticker'].dropna().astype(str).tolist()
+
+
+def _yf_download(tickers: List[str], **kwargs) -> pd.DataFrame:
+    """Default network downloader: one multi-ticker yf.download request."""
+    return yf.download(
+        tickers,
+        group_by="column",
+        auto_adjust=True,  # Same adjustment as Ticker.history
+        actions=False,
+        threads=True,
+        progress=False,
+        **kwargs
+    )
+
+
+def _is_live(downloader: Callable[..., pd.DataFrame]) -> bool:
+    """Whether calls go to the network (and need CHUNK_DELAY between them)."""
+    return getattr(downloader, "live", downloader is _yf_download)
+
+
+def _normalize_chunk(raw: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """Coerce a yf.download response to (field, ticker) columns and drop tickers with no data."""
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker
+        raw = pd.concat({tickers[0]: raw}, axis=1).swaplevel(0, 1, axis=1)
+
+    raw = raw.loc[:, raw.columns.get_level_values(0).isin(PANEL_FIELDS)]
+    raw.columns = raw.columns.set_names(["field", "ticker"])
+    return raw.dropna(axis=1, how="all")
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def download_price_panel(tickers: List[str],
+                         period: str = "1y",
+                         start: Optional[str] = None,
+                         end: Optional[str] = None,
+                         chunk_size: int = CHUNK_SIZE,
+                         downloader: Optional[Callable[..., pd.DataFrame]] = None,
+                         use_cache: bool = True) -> pd.DataFrame:
+    """
+    Fetch daily OHLCV for many tickers in chunked multi-ticker requests.
+
+    Args:
+        tickers: Ticker symbols
+        period: yfinance period, used when start/end are not given
+        start: Inclusive start date (YYYY-MM-DD)
+        end: Exclusive end date (YYYY-MM-DD)
+        chunk_size: Tickers per request
+        downloader: Callable(tickers, **kwargs) -> DataFrame; defaults to yf.download.
+                    Pass a RecordedDownloader to run offline. Chunks are spaced
+                    by CHUNK_DELAY when it makes live calls (a `live` attribute).
+        use_cache: Store each chunk response in the market data cache
+
+    Returns:
+        Wide DataFrame with (field, ticker) MultiIndex columns. Tickers that
+        returned no data are absent.
+    """
+    downloader = downloader or _yf_download
+    kwargs = {"start": start, "end": end} if (start or end) else {"period": period}
+    closed_range = end is not None and pd.Timestamp(end) < pd.Timestamp.now().normalize()
+
+    unique = list(dict.fromkeys(tickers))
+    frames = []
+    total_chunks = (len(unique) + chunk_size - 1) // chunk_size
+
+    for i, chunk in enumerate(_chunks(unique, chunk_size), 1):
+        print(f"📦 Downloading chunk {i}/{total_chunks} ({len(chunk)} tickers)...")
+        try:
+            fetch = lambda chunk=chunk: _normalize_chunk(downloader(chunk, **kwargs), chunk)
+            if use_cache and downloader is _yf_download:
+                panel = get_cache().get_or_fetch(
+                    "panel", ",".join(chunk), kwargs,
+                    fetch=fetch,
+                    expires_at=(lambda: time.time() + HISTORICAL_TTL_SECONDS) if closed_range else next_market_close,
+                )
+            else:
+                panel = fetch()
+        except Exception as e:
+            print(f"⚠️  Chunk {i} failed: {e}")
+            continue
+
+        if panel is not None and not panel.empty:
+            frames.append(panel)
+
+        if i < total_chunks and _is_live(downloader):
+            time.sleep(CHUNK_DELAY)
+
+    if not frames:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=["field", "ticker"]))
+
+    panel = pd.concat(frames, axis=1).sort_index()
+    return panel.loc[:, ~panel.columns.duplicated()]
+
+
+def panel_history(panel: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """
+    Extract one ticker's OHLCV from a price panel, in `Ticker.history` layout
+    (columns Open/High/Low/Close/Volume, rows without a close dropped).
+    """
+    if panel.empty or symbol not in panel.columns.get_level_values(1):
+        return pd.DataFrame(columns=PANEL_FIELDS)
+    hist = panel.xs(symbol, axis=1, level=1)
+    return hist.dropna(subset=["Close"])
+
+
+def panel_field(panel: pd.DataFrame, field: str = "Close") -> pd.DataFrame:
+    """(dates x tickers) matrix for one field."""
+    return panel.xs(field, axis=1, level=0)
+
+
+class RecordedDownloader:
+    """
+    Offline stand-in for yf.download.
+
+    In replay mode (default) each call is answered from a pickle recorded
+    under `directory`, keyed by a hash of the ticker chunk and request
+    arguments; a missing recording raises FileNotFoundError instead of
+    touching the network. With `record=True` calls go to the real downloader
+    and the responses are saved for later replay.
+    """
+
+    def __init__(self, directory: str, record: bool = False, downloader: Optional[Callable[..., pd.DataFrame]] = None):
+        self.directory = directory
+        self.record = record
+        self.downloader = downloader or _yf_download
+        self.calls = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def live(self) -> bool:
+        """Recording goes to the wrapped downloader; replay never touches the network."""
+        return self.record and _is_live(self.downloader)
+
+    def _path(self, tickers: List[str], kwargs: dict) -> str:
+        blob = json.dumps({"tickers": sorted(tickers), "kwargs": kwargs}, sort_keys=True, default=str)
+        digest = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.pkl")
+
+    def __call__(self, tickers: List[str], **kwargs) -> pd.DataFrame:
+        self.calls += 1
+        path = self._path(tickers, kwargs)
+
+        if self.record:
+            response = self.downloader(tickers, **kwargs)
+            with open(path, 'wb') as f:
+                pickle.dump(response, f)
+            return response
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded response for {len(tickers)} tickers {kwargs} ({path})")
+        with open(path, 'rb') as f:
+            return pickle.load(f)
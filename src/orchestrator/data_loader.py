@@ -1,15 +1,112 @@
-import yfinance as yf
 import pandas as pd
+from typing import Optional
+from orchestrator.market_cache import fetch_info, fetch_history, slice_period, HISTORY_PERIOD
 from orchestrator.technical_indicators import get_technical_indicators
 
+class TickerSnapshot:
+    """
+    Single-fetch view of one ticker: `.info` plus one OHLCV history.
+
+    Fundamentals, technical indicators and the historical price behind the
+    realized return are all derived from this one in-memory object, so a
+    dataset row costs one info request and one history request.
+    """
+
+    def __init__(self, symbol: str, info: Optional[dict] = None, history: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            symbol: Stock ticker symbol
+            info: Pre-fetched `yf.Ticker.info` (fetched lazily if omitted)
+            history: Pre-fetched daily OHLCV covering at least 395 days (fetched lazily if omitted)
+        """
+        self.symbol = symbol
+        self._info = info
+        self._history = history
+        self._stock_data = None
+
+    @classmethod
+    def fetch(cls, symbol: str) -> "TickerSnapshot":
+        """Create a snapshot and download both parts up front."""
+        snapshot = cls(symbol)
+        # Touch both lazy properties so the downloads happen here
+        snapshot.info
+        snapshot.history
+        return snapshot
+
+    @property
+    def info(self) -> dict:
+        if self._info is None:
+            self._info = fetch_info(self.symbol)
+        return self._info
+
+    @property
+    def history(self) -> pd.DataFrame:
+        if self._history is None:
+            self._history = fetch_history(self.symbol, period=HISTORY_PERIOD)
+        return self._history
+
+    def history_for(self, period: str) -> pd.DataFrame:
+        """Trailing slice of the snapshot history (e.g. "1y" for indicators)."""
+        return slice_period(self.history, period)
+
+    def stock_data(self, strict: bool = False) -> dict:
+        """
+        Fundamentals + technical indicators, same schema as get_real_stock_data.
+
+        Args:
+            strict: Raise when the download failed (empty `.info`, or a price
+                    but no history) or the data cannot be parsed, instead of
+                    returning the zero-price defaults. A zero price then only
+                    means the ticker genuinely has none (delisted, no quote).
+        """
+        if self._stock_data is None:
+            self._stock_data = _build_stock_data(self, strict=strict)
+        return dict(self._stock_data)
+
+    def historical_price(self, days_ago: int = 365) -> float:
+        """Close price from N trading days ago (see get_historical_price)."""
+        try:
+            hist = self.history_for(f"{days_ago+30}d")  # Extra buffer
+
+            if len(hist) < days_ago:
+                print(f"Warning: Insufficient history for {self.symbol}")
+                return 0.0
+
+            # Get price from approximately N days ago
+            target_date = hist.index[-days_ago] if len(hist) >= days_ago else hist.index[0]
+            historical_price = hist.loc[target_date, 'Close']
+
+            return float(historical_price)
+
+        except Exception as e:
+            print(f"Error fetching historical price for {self.symbol}: {e}")
+            return 0.0
+
+    def actual_return(self, days_ago: int = 365) -> float:
+        """Realized return (%) from N days ago to the current price; 0.0 if unavailable."""
+        hist_price = self.historical_price(days_ago)
+        if hist_price <= 0:
+            return 0.0
+        current_price = self.stock_data()["current_price"]
+        return ((current_price - hist_price) / hist_price) * 100
+
 def get_real_stock_data(symbol: str) -> dict:
     """
     Fetches comprehensive financial data from Yahoo Finance.
     Returns 0.0 for missing values to prevent Pydantic crashes.
     """
+    return TickerSnapshot(symbol).stock_data()
+
+def _build_stock_data(snapshot: TickerSnapshot, strict: bool = False) -> dict:
+    """Assemble the flat metrics dict from a snapshot's info and history."""
+    symbol = snapshot.symbol
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
+        info = snapshot.info
+        # yfinance returns nothing instead of raising when a download fails
+        if strict and not info:
+            raise ConnectionError(f"No .info returned for {symbol}")
+        if strict and info.get("currentPrice") and snapshot.history.empty:
+            raise ConnectionError(f"No price history returned for {symbol}")
 
         # Helper to safely get float values
         def get_float(key, default=0.0):
@@ -42,7 +139,7 @@ def get_real_stock_data(symbol: str) -> dict:
         
         # V3.0: ADD TECHNICAL INDICATORS
         try:
-            tech_indicators = get_technical_indicators(symbol)
+            tech_indicators = get_technical_indicators(symbol, hist=snapshot.history_for("1y"))
             data.update(tech_indicators)
         except Exception as e:
             print(f"Warning: Could not fetch technical indicators for {symbol}: {e}")
@@ -60,6 +157,8 @@ def get_real_stock_data(symbol: str) -> dict:
         return data
 
     except Exception as e:
+        if strict:
+            raise
         print(f"Error fetching data for {symbol}: {e}")
         # Return zombie object with defaults
         return {
@@ -92,20 +191,4 @@ def get_historical_price(symbol: str, days_ago: int = 365) -> float:
     Fetch historical stock price from N days ago.
     Used for backtesting and calculating actual returns.
     """
-    try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period=f"{days_ago+30}d")  # Extra buffer
-        
-        if len(hist) < days_ago:
-            print(f"Warning: Insufficient history for {symbol}")
-            return 0.0
-        
-        # Get price from approximately N days ago
-        target_date = hist.index[-days_ago] if len(hist) >= days_ago else hist.index[0]
-        historical_price = hist.loc[target_date, 'Close']
-        
-        return float(historical_price)
-    
-    except Exception as e:
-        print(f"Error fetching historical price for {symbol}: {e}")
-        return 0.0
+    return TickerSnapshot(symbol).historical_price(days_ago)
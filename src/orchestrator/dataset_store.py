@@ -0,0 +1,220 @@
+"""
+Dataset Store
+
+Columnar Parquet storage for the datasets in results/datasets. Before it,
+every script parsed a wide CSV such as dataset_n600_plus.csv, with dtypes
+inferred on each run, and column types drifted between files.
+
+Layout (hive partitioned, one directory per build):
+
+    results/datasets/store/<name>/snapshot_date=2026-01-01/part-0.parquet
+    results/datasets/store/<name>/snapshot_date=2026-01-01/Year=2020/<file>.parquet
+
+- Every write casts the frame to the explicit COLUMN_TYPES schema. Features
+  are stored as float32, which is what XGBoost trains on anyway. Labels,
+  prices and scores stay float64.
+- Multi-year sets are also partitioned by Year (or Cutoff_Date), so a
+  filtered read only opens the matching files.
+- Reads are column-projected: load_dataset(name, columns=[...]) only
+  decodes those columns.
+- The CSV next to the store remains the human-readable export. When a
+  dataset has no snapshot yet, or its CSV is newer than the latest
+  snapshot, load_dataset imports the CSV first.
+
+Usage:
+    write_dataset(df, "dataset_n600_plus", csv_path="results/datasets/dataset_n600_plus.csv")
+    df = load_dataset("dataset_n600_plus", columns=["Symbol", "rsi", "Actual_Return_1Y"])
+"""
+
+import os
+import shutil
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+# Configuration
+SOURCE_DIR = os.path.join("results", "datasets")  # Human-readable CSV exports
+STORE_DIR = os.environ.get("DATASET_STORE_DIR", os.path.join(SOURCE_DIR, "store"))
+SNAPSHOT_KEY = "snapshot_date"
+PARTITION_COLUMNS = ("Year", "Cutoff_Date")  # Partition keys used when present
+
+# Explicit schema shared by every dataset
+LABEL_COLUMNS = [
+    "Trust_Score", "Actual_Return_1Y", "Actual_Return",
+    "Current_Price", "current_price", "Start_Price", "End_Price", "Close_Cutoff", "Close_Future",
+]
+FEATURE_COLUMNS = [
+    # Fundamentals
+    "pe_ratio", "debt_to_equity", "revenue_growth", "profit_margins", "roe", "free_cash_flow",
+    "dividend_yield", "cash_reserves", "operating_costs", "net_income", "analyst_target",
+    # Technical indicators
+    "rsi", "macd", "macd_signal", "roc", "sma_50", "sma_200", "ema_20", "price_vs_sma50",
+    "price_vs_sma200", "bb_upper", "bb_lower", "bb_position", "atr", "volatility",
+    "volume_trend", "volume_ratio", "trend_strength",
+]
+COLUMN_TYPES: Dict[str, str] = {
+    "Symbol": "string",
+    "Verdict": "category",
+    "sector": "category",
+    "Year": "Int16",  # Nullable: a row without a year must not fail the cast
+    "Cutoff_Date": "string",
+    **{column: "float64" for column in LABEL_COLUMNS},
+    **{column: "float32" for column in FEATURE_COLUMNS},
+}
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast known columns to COLUMN_TYPES; unknown columns keep their inferred dtype."""
+    types = {column: dtype for column, dtype in COLUMN_TYPES.items()
+             if column in df.columns and str(df[column].dtype) != dtype}
+    if not types:
+        return df
+    # Partition columns come back from a read as categories of their values
+    frame = df.astype({column: "object" for column in types if isinstance(df[column].dtype, pd.CategoricalDtype)
+                       and types[column] != "category"})
+    return frame.astype(types)
+
+
+def schema_drift(df: pd.DataFrame) -> List[str]:
+    """Columns of `df` that are not in the schema."""
+    return [column for column in df.columns if column not in COLUMN_TYPES]
+
+
+def dataset_dir(name: str, store_dir: str = STORE_DIR) -> str:
+    return os.path.join(store_dir, name)
+
+
+def list_snapshots(name: str, store_dir: str = STORE_DIR) -> List[str]:
+    """Snapshot dates of a dataset, oldest first."""
+    try:
+        entries = os.listdir(dataset_dir(name, store_dir))
+    except OSError:
+        return []
+    prefix = f"{SNAPSHOT_KEY}="
+    return sorted(entry[len(prefix):] for entry in entries
+                  if entry.startswith(prefix) and not entry.endswith(".tmp"))
+
+
+def snapshot_path(name: str, snapshot: Optional[str] = None, store_dir: str = STORE_DIR) -> Optional[str]:
+    """Directory of one snapshot (the latest by default), or None if there is none."""
+    snapshots = list_snapshots(name, store_dir)
+    if snapshot is None:
+        snapshot = snapshots[-1] if snapshots else None
+    if snapshot not in snapshots:
+        return None
+    return os.path.join(dataset_dir(name, store_dir), f"{SNAPSHOT_KEY}={snapshot}")
+
+
+_write_lock = threading.Lock()
+
+
+def write_dataset(df: pd.DataFrame, name: str, snapshot_date: Optional[str] = None,
+                  partition_by: Optional[Sequence[str]] = None, csv_path: Optional[str] = None,
+                  store_dir: str = STORE_DIR) -> str:
+    """
+    Store a dataset snapshot, replacing any earlier snapshot of the same date.
+
+    Args:
+        df: Dataset rows
+        name: Dataset name (the CSV stem, e.g. "dataset_n600_plus")
+        snapshot_date: YYYY-MM-DD of the build (default: today)
+        partition_by: Extra partition columns (default: the PARTITION_COLUMNS present
+                      without missing values)
+        csv_path: Also export the snapshot to this CSV
+        store_dir: Store root
+
+    Returns:
+        The snapshot directory.
+    """
+    snapshot_date = snapshot_date or date.today().isoformat()
+    if partition_by is None:
+        # A key with missing values stays a plain column (pyarrow cannot partition on nulls)
+        partition_by = [column for column in PARTITION_COLUMNS
+                        if column in df.columns and df[column].notna().all()]
+    drift = schema_drift(df)
+    if drift:
+        print(f"⚠️  {name}: columns not in the dataset schema, stored as inferred: {drift}")
+    frame = apply_schema(df.reset_index(drop=True))
+    if csv_path is not None:
+        # Exported first, so the snapshot is not older than its CSV (see load_dataset)
+        export_csv(frame, csv_path)
+
+    target = os.path.join(dataset_dir(name, store_dir), f"{SNAPSHOT_KEY}={snapshot_date}")
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if partition_by:
+        # Partition values live in directory names; apply_schema restores the dtype on read
+        partitioned = frame.astype({column: "object" for column in partition_by})
+        partitioned.to_parquet(tmp, partition_cols=list(partition_by), index=False)
+    else:
+        os.makedirs(tmp)
+        frame.to_parquet(os.path.join(tmp, "part-0.parquet"), index=False)
+
+    # Swap the directory in; readers see the old or the new snapshot, never a mix
+    with _write_lock:
+        old = f"{target}.old.tmp"
+        if os.path.exists(target):
+            os.replace(target, old)
+        os.replace(tmp, target)
+        shutil.rmtree(old, ignore_errors=True)
+    return target
+
+
+def export_csv(df: pd.DataFrame, csv_path: str):
+    """Human-readable CSV copy of a dataset."""
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+    df.to_csv(csv_path, index=False)
+
+
+def import_csv(csv_path: str, name: Optional[str] = None, store_dir: str = STORE_DIR) -> str:
+    """Store a CSV as a snapshot dated by the file's modification time. Returns the snapshot directory."""
+    name = name or os.path.splitext(os.path.basename(csv_path))[0]
+    snapshot_date = datetime.fromtimestamp(os.path.getmtime(csv_path)).date().isoformat()
+    return write_dataset(pd.read_csv(csv_path), name, snapshot_date=snapshot_date, store_dir=store_dir)
+
+
+def load_dataset(name: str, columns: Optional[Sequence[str]] = None, snapshot: Optional[str] = None,
+                 filters: Optional[list] = None, store_dir: str = STORE_DIR,
+                 source_dir: str = SOURCE_DIR) -> pd.DataFrame:
+    """
+    Read a dataset snapshot.
+
+    Args:
+        name: Dataset name (e.g. "dataset_n600_plus")
+        columns: Only read these columns (memory and time scale with this list)
+        snapshot: Snapshot date (default: the latest)
+        filters: pyarrow filters, e.g. [("Year", ">=", 2022)]; skips whole partitions
+        store_dir: Store root
+        source_dir: Where <name>.csv is looked up for the initial import
+
+    Raises:
+        FileNotFoundError: Neither a snapshot nor a CSV exists for the dataset
+    """
+    if snapshot is None:
+        path = current_snapshot(name, store_dir, source_dir)
+    else:
+        path = snapshot_path(name, snapshot, store_dir)
+    if path is None:
+        raise FileNotFoundError(f"No snapshot {snapshot or '(latest)'} of dataset '{name}' in {store_dir}")
+
+    df = pd.read_parquet(path, columns=list(columns) if columns is not None else None, filters=filters)
+    return apply_schema(df)
+
+
+def current_snapshot(name: str, store_dir: str = STORE_DIR, source_dir: str = SOURCE_DIR) -> Optional[str]:
+    """Latest snapshot directory, importing <name>.csv first if it is newer (or there is no snapshot)."""
+    path = snapshot_path(name, None, store_dir)
+    csv_path = os.path.join(source_dir, f"{name}.csv")
+    if os.path.exists(csv_path) and (path is None or os.path.getmtime(csv_path) > os.path.getmtime(path)):
+        path = import_csv(csv_path, name, store_dir)
+    return path
+
+
+def dataset_columns(name: str, store_dir: str = STORE_DIR, source_dir: str = SOURCE_DIR) -> List[str]:
+    """Columns of the latest snapshot (partition keys included), read from the schema only."""
+    path = current_snapshot(name, store_dir, source_dir)
+    if path is None:
+        raise FileNotFoundError(f"No snapshot (latest) of dataset '{name}' in {store_dir}")
+    return ds.dataset(path, format="parquet", partitioning="hive").schema.names
@@ -36,7 +36,7 @@ def run_neurosymbolic(symbol):
     Neuro-Symbolic Agent: LLM + Rule Engine.
     """
     try:
-        result = run_analysis(symbol)
+        result = run_analysis(symbol, reasoning="none")
         return result["trust_score"], result["final_verdict"]
     except Exception as e:
         return 0.0, f"Error: {e}"
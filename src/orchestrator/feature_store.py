@@ -0,0 +1,310 @@
+"""
+Point-in-Time Feature Store
+
+Indicator and fundamental values per (symbol, date). A query for "features as
+of T" is then a lookup rather than a recomputation, and the lookup enforces
+no look-ahead on its own.
+
+Tables, one Parquet file per symbol (<root>/<table>/symbol=<SYM>/part-0.parquet):
+
+- technical:     one row per trading day with the indicators
+                 calculate_indicator_history reports for that bar, plus its close
+- fundamentals:  one row per fiscal year, dated when the annual report became
+                 public (period end + REPORTING_LAG_DAYS), not when the period ended
+
+as_of_join() picks, for each (symbol, as_of) key, the latest row of every
+table dated strictly before as_of (a backward pd.merge_asof). A value from
+after the cutoff can never be joined. Fundamentals also stop repeating
+across years: each cutoff sees the last annual report published before it,
+instead of today's `.info`.
+
+Usage:
+    store = FeatureStore()
+    store.put("technical", calculate_indicator_history(close, high, low, volume))
+    store.put("fundamentals", fundamentals_history("META", **fetch_statements("META")))
+    X = store.features_as_of(["AAPL", "META"], "2023-01-01")
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    from orchestrator.market_cache import get_cache
+    from orchestrator.technical_indicators import get_default_indicators
+except ImportError:  # Imported as src.orchestrator.feature_store
+    from src.orchestrator.market_cache import get_cache
+    from src.orchestrator.technical_indicators import get_default_indicators
+
+# Configuration
+FEATURE_STORE_DIR = os.environ.get("FEATURE_STORE_DIR", os.path.join("data", "features"))
+TABLES = ("technical", "fundamentals")
+REPORTING_LAG_DAYS = 90  # Annual reports are public up to ~60-90 days after the fiscal year end
+MAX_STALENESS = {
+    "technical": pd.Timedelta(days=10),     # No bar for two weeks -> delisted / halted, no features
+    "fundamentals": pd.Timedelta(days=550),  # Skipped one annual report -> no fundamentals
+}
+
+# Line items per field, first one present wins (yfinance statement row labels)
+STATEMENT_ITEMS = {
+    "revenue": ("income", ["Total Revenue", "Operating Revenue"]),
+    "net_income": ("income", ["Net Income Common Stockholders", "Net Income"]),
+    "operating_costs": ("income", ["Operating Expense", "Total Expenses"]),
+    "eps": ("income", ["Diluted EPS", "Basic EPS"]),
+    "equity": ("balance", ["Stockholders Equity", "Common Stock Equity"]),
+    "total_debt": ("balance", ["Total Debt"]),
+    "cash_reserves": ("balance", ["Cash Cash Equivalents And Short Term Investments", "Cash And Cash Equivalents"]),
+    "free_cash_flow": ("cashflow", ["Free Cash Flow"]),
+}
+FUNDAMENTAL_COLUMNS = ["revenue_growth", "profit_margins", "roe", "debt_to_equity", "free_cash_flow",
+                       "net_income", "cash_reserves", "operating_costs", "eps", "period_end"]
+TABLE_COLUMNS = {  # Columns every as_of_join result has, whether or not rows matched
+    "technical": ["close", *get_default_indicators()],
+    "fundamentals": FUNDAMENTAL_COLUMNS,
+}
+
+
+def fetch_statements(symbol: str) -> Dict[str, pd.DataFrame]:
+    """Annual income statement, balance sheet and cash flow (yfinance layout), cached like `.info`."""
+    def fetch():
+        ticker = yf.Ticker(symbol)
+        statements = {"income": ticker.income_stmt, "balance": ticker.balance_sheet, "cashflow": ticker.cashflow}
+        # All empty -> {} so the cache does not keep a failed download
+        return statements if any(len(frame) for frame in statements.values()) else {}
+
+    cache = get_cache()
+    return cache.get_or_fetch("statements", symbol, None, fetch=fetch,
+                              expires_at=lambda: time.time() + cache.info_ttl)
+
+
+def fundamentals_history(symbol: str, income: Optional[pd.DataFrame] = None,
+                         balance: Optional[pd.DataFrame] = None, cashflow: Optional[pd.DataFrame] = None,
+                         lag_days: int = REPORTING_LAG_DAYS) -> pd.DataFrame:
+    """
+    Point-in-time fundamentals from annual statements.
+
+    Ratios use the same units as `.info` (revenue_growth, profit_margins and
+    roe as fractions, debt_to_equity in percent), so rows line up with the
+    current-snapshot datasets.
+
+    Returns:
+        One row per fiscal year: symbol, date (when the numbers became public)
+        and FUNDAMENTAL_COLUMNS. Empty if no statement has data.
+    """
+    statements = {"income": income, "balance": balance, "cashflow": cashflow}
+    fields = {}
+    for field, (statement, items) in STATEMENT_ITEMS.items():
+        frame = statements[statement]
+        if frame is None or frame.empty:
+            continue
+        for item in items:
+            if item in frame.index:
+                fields[field] = pd.to_numeric(frame.loc[item], errors="coerce")
+                break
+    if not fields:
+        return pd.DataFrame(columns=["symbol", "date"] + FUNDAMENTAL_COLUMNS)
+
+    df = pd.DataFrame(fields).reindex(columns=list(STATEMENT_ITEMS))
+    df.index = pd.to_datetime(df.index).tz_localize(None) if getattr(df.index, "tz", None) else pd.to_datetime(df.index)
+    df = df.sort_index()
+
+    out = pd.DataFrame(index=df.index)
+    out["revenue_growth"] = df["revenue"] / df["revenue"].shift() - 1  # Annual statements -> YoY
+    out["profit_margins"] = df["net_income"] / df["revenue"]
+    out["roe"] = df["net_income"] / df["equity"]
+    out["debt_to_equity"] = df["total_debt"] / df["equity"] * 100
+    for column in ("free_cash_flow", "net_income", "cash_reserves", "operating_costs", "eps"):
+        out[column] = df[column]
+    out = out.replace([np.inf, -np.inf], np.nan)
+    out["period_end"] = out.index
+    out["date"] = out.index + pd.Timedelta(days=lag_days)
+    out["symbol"] = symbol
+    return out.reset_index(drop=True)[["symbol", "date"] + FUNDAMENTAL_COLUMNS]
+
+
+def add_price_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    P/E from the as-of close and the last published EPS (0.0 when EPS is
+    missing or not positive, like a missing trailingPE; NaN without a close).
+    """
+    if "eps" in df.columns:
+        eps = df["eps"].to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float) if "close" in df.columns else np.full(len(df), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df["pe_ratio"] = np.where(eps > 0, close / eps, 0.0)
+    return df
+
+
+def _normalize_dates(values) -> pd.Series:
+    dates = pd.to_datetime(pd.Series(values))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)  # Keep the exchange-local calendar date
+    return dates.astype("datetime64[ns]")
+
+
+class FeatureStore:
+    """
+    Parquet-backed (symbol, date) feature tables with as-of joins.
+
+    put() replaces a symbol's rows in a table atomically, so a recomputed
+    history never mixes with the previous one.
+    """
+
+    def __init__(self, root: str = FEATURE_STORE_DIR):
+        self.root = root
+
+    def _symbol_dir(self, table: str, symbol: str) -> str:
+        return os.path.join(self.root, table, f"symbol={symbol}")
+
+    def put(self, table: str, frame: pd.DataFrame) -> int:
+        """
+        Store rows for every symbol in `frame`, replacing that symbol's previous rows.
+
+        Args:
+            table: Table name (see TABLES)
+            frame: Long rows with symbol and date, as columns or as a (ticker, date)
+                   index like calculate_indicator_history output
+
+        Returns:
+            Number of rows written.
+        """
+        df = frame.reset_index() if frame.index.nlevels > 1 or frame.index.name else frame.copy()
+        df = df.rename(columns={"ticker": "symbol"})
+        if df.empty:
+            return 0
+        df["date"] = _normalize_dates(df["date"]).to_numpy()
+
+        for symbol, rows in df.groupby("symbol", sort=False):
+            path = self._symbol_dir(table, str(symbol))
+            os.makedirs(path, exist_ok=True)
+            target = os.path.join(path, "part-0.parquet")
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            rows.drop(columns="symbol").sort_values("date").to_parquet(tmp, index=False)
+            os.replace(tmp, target)
+        return len(df)
+
+    def symbols(self, table: str) -> List[str]:
+        """Symbols with rows in `table`."""
+        try:
+            entries = os.listdir(os.path.join(self.root, table))
+        except OSError:
+            return []
+        return sorted(entry[len("symbol="):] for entry in entries if entry.startswith("symbol="))
+
+    def read(self, table: str, symbols: Optional[Iterable[str]] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Long rows (symbol, date, features...) of `table`, optionally for some symbols / columns only."""
+        stored = set(self.symbols(table))
+        wanted = sorted(stored if symbols is None else stored.intersection(symbols))
+        frames = []
+        for symbol in wanted:
+            path = os.path.join(self._symbol_dir(table, symbol), "part-0.parquet")
+            df = pd.read_parquet(path, columns=None if columns is None else ["date", *columns])
+            df.insert(0, "symbol", symbol)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["symbol", "date", *(columns or [])])
+        return pd.concat(frames, ignore_index=True)
+
+    def as_of_join(self, keys: pd.DataFrame, tables: Sequence[str] = TABLES, inclusive: bool = False,
+                   columns: Optional[Dict[str, Sequence[str]]] = None) -> pd.DataFrame:
+        """
+        Features of each (symbol, as_of) key, from rows dated before as_of.
+
+        Args:
+            keys: DataFrame with 'symbol' and 'as_of' columns (any other columns are kept)
+            tables: Tables to join
+            inclusive: Also accept rows dated exactly as_of (default: strictly before,
+                       matching the temporal dataset's no-look-ahead split)
+            columns: {table: columns} to read (default: all)
+
+        Returns:
+            `keys` (same row order) plus each table's columns (TABLE_COLUMNS, even
+            if the table has no rows for these symbols) and a '<table>_date'
+            column with the date of the joined row (NaT / NaN when none qualifies).
+            Joining fundamentals adds pe_ratio.
+        """
+        result = keys.copy()
+        result["as_of"] = _normalize_dates(result["as_of"]).to_numpy()
+        result["_row"] = np.arange(len(result))
+        symbols = result["symbol"].unique().tolist()
+
+        for table in tables:
+            right = self.read(table, symbols, (columns or {}).get(table))
+            right = right.rename(columns={"date": f"{table}_date"})
+            right[f"{table}_date"] = _normalize_dates(right[f"{table}_date"]).to_numpy()
+            right["symbol"] = right["symbol"].astype(result["symbol"].dtype)
+            result = pd.merge_asof(
+                result.sort_values("as_of"), right.sort_values(f"{table}_date"),
+                left_on="as_of", right_on=f"{table}_date", by="symbol",
+                allow_exact_matches=inclusive, direction="backward",
+                tolerance=MAX_STALENESS.get(table),
+            )
+            # No stored rows for these symbols -> same columns, all missing
+            wanted = (columns or {}).get(table, TABLE_COLUMNS.get(table, []))
+            for column in wanted:
+                if column not in result.columns:
+                    result[column] = pd.NaT if column == "period_end" else np.nan
+
+        result = result.sort_values("_row").drop(columns="_row").reset_index(drop=True)
+        return add_price_ratios(result)
+
+    def features_as_of(self, symbols: Iterable[str], as_of, tables: Sequence[str] = TABLES,
+                       inclusive: bool = False) -> pd.DataFrame:
+        """(symbols x features) snapshot as of one date; see as_of_join."""
+        keys = pd.DataFrame({"symbol": list(symbols)})
+        keys["as_of"] = pd.Timestamp(as_of)
+        return self.as_of_join(keys, tables, inclusive).set_index("symbol").drop(columns="as_of")
+
+
+def refresh_fundamentals(symbols: Iterable[str], store: Optional[FeatureStore] = None,
+                         force: bool = False, workers: int = 8) -> int:
+    """
+    Download annual statements for symbols missing from the fundamentals table.
+
+    Args:
+        symbols: Tickers
+        store: Feature store (default: the global one)
+        force: Refresh symbols that already have rows
+        workers: Download threads (live concurrency is set by the "yahoo" budget)
+
+    Returns:
+        Number of symbols stored.
+    """
+    store = store or get_feature_store()
+    stored = set() if force else set(store.symbols("fundamentals"))
+    todo = [symbol for symbol in dict.fromkeys(symbols) if symbol not in stored]
+
+    def refresh(symbol):
+        try:
+            rows = fundamentals_history(symbol, **fetch_statements(symbol))
+        except Exception:
+            return 0  # No statements (ETF, delisted); the join leaves NaN
+        return int(store.put("fundamentals", rows) > 0)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(refresh, todo))
+
+
+# Global store instance
+_store = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Get or create the global feature store"""
+    global _store
+    if _store is None:
+        _store = FeatureStore()
+    return _store
+
+
+def set_feature_store(store: Optional[FeatureStore]):
+    """Replace the global feature store (e.g. with a temporary one in tests)."""
+    global _store
+    _store = store
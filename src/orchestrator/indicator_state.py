@@ -0,0 +1,334 @@
+"""
+Incremental Indicator State
+
+Streaming version of the technical indicators: an IndicatorState keeps the
+running sums, ring buffers and EWM accumulators behind every indicator in
+technical_indicators.py, so a new daily bar is absorbed in O(1) instead of
+recomputing a year of rolling windows.
+
+After any number of updates, `indicators()` returns what
+calculate_indicator_history reports for the latest bar with the same
+lookback (i.e. get_technical_indicators on the trailing `lookback` bars).
+States serialize to plain dicts/JSON for a nightly refresh job.
+"""
+
+import json
+import math
+from collections import deque
+from typing import Dict, Optional
+
+import pandas as pd
+
+try:
+    from orchestrator.technical_indicators import get_default_indicators
+except ImportError:  # Imported as src.orchestrator.indicator_state
+    from src.orchestrator.technical_indicators import get_default_indicators
+
+RESYNC_EVERY = 1000  # Recompute running sums from the buffer to cancel float drift
+
+
+class RollingWindow:
+    """
+    Fixed-size window with O(1) mean, sample std and least-squares slope.
+
+    Keeps the sum (for the mean), Welford's M2 (for a stable variance), the
+    x-weighted sum used by the closed-form regression slope, and the count of
+    non-zero values (so an all-zero window has an exactly-zero mean, as in
+    pandas).
+    """
+
+    def __init__(self, size: int, values=()):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self._pushes = 0
+        self._reset(values)
+
+    def _reset(self, values):
+        self.values.clear()
+        self.values.extend(values)
+        n = len(self.values)
+        self.total = math.fsum(self.values)
+        self.mean_ = self.total / n if n else 0.0
+        self.m2 = math.fsum((v - self.mean_) ** 2 for v in self.values)
+        self.sum_xy = math.fsum(k * v for k, v in enumerate(self.values))
+        self.nonzero = sum(1 for v in self.values if v != 0)
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            self._remove_oldest()
+        n = len(self.values)
+        # x positions are 0..n-1; the new value lands at x = n
+        self.sum_xy += n * value
+        self.values.append(value)
+        self.total += value
+        delta = value - self.mean_
+        self.mean_ += delta / (n + 1)
+        self.m2 += delta * (value - self.mean_)
+        self.nonzero += value != 0
+
+        self._pushes += 1
+        if self._pushes % RESYNC_EVERY == 0:
+            self._reset(list(self.values))
+
+    def _remove_oldest(self):
+        old = self.values.popleft()
+        n = len(self.values)
+        self.total -= old
+        # Shift x positions down by one: sum((k-1) * v_k) over the remaining values
+        self.sum_xy = self.sum_xy - self.total
+        if n:
+            delta = old - self.mean_
+            self.mean_ -= delta / n
+            self.m2 -= delta * (old - self.mean_)
+        else:
+            self.mean_, self.m2 = 0.0, 0.0
+        self.nonzero -= old != 0
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        if not self.values:
+            return math.nan
+        return 0.0 if self.nonzero == 0 else self.total / len(self.values)
+
+    def std(self) -> float:
+        n = len(self.values)
+        return math.sqrt(max(self.m2, 0.0) / (n - 1)) if n > 1 else math.nan
+
+    def slope(self) -> float:
+        """Least-squares slope against x = 0..n-1."""
+        n = len(self.values)
+        if n < 2:
+            return math.nan
+        x_mean = (n - 1) / 2
+        x_var = n * (n * n - 1) / 12  # sum((x - x_mean)^2)
+        return (self.sum_xy - x_mean * self.total) / x_var
+
+    def first(self) -> float:
+        return self.values[0]
+
+
+class EWMean:
+    """pandas `ewm(span=...).mean()` (adjust=True) as a two-number recurrence."""
+
+    def __init__(self, span: int, numerator: float = 0.0, denominator: float = 0.0):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = numerator
+        self.denominator = denominator
+
+    def push(self, value: float) -> float:
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.value()
+
+    def value(self) -> float:
+        return self.numerator / self.denominator if self.denominator else math.nan
+
+
+class IndicatorState:
+    """
+    Running state for every technical indicator of one ticker.
+
+    Usage:
+        state = IndicatorState.from_history(hist)       # one-off replay
+        state.update(close, high, low, volume)          # each new bar, O(1)
+        state.indicators()                              # same keys as get_technical_indicators
+    """
+
+    def __init__(self, lookback: int = 252, min_history: int = 50):
+        self.lookback = lookback
+        self.min_history = min_history
+        self.bars = 0
+        self.last_close = None
+
+        self.closes_20 = RollingWindow(20)     # Bollinger, ROC, trend strength
+        self.closes_50 = RollingWindow(50)     # SMA-50
+        self.closes_200 = RollingWindow(200)   # SMA-200
+        self.closes_window = RollingWindow(lookback)  # SMA-200 fallback (short history)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.true_range = RollingWindow(14)
+        self.returns = RollingWindow(lookback - 1)
+        self.volumes_20 = RollingWindow(20)
+        self.volumes_window = RollingWindow(lookback)
+        self.last_volume = None
+
+        self.ema_12 = EWMean(12)
+        self.ema_26 = EWMean(26)
+        self.ema_20 = EWMean(20)
+        self.macd_signal = EWMean(9)
+
+    @classmethod
+    def from_history(cls, hist: pd.DataFrame, lookback: int = 252, min_history: int = 50) -> "IndicatorState":
+        """Build a state by replaying an OHLCV history (Ticker.history layout)."""
+        state = cls(lookback=lookback, min_history=min_history)
+        has_range = 'High' in hist and 'Low' in hist
+        has_volume = 'Volume' in hist
+        for row in hist.itertuples():
+            state.update(
+                row.Close,
+                high=row.High if has_range else None,
+                low=row.Low if has_range else None,
+                volume=row.Volume if has_volume else None,
+            )
+        return state
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               volume: Optional[float] = None) -> bool:
+        """
+        Absorb one new daily bar.
+
+        A bar without a finite close is ignored (like the rows panel_history
+        drops) and False is returned; a missing high/low or volume only skips
+        the range or volume windows. A NaN would otherwise stay in every
+        running sum and EWM for good.
+        """
+        close = float(close)
+        if not math.isfinite(close):
+            return False
+        if high is not None and low is not None and not (math.isfinite(high) and math.isfinite(low)):
+            high = low = None
+        if volume is not None and not math.isfinite(volume):
+            volume = None
+        prev_close = self.last_close
+
+        # Momentum: the first bar has no delta and counts as a zero gain/loss
+        delta = close - prev_close if prev_close is not None else 0.0
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+        macd = self.ema_12.push(close) - self.ema_26.push(close)
+        self.macd_signal.push(macd)
+        self.ema_20.push(close)
+
+        # Trend / volatility windows
+        for window in (self.closes_20, self.closes_50, self.closes_200, self.closes_window):
+            window.push(close)
+        if prev_close is not None:
+            self.returns.push(close / prev_close - 1)
+
+        if high is not None and low is not None:
+            ranges = [high - low]
+            if prev_close is not None:
+                ranges += [abs(high - prev_close), abs(low - prev_close)]
+            self.true_range.push(max(ranges))
+
+        if volume is not None:
+            self.volumes_20.push(float(volume))
+            self.volumes_window.push(float(volume))
+            self.last_volume = float(volume)
+
+        self.last_close = close
+        self.bars += 1
+        return True
+
+    def indicators(self) -> Dict[str, float]:
+        """Current indicator values (defaults until min_history bars are seen)."""
+        if min(self.bars, self.lookback) < self.min_history:
+            return get_default_indicators()
+
+        price = self.last_close
+        values = {}
+
+        # === MOMENTUM INDICATORS ===
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if not self.gains.full:
+            values['rsi'] = 50.0
+        elif loss == 0:
+            values['rsi'] = 50.0 if gain == 0 else 100.0
+        else:
+            values['rsi'] = 100 - (100 / (1 + gain / loss))
+
+        values['macd'] = self.ema_12.value() - self.ema_26.value()
+        values['macd_signal'] = self.macd_signal.value()
+        price_20_ago = self.closes_20.first() if self.closes_20.full else math.nan
+        values['roc'] = (price - price_20_ago) / price_20_ago * 100 if self.closes_20.full else 0.0
+
+        # === TREND INDICATORS ===
+        values['sma_50'] = self.closes_50.mean() if self.closes_50.full else math.nan
+        window_bars = min(self.bars, self.lookback)
+        values['sma_200'] = self.closes_200.mean() if window_bars >= 200 else self.closes_window.mean()
+        values['ema_20'] = self.ema_20.value()
+        values['price_vs_sma50'] = (price - values['sma_50']) / values['sma_50'] * 100
+        values['price_vs_sma200'] = (price - values['sma_200']) / values['sma_200'] * 100
+
+        # === VOLATILITY INDICATORS ===
+        if self.closes_20.full:
+            mid, spread = self.closes_20.mean(), self.closes_20.std() * 2
+            values['bb_upper'], values['bb_lower'] = mid + spread, mid - spread
+        else:
+            values['bb_upper'], values['bb_lower'] = price * 1.1, price * 0.9
+        values['bb_position'] = (price - values['bb_lower']) / (values['bb_upper'] - values['bb_lower'])
+        values['atr'] = self.true_range.mean() if self.true_range.full else 0.0
+        values['volatility'] = self.returns.std() * math.sqrt(252) * 100  # Annualized
+
+        # === VOLUME INDICATORS ===
+        if self.last_volume is not None:
+            avg_20 = self.volumes_20.mean()
+            trend = (self.last_volume - avg_20) / avg_20 * 100 if self.volumes_20.full and avg_20 else math.nan
+            values['volume_trend'] = 0.0 if math.isnan(trend) else trend
+            values['volume_ratio'] = self.last_volume / self.volumes_window.mean()
+        else:
+            values['volume_trend'], values['volume_ratio'] = 0.0, 1.0
+
+        # === TREND STRENGTH ===
+        values['trend_strength'] = (self.closes_20.slope() / self.closes_20.mean() * 100
+                                    if self.closes_20.full else 0.0)
+
+        return {key: float(values[key]) for key in get_default_indicators()}
+
+    # === SERIALIZATION ===
+
+    _WINDOWS = ['closes_20', 'closes_50', 'closes_200', 'closes_window', 'gains', 'losses',
+                'true_range', 'returns', 'volumes_20', 'volumes_window']
+    _EWMS = ['ema_12', 'ema_26', 'ema_20', 'macd_signal']
+
+    def to_dict(self) -> dict:
+        """Plain-data snapshot of the state (JSON-serializable)."""
+        return {
+            'lookback': self.lookback,
+            'min_history': self.min_history,
+            'bars': self.bars,
+            'last_close': self.last_close,
+            'last_volume': self.last_volume,
+            'windows': {name: list(getattr(self, name).values) for name in self._WINDOWS},
+            'ewms': {name: [getattr(self, name).numerator, getattr(self, name).denominator] for name in self._EWMS},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndicatorState":
+        state = cls(lookback=data['lookback'], min_history=data['min_history'])
+        state.bars = data['bars']
+        state.last_close = data['last_close']
+        state.last_volume = data['last_volume']
+        for name, values in data['windows'].items():
+            getattr(state, name)._reset(values)
+        for name, (numerator, denominator) in data['ewms'].items():
+            ewm = getattr(state, name)
+            ewm.numerator, ewm.denominator = numerator, denominator
+        return state
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, blob: str) -> "IndicatorState":
+        return cls.from_dict(json.loads(blob))
+
+
+def save_states(states: Dict[str, IndicatorState], path: str):
+    """Persist a {symbol: IndicatorState} mapping as one JSON file."""
+    with open(path, 'w') as f:
+        json.dump({symbol: state.to_dict() for symbol, state in states.items()}, f)
+
+
+def load_states(path: str) -> Dict[str, IndicatorState]:
+    """Load a mapping written by save_states."""
+    with open(path, 'r') as f:
+        return {symbol: IndicatorState.from_dict(data) for symbol, data in json.load(f).items()}
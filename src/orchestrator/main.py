@@ -1,92 +1,285 @@
+"""
+Neuro-symbolic pipeline entry point.
+
+Engines are built on first use, not at import: importing this module only
+needs the standard library, so scripts that score with the rules never
+load groq or yfinance and do not need an API key. Construction is
+injectable through Pipeline factories (tests pass fakes, scripts can
+share one engine).
+"""
+
 import json
 import os
 import sys
-from dotenv import load_dotenv
+import threading
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
 
 # Ensure we can import from sibling directories
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from neural_engine.llm_interface import LLMRunner
-from symbolic_engine.rule_checker import FinancialRuleEngine, StockData
-from orchestrator.data_loader import get_real_stock_data
-
-# Try to use multi-key manager, fallback to single key
-try:
-    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
-    from groq_key_manager import get_groq_api_key
-    api_key = get_groq_api_key()
-    print("✅ Using multi-key manager")
-except:
-    api_key = os.environ.get("GROQ_API_KEY")
-    print("⚠️  Using single key (multi-key manager not available)")
-
-# Initialize Engines
-llm_runner = LLMRunner(api_key=api_key)
-rule_engine = FinancialRuleEngine()
-
-def run_analysis(symbol: str):
-    print(f"Starting V2 analysis for {symbol}...")
-
-    # 1. Fetch Real Data
-    print(f"Fetching real data for {symbol}...")
-    raw_data = get_real_stock_data(symbol)
-
-    # Validation Check
-    if raw_data["current_price"] == 0.0:
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SRC_DIR)
+
+if TYPE_CHECKING:
+    from orchestrator.data_loader import TickerSnapshot
+
+# Reasoning modes: the score and verdict come from the rules alone, the LLM
+# only fills llm_reasoning
+REASONING_MODES = ("none", "lazy", "full")
+
+
+def default_llm_runner():
+    """LLMRunner on the multi-key manager's current key, falling back to GROQ_API_KEY."""
+    from neural_engine.llm_interface import LLMRunner
+
+    # Try to use multi-key manager, fallback to single key
+    try:
+        sys.path.append(os.path.join(SRC_DIR, 'utils'))
+        from groq_key_manager import get_groq_api_key
+        api_key = get_groq_api_key()
+        print("✅ Using multi-key manager")
+    except Exception:
+        api_key = os.environ.get("GROQ_API_KEY")
+        print("⚠️  Using single key (multi-key manager not available)")
+    return LLMRunner(api_key=api_key)
+
+
+def default_rule_engine():
+    from symbolic_engine.rule_checker import FinancialRuleEngine
+    return FinancialRuleEngine()
+
+
+def default_snapshot(symbol: str) -> "TickerSnapshot":
+    from orchestrator.data_loader import TickerSnapshot
+    return TickerSnapshot(symbol)
+
+
+class Pipeline:
+    """
+    Rules + LLM pipeline with engines constructed on first use.
+
+    Args:
+        llm_factory: Zero-argument callable returning an object with analyze_stock()
+        rule_engine_factory: Zero-argument callable returning a FinancialRuleEngine
+        snapshot_factory: Callable symbol -> TickerSnapshot, used when run() gets a bare symbol
+    """
+
+    def __init__(self,
+                 llm_factory: Callable = default_llm_runner,
+                 rule_engine_factory: Callable = default_rule_engine,
+                 snapshot_factory: Callable[[str], "TickerSnapshot"] = default_snapshot):
+        self.llm_factory = llm_factory
+        self.rule_engine_factory = rule_engine_factory
+        self.snapshot_factory = snapshot_factory
+        self._llm_runner = None
+        self._rule_engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def llm_runner(self):
+        if self._llm_runner is None:
+            with self._lock:
+                if self._llm_runner is None:
+                    self._llm_runner = self.llm_factory()
+        return self._llm_runner
+
+    @property
+    def rule_engine(self):
+        if self._rule_engine is None:
+            with self._lock:
+                if self._rule_engine is None:
+                    self._rule_engine = self.rule_engine_factory()
+        return self._rule_engine
+
+    def query_reasoning(self, symbol: str, raw_data: dict) -> str:
+        """Ask the LLM for qualitative reasoning on one stock."""
+        print("Querying Llama 3 (Groq)...")
+        llm_response = self.llm_runner.analyze_stock(symbol, raw_data)
+
+        # Handle response (Dict or String)
+        if isinstance(llm_response, str):
+            try:
+                llm_json = json.loads(llm_response)
+                return llm_json.get("reasoning", "No reasoning provided.")
+            except:
+                return str(llm_response)
+        # It's already a dict from the Universal Fuzzy Parser
+        return llm_response.get("reasoning", "No reasoning provided.")
+
+    def run(self, symbol: str = None, snapshot: "TickerSnapshot" = None, reasoning: str = "full"):
+        """
+        Run the neuro-symbolic pipeline for one stock.
+
+        Args:
+            symbol: Stock ticker (fetched through a fresh snapshot)
+            snapshot: Already-fetched TickerSnapshot; reuses its data instead of downloading again
+            reasoning: "full" queries the LLM now, "lazy" returns a DeferredReasoning
+                that queries it on first read, "none" skips it (llm_reasoning is None).
+                Dataset builds only need the score, so they use "none". A lazy
+                result is not JSON-serializable as is; pass it through
+                resolve_analysis (or str() the reasoning) first.
+        """
+        if reasoning not in REASONING_MODES:
+            raise ValueError(f"Unknown reasoning mode '{reasoning}' (expected one of {REASONING_MODES})")
+        if snapshot is None:
+            snapshot = self.snapshot_factory(symbol)
+        symbol = snapshot.symbol
+        print(f"Starting V2 analysis for {symbol}...")
+
+        # 1. Fetch Real Data
+        print(f"Fetching real data for {symbol}...")
+        raw_data = snapshot.stock_data()
+
+        # Validation Check
+        if raw_data["current_price"] == 0.0:
+            return {
+                "symbol": symbol,
+                "trust_score": 0.0,
+                "verdict": "DATA ERROR",
+                "error": "Could not fetch financial data."
+            }
+
+        # 2. Run Symbolic Engine (The "Police" First)
+        # We convert raw dict to Pydantic model for validation
+        from symbolic_engine.rule_checker import StockData
+        stock_model = StockData(**raw_data)
+        rule_result = self.rule_engine.evaluate(stock_model)
+
+        # 3. Run Neural Engine (The "Brain")
+        # We pass the data to LLM for qualitative reasoning
+        if reasoning == "full":
+            llm_reasoning = self.query_reasoning(symbol, raw_data)
+        elif reasoning == "lazy":
+            llm_reasoning = DeferredReasoning(symbol, raw_data, pipeline=self)
+        else:
+            llm_reasoning = None
+
+        # 4. Final Payload
         return {
             "symbol": symbol,
-            "trust_score": 0.0,
-            "verdict": "DATA ERROR",
-            "error": "Could not fetch financial data."
+            "trust_score": rule_result["score"],
+            "verdict": rule_result["verdict"],
+            "price": raw_data["current_price"],
+            "pe_ratio": raw_data["pe_ratio"],
+            "metrics": {
+                "current_price": raw_data["current_price"],
+                "pe_ratio": raw_data["pe_ratio"],
+                "debt_to_equity": raw_data["debt_to_equity"],
+                "revenue_growth": raw_data["revenue_growth"],
+                "cash_reserves": raw_data["cash_reserves"],
+                "operating_costs": raw_data["operating_costs"],
+                "net_income": raw_data["net_income"],
+                "profit_margins": raw_data["profit_margins"],
+                "roe": raw_data["roe"],
+                "free_cash_flow": raw_data["free_cash_flow"],
+                "dividend_yield": raw_data["dividend_yield"],
+                "analyst_target": raw_data["analyst_target"],
+                "sector": raw_data["sector"]
+            },
+            "breakdown": rule_result["breakdown"],
+            "rule_violations": [v for v in rule_result["breakdown"] if v["status"] == "FAIL"],
+            "llm_reasoning": llm_reasoning
         }
 
-    # 2. Run Symbolic Engine (The "Police" First)
-    # We convert raw dict to Pydantic model for validation
-    stock_model = StockData(**raw_data)
-    rule_result = rule_engine.evaluate(stock_model)
-
-    # 3. Run Neural Engine (The "Brain")
-    # We pass the data to LLM for qualitative reasoning
-    print("Querying Llama 3 (Groq)...")
-    llm_response = llm_runner.analyze_stock(symbol, raw_data)
-
-    # Handle response (Dict or String)
-    if isinstance(llm_response, str):
-        try:
-            llm_json = json.loads(llm_response)
-            reasoning = llm_json.get("reasoning", "No reasoning provided.")
-        except:
-            reasoning = str(llm_response)
-    else:
-        # It's already a dict from the Universal Fuzzy Parser
-        reasoning = llm_response.get("reasoning", "No reasoning provided.")
-
-    # 4. Final Payload
-    return {
-        "symbol": symbol,
-        "trust_score": rule_result["score"],
-        "verdict": rule_result["verdict"],
-        "price": raw_data["current_price"],
-        "pe_ratio": raw_data["pe_ratio"],
-        "metrics": {
-            "current_price": raw_data["current_price"],
-            "pe_ratio": raw_data["pe_ratio"],
-            "debt_to_equity": raw_data["debt_to_equity"],
-            "revenue_growth": raw_data["revenue_growth"],
-            "cash_reserves": raw_data["cash_reserves"],
-            "operating_costs": raw_data["operating_costs"],
-            "net_income": raw_data["net_income"],
-            "profit_margins": raw_data["profit_margins"],
-            "roe": raw_data["roe"],
-            "free_cash_flow": raw_data["free_cash_flow"],
-            "dividend_yield": raw_data["dividend_yield"],
-            "analyst_target": raw_data["analyst_target"],
-            "sector": raw_data["sector"]
-        },
-        "breakdown": rule_result["breakdown"],
-        "rule_violations": [v for v in rule_result["breakdown"] if v["status"] == "FAIL"],
-        "llm_reasoning": reasoning
-    }
+
+class DeferredReasoning:
+    """
+    LLM reasoning that is only requested the first time it is read.
+
+    Acts like a future: result() blocks on the first call (one LLM query,
+    shared by concurrent readers) and returns the cached text afterwards.
+    str() resolves it too, so templates and print() work unchanged, and
+    stream() resolves it token by token for live display.
+    """
+
+    def __init__(self, symbol: str, raw_data: dict, pipeline: Optional[Pipeline] = None):
+        self.symbol = symbol
+        self._raw_data = raw_data
+        self._pipeline = pipeline
+        self._lock = threading.Lock()
+        self._value = None
+
+    def done(self) -> bool:
+        return self._value is not None
+
+    def result(self) -> str:
+        with self._lock:
+            if self._value is None:
+                self._value = (self._pipeline or get_pipeline()).query_reasoning(self.symbol, self._raw_data)
+        return self._value
+
+    def stream(self) -> Iterator[str]:
+        """
+        Yield the reasoning as the LLM produces it, resolving the future.
+
+        Once resolved (or if the runner cannot stream), yields the text in one piece.
+        """
+        runner = (self._pipeline or get_pipeline()).llm_runner
+        if self.done() or not hasattr(runner, "stream_stock"):
+            yield self.result()
+            return
+
+        analysis = runner.stream_stock(self.symbol, self._raw_data)
+        streamed = False
+        for text in analysis:
+            streamed = True
+            yield text
+        value = analysis.result().get("reasoning", "No reasoning provided.")
+        with self._lock:
+            if self._value is None:
+                self._value = value
+        if not streamed:
+            # Errors and unparseable replies produce no stream, only a final message
+            yield self._value
+
+    def __str__(self):
+        return self.result()
+
+    def __repr__(self):
+        state = "resolved" if self.done() else "pending"
+        return f"DeferredReasoning({self.symbol!r}, {state})"
+
+
+# Global pipeline instance
+_pipeline = None
+
+
+def get_pipeline() -> Pipeline:
+    """Get or create the global pipeline (engines are still built on first use)"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = Pipeline()
+    return _pipeline
+
+
+def set_pipeline(pipeline: Optional[Pipeline]):
+    """Replace the global pipeline (e.g. with injected fakes in tests); None resets it."""
+    global _pipeline
+    _pipeline = pipeline
+
+
+def query_reasoning(symbol: str, raw_data: dict) -> str:
+    """Ask the global pipeline's LLM for qualitative reasoning on one stock."""
+    return get_pipeline().query_reasoning(symbol, raw_data)
+
+
+def run_analysis(symbol: str = None, snapshot: "TickerSnapshot" = None, reasoning: str = "full"):
+    """Run the global pipeline for one stock; see Pipeline.run."""
+    return get_pipeline().run(symbol, snapshot, reasoning=reasoning)
+
+
+def resolve_analysis(result: dict) -> dict:
+    """Copy of a run_analysis result with deferred reasoning resolved to plain text (e.g. for json.dumps)."""
+    reasoning = result.get("llm_reasoning")
+    if isinstance(reasoning, DeferredReasoning):
+        return {**result, "llm_reasoning": reasoning.result()}
+    return dict(result)
+
+
+def __getattr__(name):
+    # Backwards compatible module attributes, built on first access
+    if name in ("llm_runner", "rule_engine"):
+        return getattr(get_pipeline(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     # Test Run
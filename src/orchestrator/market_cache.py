@@ -0,0 +1,265 @@
+"""
+Market Data Cache
+
+Persistent on-disk cache for Yahoo Finance fundamentals (`.info`) and OHLCV
+history. Every entry is content-addressed by a hash of (kind, symbol, params)
+and stored in a local SQLite file with a per-kind expiry:
+
+- info:    24 hours
+- history: until the next US market close (daily bars are final after it)
+
+Price history is downloaded once per symbol for a canonical period and shorter
+periods ("1y", "395d", ...) are sliced from it, so the indicator code and the
+return calculation share a single download per symbol per day.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+import yfinance as yf
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
+from adaptive_scheduler import ERROR, get_scheduler
+
+# Configuration
+CACHE_PATH = os.environ.get("MARKET_CACHE_PATH", os.path.join("data", "cache", "market_cache.sqlite"))
+INFO_TTL_SECONDS = 24 * 60 * 60
+HISTORICAL_TTL_SECONDS = 7 * 24 * 60 * 60  # Closed date ranges only change on corporate actions
+HISTORY_PERIOD = "2y"  # Canonical download; shorter periods are sliced from it
+MARKET_TIMEZONE = "America/New_York"
+MARKET_CLOSE_HOUR = 16
+
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def next_market_close(now: Optional[float] = None) -> float:
+    """
+    Return the epoch time of the next US market close (16:00 New York, Mon-Fri).
+
+    Daily bars fetched before the close still contain a partial bar for today,
+    so they expire at today's close; bars fetched after it last until the next
+    trading day's close.
+    """
+    now_ts = pd.Timestamp(now if now is not None else time.time(), unit="s", tz="UTC").tz_convert(MARKET_TIMEZONE)
+    close = now_ts.normalize() + pd.Timedelta(hours=MARKET_CLOSE_HOUR)
+    if now_ts >= close:
+        close += pd.Timedelta(days=1)
+    while close.weekday() >= 5:  # Saturday/Sunday
+        close += pd.Timedelta(days=1)
+    return close.timestamp()
+
+
+def period_to_offset(period: str) -> Optional[pd.DateOffset]:
+    """Convert a yfinance period string ("1y", "395d", "6mo") to a DateOffset (None for "max"/"ytd")."""
+    for suffix, unit in sorted(_PERIOD_UNITS.items(), key=lambda item: -len(item[0])):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    return None
+
+
+def _period_covered(period: str, canonical: str = HISTORY_PERIOD) -> bool:
+    """True if `period` can be sliced out of the canonical download."""
+    offset, canonical_offset = period_to_offset(period), period_to_offset(canonical)
+    if offset is None or canonical_offset is None:
+        return False
+    anchor = pd.Timestamp("2000-01-01")
+    return anchor - offset >= anchor - canonical_offset
+
+
+class MarketDataCache:
+    """
+    SQLite-backed cache with per-entry expiry.
+
+    Safe to share between worker threads: each operation opens its own
+    connection, and concurrent misses for the same key are serialized so a
+    symbol is only downloaded once.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, info_ttl: float = INFO_TTL_SECONDS, enabled: bool = True):
+        self.path = path
+        self.info_ttl = info_ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " key TEXT PRIMARY KEY,"
+                    " kind TEXT NOT NULL,"
+                    " symbol TEXT NOT NULL,"
+                    " fetched_at REAL NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " payload BLOB NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_symbol ON entries(symbol)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits and closes on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(kind: str, symbol: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Content address of an entry: sha256 over its canonical JSON description."""
+        blob = json.dumps({"kind": kind, "symbol": symbol.upper(), "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for `key`, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT expires_at, payload FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return pickle.loads(row[1])
+
+    def put(self, key: str, kind: str, symbol: str, value: Any, expires_at: float):
+        """Store `value` under `key` until `expires_at` (epoch seconds)."""
+        if not self.enabled:
+            return
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, symbol, fetched_at, expires_at, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, symbol.upper(), time.time(), expires_at, payload),
+            )
+
+    def get_or_fetch(self, kind: str, symbol: str, params: Optional[Dict[str, Any]],
+                     fetch: Callable[[], Any], expires_at: Callable[[], float]) -> Any:
+        """
+        Return the cached value, calling `fetch()` on a miss.
+
+        Empty results (failed downloads) are returned but never stored, so a
+        transient Yahoo error does not poison the cache for a whole day.
+        Misses run in a slot of the scheduler's "yahoo" budget; hits cost nothing.
+        """
+        key = self.make_key(kind, symbol, params)
+        with self._key_lock(key):
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            with get_scheduler().slot("yahoo") as slot:
+                value = fetch()
+                is_empty = value is None or (isinstance(value, (pd.DataFrame, dict)) and len(value) == 0)
+                if is_empty:
+                    # yfinance often logs errors and returns nothing instead of raising
+                    slot.mark(ERROR)
+            if not is_empty:
+                self.put(key, kind, symbol, value, expires_at())
+            return value
+
+    def clear(self, symbol: Optional[str] = None):
+        """Drop all entries, or only those for `symbol`."""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            if symbol is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE symbol = ?", (symbol.upper(),))
+
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns the number of rows removed."""
+        if not self.enabled:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+# Global cache instance
+_cache = None
+
+
+def get_cache() -> MarketDataCache:
+    """Get or create the global market data cache"""
+    global _cache
+    if _cache is None:
+        _cache = MarketDataCache()
+    return _cache
+
+
+def set_cache(cache: Optional[MarketDataCache]):
+    """Replace the global cache (e.g. with a temporary one in tests, or a disabled one)."""
+    global _cache
+    _cache = cache
+
+
+def fetch_info(symbol: str) -> dict:
+    """Fetch `yf.Ticker(symbol).info` through the cache (24h TTL)."""
+    cache = get_cache()
+    return cache.get_or_fetch(
+        "info", symbol, None,
+        fetch=lambda: yf.Ticker(symbol).info,
+        expires_at=lambda: time.time() + cache.info_ttl,
+    )
+
+
+def fetch_history(symbol: str, period: str = "1y", start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """
+    Fetch daily OHLCV history through the cache.
+
+    Periods up to HISTORY_PERIOD are sliced from one canonical download, so
+    "1y" and "395d" requests for the same symbol share a single network call.
+    Explicit start/end ranges are cached under their own key; ranges that
+    ended before today are kept for HISTORICAL_TTL_SECONDS.
+    """
+    cache = get_cache()
+
+    if start is not None or end is not None:
+        closed_range = end is not None and pd.Timestamp(end) < pd.Timestamp.now().normalize()
+        return cache.get_or_fetch(
+            "history", symbol, {"start": start, "end": end},
+            fetch=lambda: yf.Ticker(symbol).history(start=start, end=end),
+            expires_at=(lambda: time.time() + HISTORICAL_TTL_SECONDS) if closed_range else next_market_close,
+        )
+
+    if not _period_covered(period):
+        return cache.get_or_fetch(
+            "history", symbol, {"period": period},
+            fetch=lambda: yf.Ticker(symbol).history(period=period),
+            expires_at=next_market_close,
+        )
+
+    hist = cache.get_or_fetch(
+        "history", symbol, {"period": HISTORY_PERIOD},
+        fetch=lambda: yf.Ticker(symbol).history(period=HISTORY_PERIOD),
+        expires_at=next_market_close,
+    )
+    return slice_period(hist, period)
+
+
+def slice_period(hist: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Trim a history to the trailing `period` (yfinance semantics: counted back from today)."""
+    offset = period_to_offset(period)
+    if hist is None or len(hist) == 0 or offset is None:
+        return hist
+    now = pd.Timestamp.now(tz=hist.index.tz).normalize()
+    return hist[hist.index >= now - offset]
@@ -0,0 +1,300 @@
+"""
+Two-Stage Fetch / Compute Pipeline
+
+Dataset builders used to fetch, compute indicators, validate and score each
+ticker inside one thread, so the pandas and pydantic work of one worker held
+the GIL while the others waited on it. Here the two kinds of work run in
+separate, independently sized stages:
+
+- I/O stage:  threads call fetch(item) (network, cache, adaptive scheduler)
+              and put the raw payload on a bounded queue
+- CPU stage:  a process pool runs compute(item, payload) (indicators, rules)
+
+The queue between them applies back-pressure: when the CPU stage falls behind
+the fetchers block instead of holding every download in memory. Its depth is
+sampled while the pipeline runs, which tells which stage is the bottleneck:
+a mostly full queue means CPU-bound, a mostly empty one I/O-bound.
+
+Usage:
+    pipeline = StagedPipeline(fetch_stock, build_row, io_workers=16, cpu_workers=4)
+    for symbol, row, error in pipeline.run(symbols):
+        ...
+    print(pipeline.summary())
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    from orchestrator.work_ledger import WorkLedger
+except ImportError:  # Imported as src.orchestrator.stage_pipeline
+    from src.orchestrator.work_ledger import WorkLedger
+
+# Configuration
+IO_WORKERS = 8
+CPU_WORKERS = os.cpu_count() or 1
+QUEUE_SIZE = 32           # Fetched payloads waiting for the CPU stage
+SAMPLE_INTERVAL = 0.25    # Seconds between queue depth samples
+REPORT_EVERY = 50         # Items between progress lines in run_staged_job
+_POLL = 0.1               # Wake-up interval of blocked threads (to notice a stop)
+_END = object()           # Results entry: the CPU stage is gone, nothing more will arrive
+
+
+def _timed(compute: Callable, item: str, payload: Any) -> Tuple[Any, float]:
+    # Runs in the worker process; the busy time excludes pool queueing and pickling
+    started = time.perf_counter()
+    return compute(item, payload), time.perf_counter() - started
+
+
+class StageStats:
+    """Thread-safe counters for one stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self.busy_seconds += seconds
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def report(self, elapsed: float) -> dict:
+        capacity = self.workers * elapsed
+        return {
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity > 0 else 0.0,
+        }
+
+
+class StagedPipeline:
+    """
+    Bounded two-stage pipeline: threaded fetch -> queue -> process-pool compute.
+
+    Args:
+        fetch: fetch(item) -> payload. Runs in a thread; should only do I/O.
+        compute: compute(item, payload) -> result. Runs in a worker process, so
+            it must be a module-level function and the payload must pickle.
+        io_workers: Fetch threads
+        cpu_workers: Compute processes
+        queue_size: Fetched payloads allowed to wait for the CPU stage
+        cpu_executor: Executor for the CPU stage (defaults to a ProcessPoolExecutor)
+    """
+
+    def __init__(self, fetch: Callable[[str], Any], compute: Callable[[str, Any], Any],
+                 io_workers: int = IO_WORKERS, cpu_workers: int = CPU_WORKERS,
+                 queue_size: int = QUEUE_SIZE, cpu_executor: Optional[Executor] = None):
+        self.fetch = fetch
+        self.compute = compute
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.queue_size = queue_size
+        self.cpu_executor = cpu_executor
+        self._reset()
+
+    def _reset(self):
+        self.io = StageStats("io", self.io_workers)
+        self.cpu = StageStats("cpu", self.cpu_workers)
+        self._fetched = queue.Queue(maxsize=self.queue_size)
+        self._in_cpu = 0  # Submitted to the CPU stage and not finished
+        self._in_cpu_lock = threading.Lock()
+        self._samples = []  # (queue depth, CPU backlog)
+        self._started = self._finished = None
+
+    def depths(self) -> Dict[str, int]:
+        """Current fetch queue depth and CPU backlog."""
+        return {"queue": self._fetched.qsize(), "cpu_backlog": self._in_cpu}
+
+    def run(self, items: Iterable[str]) -> Iterator[Tuple[str, Any, Optional[BaseException]]]:
+        """
+        Process every item; yields (item, result, error) in completion order.
+
+        error is the exception raised by fetch or compute (result is then None).
+        If the CPU pool breaks (e.g. a worker process died), every item without
+        an outcome yet is yielded with the pool's error.
+        Closing the generator early (or Ctrl-C) cancels the work not started yet.
+        """
+        items = list(items)
+        self._reset()
+        self._started = time.monotonic()
+        stop = threading.Event()
+        results = queue.Queue()
+        cpu_slots = threading.BoundedSemaphore(self.cpu_workers * 2)  # Keep workers fed, no more
+        cpu_pool = self.cpu_executor or ProcessPoolExecutor(max_workers=self.cpu_workers)
+        io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="fetch")
+
+        def put(entry):
+            while not stop.is_set():
+                try:
+                    self._fetched.put(entry, timeout=_POLL)
+                    return
+                except queue.Full:
+                    continue
+
+        def fetch_one(item):
+            started = time.perf_counter()
+            try:
+                payload = self.fetch(item)
+            except Exception as e:
+                self.io.record(time.perf_counter() - started, failed=True)
+                put((item, None, e))
+                return
+            self.io.record(time.perf_counter() - started)
+            put((item, payload, None))
+
+        def computed(item, future):
+            with self._in_cpu_lock:
+                self._in_cpu -= 1
+            cpu_slots.release()
+            try:
+                result, seconds = future.result()
+            except BaseException as e:
+                self.cpu.record(0.0, failed=True)
+                results.put((item, None, e))
+                return
+            self.cpu.record(seconds)
+            results.put((item, result, None))
+
+        def feed():
+            # Moves fetched payloads into the CPU stage, at most 2 per worker in flight
+            for _ in range(len(items)):
+                entry = None
+                while entry is None and not stop.is_set():
+                    try:
+                        entry = self._fetched.get(timeout=_POLL)
+                    except queue.Empty:
+                        pass
+                if entry is None:
+                    return
+                item, payload, error = entry
+                if error is not None:
+                    results.put(entry)
+                    continue
+                while not cpu_slots.acquire(timeout=_POLL):
+                    if stop.is_set():
+                        return
+                with self._in_cpu_lock:
+                    self._in_cpu += 1
+                try:
+                    future = cpu_pool.submit(_timed, self.compute, item, payload)
+                except RuntimeError as e:  # Pool shut down or broken (a worker died)
+                    with self._in_cpu_lock:
+                        self._in_cpu -= 1
+                    cpu_slots.release()
+                    self.cpu.record(0.0, failed=True)
+                    stop.set()
+                    results.put((item, None, e))
+                    results.put((_END, None, e))
+                    return
+                future.add_done_callback(lambda f, item=item: computed(item, f))
+
+        def sample():
+            while not stop.wait(SAMPLE_INTERVAL):
+                self._samples.append((self._fetched.qsize(), self._in_cpu))
+
+        threads = [threading.Thread(target=feed, name="stage-feeder", daemon=True),
+                   threading.Thread(target=sample, name="stage-sampler", daemon=True)]
+        for thread in threads:
+            thread.start()
+        for item in items:
+            io_pool.submit(fetch_one, item)
+
+        pending = Counter(items)  # Not yielded yet
+        try:
+            while pending:
+                item, result, error = results.get()
+                if item is _END:
+                    # Every item without an outcome fails with the pool's error
+                    for item, count in list(pending.items()):
+                        for _ in range(count):
+                            yield item, None, error
+                    return
+                if pending[item] <= 0:
+                    continue  # Finished after the CPU stage failed; already reported
+                pending[item] -= 1
+                if pending[item] == 0:
+                    del pending[item]
+                yield item, result, error
+        finally:
+            stop.set()
+            self._finished = time.monotonic()
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            if self.cpu_executor is None:
+                cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def report(self) -> dict:
+        """Per-stage counters, queue depth statistics and the likely bottleneck."""
+        if self._started is None:
+            return {}
+        elapsed = (self._finished or time.monotonic()) - self._started
+        samples = list(self._samples) or [(self._fetched.qsize(), self._in_cpu)]
+        depths = [queue_depth for queue_depth, _ in samples]
+        backlogs = [backlog for _, backlog in samples]
+        mean_depth = sum(depths) / len(depths)
+        return {
+            "elapsed": round(elapsed, 2),
+            "io": self.io.report(elapsed),
+            "cpu": self.cpu.report(elapsed),
+            "queue": {
+                "capacity": self.queue_size,
+                "mean_depth": round(mean_depth, 2),
+                "max_depth": max(depths),
+                "mean_cpu_backlog": round(sum(backlogs) / len(backlogs), 2),
+            },
+            # Fetchers waiting on a full queue -> compute is the slow stage
+            "bottleneck": "cpu" if mean_depth >= self.queue_size / 2 else "io",
+        }
+
+    def summary(self) -> str:
+        """One-line version of report()."""
+        r = self.report()
+        if not r:
+            return "not run"
+        return (f"I/O {r['io']['workers']} threads ({r['io']['utilization']:.0%} busy), "
+                f"CPU {r['cpu']['workers']} processes ({r['cpu']['utilization']:.0%} busy), "
+                f"queue depth mean {r['queue']['mean_depth']:.1f} / max {r['queue']['max_depth']} "
+                f"of {r['queue']['capacity']} -> {r['bottleneck'].upper()}-bound")
+
+
+def run_staged_job(ledger: WorkLedger, job: str, items: Iterable[str], pipeline: StagedPipeline,
+                   retry_failed: bool = True) -> Dict[str, int]:
+    """
+    Work-ledger driver for a StagedPipeline (the two-stage counterpart of run_job).
+
+    compute() returning None marks an item skipped; an exception in either
+    stage marks it failed. Outcomes are recorded as they complete.
+
+    Returns:
+        Status counts for the whole job after this run.
+    """
+    ledger.add(job, items)
+    todo = ledger.todo(job, retry_failed=retry_failed)
+
+    for done, (item, result, error) in enumerate(pipeline.run(todo), start=1):
+        if error is not None:
+            ledger.mark_failed(job, item, f"{type(error).__name__}: {error}")
+        elif result is None:
+            ledger.mark_skipped(job, item)
+        else:
+            ledger.mark_done(job, item, result)
+        if done % REPORT_EVERY == 0:
+            depths = pipeline.depths()
+            print(f"   [{done}/{len(todo)}] queue depth {depths['queue']}/{pipeline.queue_size}, "
+                  f"CPU backlog {depths['cpu_backlog']}")
+
+    print(f"Stages: {pipeline.summary()}")
+    return ledger.counts(job)
@@ -5,26 +5,33 @@ Calculates technical analysis indicators for stock prediction.
 Adds 15+ features to improve correlation with returns.
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-def get_technical_indicators(symbol: str, period: str = "1y") -> Dict[str, float]:
+try:
+    from orchestrator.market_cache import fetch_history
+    from orchestrator.bulk_loader import download_price_panel, panel_field
+except ImportError:  # Imported as src.orchestrator.technical_indicators
+    from src.orchestrator.market_cache import fetch_history
+    from src.orchestrator.bulk_loader import download_price_panel, panel_field
+
+def get_technical_indicators(symbol: str, period: str = "1y", hist: Optional[pd.DataFrame] = None) -> Dict[str, float]:
     """
     Fetch and calculate technical indicators for a stock.
     
     Args:
         symbol: Stock ticker symbol
         period: Historical period for calculation (default: 1 year)
+        hist: Pre-fetched OHLCV history (skips the download, e.g. from a TickerSnapshot)
     
     Returns:
         Dictionary of technical indicator values
     """
     try:
-        # Fetch historical data
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
+        # Fetch historical data (shared on-disk cache)
+        if hist is None:
+            hist = fetch_history(symbol, period=period)
         
         if len(hist) < 50:  # Need minimum data
             return get_default_indicators()
@@ -162,6 +169,294 @@ def get_default_indicators() -> Dict[str, float]:
         'trend_strength': 0.0
     }
 
+# === PANEL (CROSS-SECTIONAL) ENGINE ===
+
+def _nan_to(values: np.ndarray, default) -> np.ndarray:
+    """Scalar-path `x if not pd.isna(x) else default`, elementwise."""
+    return np.where(np.isnan(values), default, values)
+
+def _indicator_frames(close: pd.DataFrame,
+                      high: Optional[pd.DataFrame] = None,
+                      low: Optional[pd.DataFrame] = None,
+                      volume: Optional[pd.DataFrame] = None,
+                      lookback: Optional[int] = None,
+                      min_history: int = 50) -> Dict[str, np.ndarray]:
+    """
+    Full (dates x tickers) series for every indicator.
+
+    The value at each date is what get_technical_indicators would return for
+    the trailing `lookback` bars ending at that date (all bars so far when
+    lookback is None). EWM-based indicators (MACD, signal, EMA-20) always use
+    the full history; after ~250 bars the difference to a truncated window is
+    on the order of 1e-7 in price units.
+    """
+    close = close.astype(float)
+    valid = close.notna()
+    bars = valid.to_numpy().cumsum(axis=0)
+    if lookback is not None:
+        bars = np.minimum(bars, lookback)
+
+    def trailing(frame, min_periods=1, drop_first=False):
+        # Window over the same bars the scalar path would see
+        if lookback is None:
+            return frame.expanding(min_periods=min_periods)
+        return frame.rolling(window=lookback - 1 if drop_first else lookback, min_periods=min_periods)
+
+    indicators = {}
+    current_price = close.to_numpy()
+
+    # === MOMENTUM INDICATORS ===
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).where(valid).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).where(valid).rolling(window=14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+    indicators['rsi'] = _nan_to(rsi.to_numpy(), 50.0)
+
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    indicators['macd'] = _nan_to(macd.to_numpy(), 0.0)
+    indicators['macd_signal'] = _nan_to(macd.ewm(span=9).mean().to_numpy(), 0.0)
+
+    price_20_ago = close.shift(19).to_numpy()
+    indicators['roc'] = _nan_to((current_price - price_20_ago) / price_20_ago * 100, 0.0)
+
+    # === TREND INDICATORS ===
+    indicators['sma_50'] = close.rolling(window=50).mean().to_numpy()
+    indicators['sma_200'] = np.where(bars >= 200,
+                                     close.rolling(window=200).mean().to_numpy(),
+                                     trailing(close).mean().to_numpy())
+    indicators['ema_20'] = close.ewm(span=20).mean().to_numpy()
+
+    indicators['price_vs_sma50'] = (current_price - indicators['sma_50']) / indicators['sma_50'] * 100
+    indicators['price_vs_sma200'] = (current_price - indicators['sma_200']) / indicators['sma_200'] * 100
+
+    # === VOLATILITY INDICATORS ===
+    sma_20 = close.rolling(window=20).mean().to_numpy()
+    std_20 = close.rolling(window=20).std().to_numpy()
+    upper = sma_20 + std_20 * 2
+    lower = sma_20 - std_20 * 2
+    indicators['bb_upper'] = np.where(np.isnan(upper), current_price * 1.1, upper)
+    indicators['bb_lower'] = np.where(np.isnan(lower), current_price * 0.9, lower)
+    indicators['bb_position'] = (current_price - indicators['bb_lower']) / (indicators['bb_upper'] - indicators['bb_lower'])
+
+    if high is not None and low is not None:
+        prev_close = close.shift().to_numpy()
+        high_v = high.reindex_like(close).to_numpy(dtype=float)
+        low_v = low.reindex_like(close).to_numpy(dtype=float)
+        true_range = np.fmax.reduce([high_v - low_v, np.abs(high_v - prev_close), np.abs(low_v - prev_close)])
+        atr = pd.DataFrame(true_range, index=close.index).rolling(window=14).mean()
+        indicators['atr'] = _nan_to(atr.to_numpy(), 0.0)
+    else:
+        indicators['atr'] = np.zeros(close.shape)
+
+    returns = close / close.shift() - 1
+    indicators['volatility'] = trailing(returns, min_periods=2, drop_first=True).std().to_numpy() * np.sqrt(252) * 100  # Annualized
+
+    # === VOLUME INDICATORS ===
+    if volume is not None:
+        volume = volume.reindex_like(close).astype(float).where(valid)
+        current_volume = volume.to_numpy()
+        avg_volume = volume.rolling(window=20).mean().to_numpy()
+        indicators['volume_trend'] = _nan_to((current_volume - avg_volume) / avg_volume * 100, 0.0)
+        indicators['volume_ratio'] = current_volume / trailing(volume).mean().to_numpy()
+    else:
+        indicators['volume_trend'] = np.zeros(close.shape)
+        indicators['volume_ratio'] = np.ones(close.shape)
+
+    # === TREND STRENGTH ===
+    # NaN when the window has a gap; same 0.0 default as the other indicators
+    indicators['trend_strength'] = _nan_to(calculate_rolling_trend_strength(close.to_numpy()), 0.0)
+
+    # Same fallback as the scalar path for short histories
+    short = bars < min_history
+    for key, default in get_default_indicators().items():
+        indicators[key] = np.where(short, default, indicators[key])
+
+    return indicators
+
+def calculate_rolling_trend_strength(prices, period: int = 20):
+    """
+    Trend strength (calculate_trend_strength) for EVERY trailing window at once.
+
+    Closed-form least squares from cumulative sums of y and x*y, so the cost is
+    O(n) per ticker regardless of `period`, with no polyfit per window.
+
+    Args:
+        prices: Series (one ticker) or (dates x tickers) DataFrame / 2-D array
+        period: Regression window in bars
+
+    Returns:
+        Same shape as `prices`; NaN where the window is incomplete or has gaps
+    """
+    values = np.asarray(prices, dtype=float)
+    one_dim = values.ndim == 1
+    if one_dim:
+        values = values[:, None]
+
+    valid = ~np.isnan(values)
+    # Centre each column first: the slope is shift-invariant and the cumulative
+    # sums stay small enough to keep full precision on long histories
+    n_valid = valid.sum(axis=0)
+    shift = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(n_valid, 1)
+    y = np.where(valid, values - shift, 0.0)
+    i = np.arange(len(values), dtype=float)[:, None]
+
+    def window_sum(a):
+        c = np.vstack([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+        out = np.full(a.shape, np.nan)
+        out[period - 1:] = c[period:] - c[:-period]
+        return out
+
+    count = window_sum(valid.astype(float))
+    sum_y = window_sum(y)
+    sum_iy = window_sum(i * y)
+
+    # Local x runs 0..period-1 inside each window, i.e. x = i - (t - period + 1)
+    start = i - (period - 1)
+    sum_xy = sum_iy - start * sum_y
+    x_mean = (period - 1) / 2
+    x_var = period * (period ** 2 - 1) / 12
+    slope = (sum_xy - x_mean * sum_y) / x_var
+    mean = sum_y / period + shift
+
+    result = np.where(count == period, slope / mean * 100, np.nan)
+    if isinstance(prices, pd.DataFrame):
+        return pd.DataFrame(result, index=prices.index, columns=prices.columns)
+    if one_dim:
+        result = result[:, 0]
+    if isinstance(prices, pd.Series):
+        return pd.Series(result, index=prices.index, name=prices.name)
+    return result
+
+def calculate_indicator_panel(close: pd.DataFrame,
+                              high: Optional[pd.DataFrame] = None,
+                              low: Optional[pd.DataFrame] = None,
+                              volume: Optional[pd.DataFrame] = None,
+                              min_history: int = 50) -> pd.DataFrame:
+    """
+    Calculate every technical indicator for a whole universe at once.
+
+    Vectorized equivalent of running get_technical_indicators on each column:
+    all rolling/EWM math is done as column operations over the panel and each
+    ticker's values are read at its last valid close. Tickers may start or
+    end on different dates (leading/trailing NaNs); interior gaps are treated
+    as missing bars rather than dropped.
+
+    Args:
+        close: (dates x tickers) close prices
+        high, low: (dates x tickers) highs/lows; ATR defaults to 0.0 without them
+        volume: (dates x tickers) volumes; volume features default without it
+        min_history: Tickers with fewer valid closes get get_default_indicators()
+
+    Returns:
+        (tickers x features) DataFrame with the same keys as get_technical_indicators
+    """
+    frames = _indicator_frames(close, high, low, volume, min_history=min_history)
+    valid = close.notna().to_numpy()
+    last = len(close) - 1 - np.argmax(valid[::-1], axis=0)
+    columns = np.arange(close.shape[1])
+
+    result = pd.DataFrame({key: values[last, columns] for key, values in frames.items()}, index=close.columns)
+    result.index.name = 'ticker'
+
+    # Tickers with no data at all
+    defaults = get_default_indicators()
+    for key, default in defaults.items():
+        result.loc[~valid.any(axis=0), key] = default
+    return result[list(defaults)]
+
+def calculate_indicator_history(close: pd.DataFrame,
+                                high: Optional[pd.DataFrame] = None,
+                                low: Optional[pd.DataFrame] = None,
+                                volume: Optional[pd.DataFrame] = None,
+                                lookback: Optional[int] = 252,
+                                min_history: int = 50) -> pd.DataFrame:
+    """
+    Complete indicator history for every ticker in one pass.
+
+    Instead of keeping only the last value, every date gets the indicators
+    get_technical_indicators would report for the trailing `lookback` bars
+    (one year by default) ending on that date. Features at any cutoff are
+    then a lookup (see indicators_as_of) rather than a recomputation.
+
+    Args:
+        close, high, low, volume: (dates x tickers) matrices as for calculate_indicator_panel
+        lookback: Bars per window (None = all bars up to each date)
+        min_history: Dates with fewer bars in the window get get_default_indicators()
+
+    Returns:
+        Long, columnar DataFrame indexed by (ticker, date) with one column
+        per indicator plus 'close'; only dates with a valid close are kept.
+    """
+    frames = _indicator_frames(close, high, low, volume, lookback=lookback, min_history=min_history)
+    valid = close.notna().to_numpy().ravel(order='F')
+
+    index = pd.MultiIndex.from_product([close.columns, close.index], names=['ticker', 'date'])
+    columns = {'close': close.to_numpy(dtype=float).ravel(order='F')}
+    columns.update({key: values.ravel(order='F') for key, values in frames.items()})
+    return pd.DataFrame(columns, index=index)[valid]
+
+def calculate_indicator_series(hist: pd.DataFrame, lookback: Optional[int] = 252, min_history: int = 50) -> pd.DataFrame:
+    """
+    Indicator history for a single ticker (Ticker.history layout in, dates x features out).
+    """
+    history = calculate_indicator_history(
+        hist[['Close']].rename(columns={'Close': 'value'}),
+        high=hist[['High']].rename(columns={'High': 'value'}) if 'High' in hist else None,
+        low=hist[['Low']].rename(columns={'Low': 'value'}) if 'Low' in hist else None,
+        volume=hist[['Volume']].rename(columns={'Volume': 'value'}) if 'Volume' in hist else None,
+        lookback=lookback,
+        min_history=min_history,
+    )
+    return history.droplevel('ticker')
+
+def indicators_as_of(history: pd.DataFrame, as_of, inclusive: bool = False) -> pd.DataFrame:
+    """
+    Point-in-time lookup into calculate_indicator_history output.
+
+    Args:
+        history: (ticker, date)-indexed indicator history
+        as_of: Cutoff date
+        inclusive: Include bars dated exactly `as_of` (default: strictly before,
+                   matching the temporal dataset's no-look-ahead split)
+
+    Returns:
+        (tickers x features) DataFrame of each ticker's last row before the cutoff
+    """
+    dates = history.index.get_level_values('date')
+    cutoff = pd.Timestamp(as_of)
+    if dates.tz is not None and cutoff.tz is None:
+        cutoff = cutoff.tz_localize(dates.tz)
+    mask = dates <= cutoff if inclusive else dates < cutoff
+    return history[mask].groupby(level='ticker').tail(1).droplevel('date')
+
+def get_technical_indicators_bulk(symbols: List[str], period: str = "1y", downloader=None) -> pd.DataFrame:
+    """
+    Fetch history for many symbols with chunked bulk requests and calculate
+    all indicators in one vectorized pass.
+
+    Returns:
+        (tickers x features) DataFrame; symbols without data get defaults
+    """
+    panel = download_price_panel(symbols, period=period, downloader=downloader)
+    defaults = get_default_indicators()
+
+    if panel.empty:
+        result = pd.DataFrame(columns=list(defaults), dtype=float)
+    else:
+        result = calculate_indicator_panel(
+            panel_field(panel, 'Close'),
+            high=panel_field(panel, 'High'),
+            low=panel_field(panel, 'Low'),
+            volume=panel_field(panel, 'Volume'),
+        )
+
+    result = result.reindex(symbols)
+    missing = result.isna().all(axis=1)
+    for key, value in defaults.items():
+        result.loc[missing, key] = value
+    result.index.name = 'ticker'
+    return result
+
 # Test function
 if __name__ == "__main__":
     print("Testing Technical Indicators Module...")
@@ -0,0 +1,275 @@
+"""
+Top Picks View
+
+Precomputed top-N table behind the dashboard's "Top Picks" mode, so a page
+render reads a few dozen rows instead of re-parsing the dataset CSV and
+re-ranking it on every Streamlit rerun.
+
+A refresh ranks the dataset twice, by the model's predicted return and by
+Trust_Score, keeps the union of both top-N lists and writes it to
+top_picks_<version>.parquet. The version is a hash of the inputs (dataset
+snapshot and model file stamps, whether the model can be used, N), so unchanged
+inputs skip the rebuild entirely.
+latest.json points at the current file and is swapped atomically, so
+readers never see a half-written view. Rebuilds run in TopPicksRefresher
+(a background thread polling the input stamps) or from
+scripts/deployment/refresh_top_picks.py.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from orchestrator.dataset_store import STORE_DIR, current_snapshot, dataset_columns, load_dataset
+except ImportError:  # Imported as src.orchestrator.top_picks
+    from src.orchestrator.dataset_store import STORE_DIR, current_snapshot, dataset_columns, load_dataset
+
+# Configuration
+DATASET_NAME = "dataset_n600_plus"  # Read through the dataset store
+MODEL_PATH = os.path.join("models", "final_model_n462.pkl")
+VIEW_DIR = os.path.join("results", "top_picks")
+POINTER_FILE = "latest.json"
+TOP_N = 10
+KEEP_VERSIONS = 3  # Older view files are pruned after a refresh
+REFRESH_INTERVAL_SECONDS = 5 * 60
+
+VIEW_COLUMNS = ["Symbol", "Trust_Score", "Verdict", "Actual_Return_1Y", "sector"]
+PREDICTION_COLUMN = "Predicted_Return"
+RANK_COLUMNS = {"prediction": "Prediction_Rank", "trust": "Trust_Rank"}
+
+
+def file_stamp(path: str) -> str:
+    """Cheap change marker for an input file (size and mtime)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _predictor_class():
+    try:
+        from neural_engine.ml_predictor import StockReturnPredictor
+    except ImportError:  # Imported as src.orchestrator.top_picks
+        from src.neural_engine.ml_predictor import StockReturnPredictor
+    return StockReturnPredictor
+
+
+def predictions_available(model_path: str = MODEL_PATH) -> bool:
+    """Whether a model could be loaded: the file exists and the predictor (xgboost) imports."""
+    if not os.path.exists(model_path):
+        return False
+    try:
+        _predictor_class()
+    except ImportError:
+        return False
+    return True
+
+
+def dataset_stamp(data_path: Optional[str] = None, store_dir: str = STORE_DIR) -> str:
+    """Change marker for the dataset: the CSV override, or the latest store snapshot."""
+    if data_path is not None:
+        return file_stamp(data_path)
+    # A newer source CSV is imported here, as load_dataset would, so it yields a new snapshot
+    snapshot = current_snapshot(DATASET_NAME, store_dir=store_dir)
+    return file_stamp(snapshot) if snapshot else "missing"
+
+
+def view_version(data_path: Optional[str] = None, model_path: str = MODEL_PATH, n: int = TOP_N,
+                 predictions: Optional[bool] = None, store_dir: str = STORE_DIR) -> str:
+    """
+    Version of the view built from these inputs.
+
+    Includes whether predictions are possible (see predictions_available), so
+    a view built Trust-only is rebuilt once the model becomes usable.
+    """
+    if predictions is None:
+        predictions = predictions_available(model_path)
+    blob = json.dumps({"data": dataset_stamp(data_path, store_dir), "model": file_stamp(model_path), "n": n,
+                       "predictions": predictions}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def load_model(model_path: str = MODEL_PATH):
+    """The trained StockReturnPredictor, or None if it (or xgboost) is unavailable."""
+    try:
+        return _predictor_class().load(model_path)
+    except Exception as e:
+        print(f"⚠️  Model not available ({e}), ranking by Trust_Score only")
+        return None
+
+
+def predict_returns(df: pd.DataFrame, model=None) -> np.ndarray:
+    """Model-predicted 1Y return per row (NaN without a model)."""
+    if model is None:
+        return np.full(len(df), np.nan)
+    missing = [col for col in model.feature_names if col not in df.columns]
+    if missing:
+        print(f"⚠️  Dataset lacks model features {missing}, filled with 0")
+    return np.asarray(model.predict(df.reindex(columns=model.feature_names)), dtype=float)
+
+
+def build_top_picks(df: pd.DataFrame, model=None, n: int = TOP_N) -> pd.DataFrame:
+    """
+    Rows in the top `n` by predicted return or by Trust_Score.
+
+    Rank ties are broken by dataset order, matching DataFrame.nlargest.
+    """
+    view = df[VIEW_COLUMNS].copy()
+    view[PREDICTION_COLUMN] = predict_returns(df, model)
+    view["Trust_Rank"] = view["Trust_Score"].rank(ascending=False, method="first")
+    view["Prediction_Rank"] = view[PREDICTION_COLUMN].rank(ascending=False, method="first")
+    keep = (view["Trust_Rank"] <= n) | (view["Prediction_Rank"] <= n)
+    return view[keep].sort_values(["Prediction_Rank", "Trust_Rank"]).reset_index(drop=True)
+
+
+def read_pointer(view_dir: str = VIEW_DIR) -> Optional[dict]:
+    """Metadata of the current view ({"version", "file", "built_at", ...}), or None."""
+    try:
+        with open(os.path.join(view_dir, POINTER_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _replace_atomically(path: str, write):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def load_view_inputs(model=None, data_path: Optional[str] = None, store_dir: str = STORE_DIR) -> pd.DataFrame:
+    """
+    The dataset rows a view needs: VIEW_COLUMNS plus the model's features.
+
+    Read column-projected from the dataset store, or from `data_path` (a CSV)
+    when one is given explicitly.
+    """
+    if data_path is not None:
+        return pd.read_csv(data_path)
+    wanted = VIEW_COLUMNS + (list(model.feature_names) if model is not None else [])
+    stored = set(dataset_columns(DATASET_NAME, store_dir=store_dir))
+    # Missing model features are reported and zero-filled by predict_returns
+    return load_dataset(DATASET_NAME, columns=[c for c in dict.fromkeys(wanted) if c in stored],
+                        store_dir=store_dir)
+
+
+def refresh_top_picks(data_path: Optional[str] = None, model_path: str = MODEL_PATH,
+                      view_dir: str = VIEW_DIR, n: int = TOP_N, force: bool = False,
+                      store_dir: str = STORE_DIR) -> str:
+    """
+    Rebuild the view if its inputs changed. Returns the current version.
+
+    Args:
+        data_path: Dataset CSV override (default: the DATASET_NAME store snapshot)
+                   with Trust_Score, Actual_Return_1Y and the model features
+        model_path: Pickled StockReturnPredictor (optional; missing -> Trust_Score only)
+        view_dir: Directory holding the versioned view files and the pointer
+        n: Picks per ranking
+        force: Rebuild even if the version is unchanged
+        store_dir: Dataset store root
+    """
+    available = predictions_available(model_path)
+    version = view_version(data_path, model_path, n, predictions=available, store_dir=store_dir)
+    current = read_pointer(view_dir)
+    if (not force and current is not None and current["version"] == version
+            and os.path.exists(os.path.join(view_dir, current["file"]))
+            # A model that should load but did not last time is retried
+            and (current.get("has_predictions") or not available)):
+        return version
+
+    model = load_model(model_path)
+    df = load_view_inputs(model, data_path, store_dir)
+    view = build_top_picks(df, model, n)
+
+    os.makedirs(view_dir, exist_ok=True)
+    file_name = f"top_picks_{version}.parquet"
+    _replace_atomically(os.path.join(view_dir, file_name), lambda tmp: view.to_parquet(tmp, index=False))
+    pointer = {
+        "version": version,
+        "file": file_name,
+        "built_at": time.time(),
+        "source": data_path or DATASET_NAME,
+        "rows": len(df),
+        "n": n,
+        "has_predictions": bool(view[PREDICTION_COLUMN].notna().any()),
+    }
+
+    def write_pointer(tmp):
+        with open(tmp, "w") as f:
+            json.dump(pointer, f, indent=2)
+    _replace_atomically(os.path.join(view_dir, POINTER_FILE), write_pointer)
+
+    # Keep the newest few versions (a reader may still be opening the previous one)
+    old = sorted((name for name in os.listdir(view_dir)
+                  if name.startswith("top_picks_") and name.endswith(".parquet") and name != file_name),
+                 key=lambda name: os.path.getmtime(os.path.join(view_dir, name)), reverse=True)
+    for name in old[KEEP_VERSIONS - 1:]:
+        os.remove(os.path.join(view_dir, name))
+
+    print(f"✅ Top picks view {version} built from {len(df)} stocks")
+    return version
+
+
+# Last loaded view, shared by every session of the process: ((view_dir, version), pointer, frame)
+_loaded = None
+
+
+def load_top_picks(view_dir: str = VIEW_DIR):
+    """
+    The current view as (pointer, DataFrame), or (None, None) if none was built yet.
+
+    Reads only the small pointer file per call; the frame is re-read from
+    disk only when the pointer names a new version.
+    """
+    global _loaded
+    pointer = read_pointer(view_dir)
+    if pointer is None:
+        return None, None
+    loaded = _loaded
+    if loaded is None or loaded[0] != (view_dir, pointer["version"]):
+        loaded = ((view_dir, pointer["version"]), pointer, pd.read_parquet(os.path.join(view_dir, pointer["file"])))
+        _loaded = loaded
+    return loaded[1], loaded[2]
+
+
+def top_picks(view: pd.DataFrame, by: str = "prediction", n: int = TOP_N) -> pd.DataFrame:
+    """Top `n` rows of a view ranked `by` "prediction" or "trust" (prediction falls back to trust)."""
+    rank = RANK_COLUMNS[by]
+    if view[rank].isna().all():
+        rank = RANK_COLUMNS["trust"]
+    return view[view[rank] <= n].sort_values(rank)
+
+
+class TopPicksRefresher(threading.Thread):
+    """
+    Daemon thread that keeps the view current.
+
+    Every `interval` seconds it compares the input stamps with the built
+    version and rebuilds only when the dataset or the model (or its
+    availability) changed.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL_SECONDS, **refresh_kwargs):
+        super().__init__(name="top-picks-refresher", daemon=True)
+        self.interval = interval
+        self.refresh_kwargs = refresh_kwargs
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                refresh_top_picks(**self.refresh_kwargs)
+            except Exception as e:
+                print(f"⚠️  Top picks refresh failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,204 @@
+"""
+Work Ledger
+
+Resumable bookkeeping for long dataset jobs. Every ticker of a job has a row
+in a local SQLite file with its status:
+
+- pending:  not attempted yet
+- done:     result stored (as JSON, committed as soon as it arrives)
+- failed:   raised; retried on the next run
+- skipped:  no usable data; not retried
+
+A crash, a rate-limit storm or Ctrl-C therefore loses at most the tickers
+in flight. Re-running the job only processes pending and failed tickers,
+and adding symbols to an existing job (N=500 -> N=600) only runs the new ones.
+
+Usage:
+    ledger = WorkLedger()
+    run_job(ledger, "dataset_n500", symbols, process_single_stock, max_workers=10)
+    df = pd.DataFrame(ledger.results("dataset_n500"))
+"""
+
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Configuration
+LEDGER_PATH = os.environ.get("WORK_LEDGER_PATH", os.path.join("data", "jobs", "work_ledger.sqlite"))
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+STATUSES = (PENDING, DONE, FAILED, SKIPPED)
+
+
+def _json_default(value):
+    # NumPy scalars (int64, bool_) and timestamps from the data loader
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class WorkLedger:
+    """
+    SQLite ledger of per-item job status and results.
+
+    Each operation opens a short-lived connection, so the ledger is safe to
+    share between threads; run_job writes from the coordinating thread only.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " job TEXT NOT NULL,"
+                " item TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT,"
+                " result TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (job, item))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_items_status ON items(job, status)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits and closes on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, job: str, items: Iterable[str]) -> int:
+        """Register items as pending; items already in the job keep their status. Returns the number added."""
+        now = time.time()
+        with self._connect() as conn:
+            start = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM items WHERE job = ?", (job,)).fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (job, item, position, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job, item, start + i, PENDING, now) for i, item in enumerate(items)],
+            )
+            return conn.total_changes - before
+
+    def import_results(self, job: str, results: Iterable[Dict[str, Any]], key: str = "Symbol") -> int:
+        """Record rows produced outside the ledger (e.g. an older CSV) as done. Returns the number added."""
+        rows = list(results)
+        now = time.time()
+        with self._connect() as conn:
+            start = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM items WHERE job = ?", (job,)).fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (job, item, position, status, result, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(job, str(row[key]), start + i, DONE, json.dumps(row, default=_json_default), now)
+                 for i, row in enumerate(rows)],
+            )
+            return conn.total_changes - before
+
+    def todo(self, job: str, retry_failed: bool = True) -> List[str]:
+        """Items still to process, in the order they were added."""
+        statuses = (PENDING, FAILED) if retry_failed else (PENDING,)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT item FROM items WHERE job = ? AND status IN ({','.join('?' * len(statuses))}) ORDER BY position",
+                (job, *statuses),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _mark(self, job: str, item: str, status: str, error: Optional[str] = None, result: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = ?, attempts = attempts + 1, error = ?, result = ?, updated_at = ?"
+                " WHERE job = ? AND item = ?",
+                (status, error, result, time.time(), job, item),
+            )
+
+    def mark_done(self, job: str, item: str, result: Dict[str, Any]):
+        self._mark(job, item, DONE, result=json.dumps(result, default=_json_default))
+
+    def mark_failed(self, job: str, item: str, error: str):
+        self._mark(job, item, FAILED, error=error)
+
+    def mark_skipped(self, job: str, item: str, reason: str = "no data"):
+        self._mark(job, item, SKIPPED, error=reason)
+
+    def results(self, job: str) -> List[Dict[str, Any]]:
+        """Stored results of every done item, in the order the items were added."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM items WHERE job = ? AND status = ? ORDER BY position", (job, DONE)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def counts(self, job: str) -> Dict[str, int]:
+        """{status: number of items} for every status."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM items WHERE job = ? GROUP BY status", (job,)).fetchall()
+        return dict({status: 0 for status in STATUSES}, **dict(rows))
+
+    def failures(self, job: str) -> Dict[str, str]:
+        """{item: last error} for failed items."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT item, error FROM items WHERE job = ? AND status = ? ORDER BY position",
+                                (job, FAILED)).fetchall()
+        return dict(rows)
+
+    def reset(self, job: str):
+        """Forget a job entirely (the next run starts from scratch)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM items WHERE job = ?", (job,))
+
+
+def run_job(ledger: WorkLedger, job: str, items: Iterable[str],
+            process: Callable[[str, int, int], Optional[Dict[str, Any]]],
+            max_workers: int = 8, retry_failed: bool = True) -> Dict[str, int]:
+    """
+    Process every item of `job` that is not done yet, recording each outcome as it completes.
+
+    Args:
+        ledger: Where statuses and results are kept
+        job: Job name (one dataset = one job)
+        items: All items of the job; ones not in the ledger yet are added as pending
+        process: process(item, index, total) -> result dict, or None to skip the item.
+                 Exceptions mark the item failed.
+        max_workers: Parallel threads
+        retry_failed: Also re-run items that failed on an earlier run
+
+    Returns:
+        Status counts for the whole job after this run.
+    """
+    ledger.add(job, items)
+    todo = ledger.todo(job, retry_failed=retry_failed)
+    total = len(todo)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(process, item, i + 1, total): item for i, item in enumerate(todo)}
+    try:
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                ledger.mark_failed(job, item, f"{type(e).__name__}: {e}")
+                continue
+            if result is None:
+                ledger.mark_skipped(job, item)
+            else:
+                ledger.mark_done(job, item, result)
+    finally:
+        # On Ctrl-C drop the queue; items in flight stay pending for the next run
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return ledger.counts(job)
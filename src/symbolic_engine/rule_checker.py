@@ -1,5 +1,11 @@
+import operator
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping, Optional, Tuple, Union
+
+RULE_NAMES = ["Valuation", "Solvency", "Growth", "Profitability", "Efficiency", "Free Cash Flow", "Liquidity Runway"]
+GROWTH_SECTORS = ["Technology", "Communication Services"]
 
 class StockData(BaseModel):
     symbol: str = "UNKNOWN"
@@ -17,93 +23,224 @@ class StockData(BaseModel):
     dividend_yield: float = 0.0
     analyst_target: float = 0.0
 
+# Comparison operators usable on scalars and NumPy arrays alike
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class Rule(BaseModel):
+    """
+    One symbolic rule, defined as data.
+
+    The rule passes when `field <op> threshold` holds, where `threshold` is a
+    number (optionally overridden per sector) or the name of another field.
+    `lower_bound` adds `field > lower_bound`. With `only_if`, the rule only
+    applies to stocks matching that (field, op, value) condition; all others
+    pass with the `exempt` detail.
+
+    Detail messages are str.format templates over the stock's fields plus
+    `limit`; fields listed in `units` are divided by their unit first (e.g.
+    1e6 to print millions).
+    """
+    model_config = {"frozen": True}
+
+    name: str
+    field: str
+    op: str
+    threshold: Union[float, str]
+    passed: str
+    failed: str
+    sector_thresholds: Dict[str, float] = {}
+    lower_bound: Optional[float] = None
+    only_if: Optional[Tuple[str, str, float]] = None
+    exempt: str = ""
+    units: Dict[str, float] = {}
+
+    def limit_for(self, record: Mapping[str, Any]) -> float:
+        if isinstance(self.threshold, str):
+            return record[self.threshold]
+        return self.sector_thresholds.get(record["sector"], self.threshold)
+
+    def check(self, record: Mapping[str, Any]) -> Tuple[bool, str]:
+        """Scalar path: (passed, detail) for one stock."""
+        if self.only_if is not None:
+            guard_field, guard_op, guard_value = self.only_if
+            if not _OPS[guard_op](record[guard_field], guard_value):
+                return True, self.exempt
+
+        limit = self.limit_for(record)
+        value = record[self.field]
+        passed = _OPS[self.op](value, limit)
+        if self.lower_bound is not None:
+            passed = passed and value > self.lower_bound
+
+        context = dict(record, limit=limit)
+        for name, unit in self.units.items():
+            context[name] = record[name] / unit
+        return bool(passed), (self.passed if passed else self.failed).format(**context)
+
+    def mask(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Vectorized path: boolean pass mask over whole columns."""
+        value = columns[self.field]
+        if isinstance(self.threshold, str):
+            limit = columns[self.threshold]
+        else:
+            limit = np.full(len(value), float(self.threshold))
+            for sector, sector_limit in self.sector_thresholds.items():
+                limit[columns["sector"] == sector] = sector_limit
+
+        passed = _OPS[self.op](value, limit)
+        if self.lower_bound is not None:
+            passed &= value > self.lower_bound
+        if self.only_if is not None:
+            guard_field, guard_op, guard_value = self.only_if
+            passed |= ~_OPS[guard_op](columns[guard_field], guard_value)
+        return passed
+
+
+# === THE RULE SET (single source of truth) ===
+RULES: List[Rule] = [
+    # --- RULE 1: VALUATION (Context Aware) ---
+    Rule(
+        name="Valuation", field="pe_ratio", op="<", threshold=30.0, lower_bound=0.0,
+        sector_thresholds={sector: 60.0 for sector in GROWTH_SECTORS},
+        passed="P/E {pe_ratio:.1f} is within limit {limit}",
+        failed="P/E {pe_ratio:.1f} exceeds limit {limit}",
+    ),
+    # --- RULE 2: SOLVENCY ---
+    Rule(
+        name="Solvency", field="debt_to_equity", op="<", threshold=200.0,  # Yahoo returns D/E as %, so 200 = 2.0 ratio
+        units={"debt_to_equity": 100},
+        passed="Debt/Equity {debt_to_equity:.2f} is healthy (< 2.0)",
+        failed="Debt/Equity {debt_to_equity:.2f} is risky (> 2.0)",
+    ),
+    # --- RULE 3: GROWTH ---
+    Rule(
+        name="Growth", field="revenue_growth", op=">", threshold=0.05,
+        passed="Revenue Growth {revenue_growth:.1%} > 5%",
+        failed="Revenue Growth {revenue_growth:.1%} is sluggish",
+    ),
+    # --- RULE 4: PROFITABILITY ---
+    Rule(
+        name="Profitability", field="profit_margins", op=">", threshold=0.10,
+        passed="Net Margin {profit_margins:.1%} is healthy",
+        failed="Net Margin {profit_margins:.1%} is thin",
+    ),
+    # --- RULE 5: EFFICIENCY (ROE) ---
+    Rule(
+        name="Efficiency", field="roe", op=">", threshold=0.15,
+        passed="ROE {roe:.1%} indicates strong management",
+        failed="ROE {roe:.1%} is below target 15%",
+    ),
+    # --- RULE 6: CASH HEALTH ---
+    Rule(
+        name="Free Cash Flow", field="free_cash_flow", op=">", threshold=0.0,
+        passed="Generating positive Free Cash Flow",
+        failed="Burning cash (Negative FCF)",
+    ),
+    # --- RULE 7: LIQUIDITY (The Apple Fix) ---
+    # Only penalize cash if they are LOSING money
+    Rule(
+        name="Liquidity Runway", field="cash_reserves", op=">", threshold="operating_costs",
+        only_if=("net_income", "<", 0.0),
+        exempt="Company is profitable (liquidity not at risk)",
+        units={"cash_reserves": 1e6, "operating_costs": 1e6},
+        passed="Cash reserves (${cash_reserves:.1f}M) cover burn rate (${operating_costs:.1f}M)",
+        failed="CRITICAL: Cash (${cash_reserves:.1f}M) insufficient for burn (${operating_costs:.1f}M)",
+    ),
+]
+
+# Score cut-offs, highest first
+VERDICTS = [(70.0, "TRUSTED"), (40.0, "CAUTION")]
+DEFAULT_VERDICT = "RISKY"
+
+
+def verdict_for(score: float) -> str:
+    for cutoff, verdict in VERDICTS:
+        if score >= cutoff:
+            return verdict
+    return DEFAULT_VERDICT
+
+
 class FinancialRuleEngine:
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules = list(rules) if rules is not None else RULES
+
     def evaluate(self, data: StockData) -> Dict[str, Any]:
-        rules_passed = 0
-        total_rules = 0
+        record = data.model_dump()
         breakdown = []
-
-        def check_rule(name, condition, reason_pass, reason_fail):
-            nonlocal rules_passed, total_rules
-            total_rules += 1
-            if condition:
-                rules_passed += 1
-                breakdown.append({"rule": name, "status": "PASS", "detail": reason_pass})
-            else:
-                breakdown.append({"rule": name, "status": "FAIL", "detail": reason_fail})
-
-        # --- RULE 1: VALUATION (Context Aware) ---
-        pe_limit = 60.0 if data.sector in ["Technology", "Communication Services"] else 30.0
-        check_rule(
-            "Valuation",
-            data.pe_ratio < pe_limit and data.pe_ratio > 0,
-            f"P/E {data.pe_ratio:.1f} is within limit {pe_limit}",
-            f"P/E {data.pe_ratio:.1f} exceeds limit {pe_limit}"
-        )
-
-        # --- RULE 2: SOLVENCY ---
-        check_rule(
-            "Solvency",
-            data.debt_to_equity < 200.0, # Yahoo returns D/E as %, so 200 = 2.0 ratio
-            f"Debt/Equity {data.debt_to_equity/100:.2f} is healthy (< 2.0)",
-            f"Debt/Equity {data.debt_to_equity/100:.2f} is risky (> 2.0)"
-        )
-
-        # --- RULE 3: GROWTH ---
-        check_rule(
-            "Growth",
-            data.revenue_growth > 0.05,
-            f"Revenue Growth {data.revenue_growth:.1%} > 5%",
-            f"Revenue Growth {data.revenue_growth:.1%} is sluggish"
-        )
-
-        # --- RULE 4: PROFITABILITY ---
-        check_rule(
-            "Profitability",
-            data.profit_margins > 0.10,
-            f"Net Margin {data.profit_margins:.1%} is healthy",
-            f"Net Margin {data.profit_margins:.1%} is thin"
-        )
-
-        # --- RULE 5: EFFICIENCY (ROE) ---
-        check_rule(
-            "Efficiency",
-            data.roe > 0.15,
-            f"ROE {data.roe:.1%} indicates strong management",
-            f"ROE {data.roe:.1%} is below target 15%"
-        )
-
-        # --- RULE 6: CASH HEALTH ---
-        check_rule(
-            "Free Cash Flow",
-            data.free_cash_flow > 0,
-            "Generating positive Free Cash Flow",
-            "Burning cash (Negative FCF)"
-        )
-
-        # --- RULE 7: LIQUIDITY (The Apple Fix) ---
-        # Only penalize cash if they are LOSING money
-        if data.net_income < 0:
-            check_rule(
-                "Liquidity Runway",
-                data.cash_reserves > data.operating_costs,
-                f"Cash reserves (${data.cash_reserves/1e6:.1f}M) cover burn rate (${data.operating_costs/1e6:.1f}M)",
-                f"CRITICAL: Cash (${data.cash_reserves/1e6:.1f}M) insufficient for burn (${data.operating_costs/1e6:.1f}M)"
-            )
-        else:
-            # Use check_rule for consistency (profitable companies pass automatically)
-            check_rule(
-                "Liquidity Runway",
-                True,
-                "Company is profitable (liquidity not at risk)",
-                "N/A"
-            )
+        for rule in self.rules:
+            passed, detail = rule.check(record)
+            breakdown.append({"rule": rule.name, "status": "PASS" if passed else "FAIL", "detail": detail})
 
         # Calculate Score
-        final_score = (rules_passed / total_rules) * 100 if total_rules > 0 else 0.0
-        
+        rules_passed = sum(item["status"] == "PASS" for item in breakdown)
+        final_score = (rules_passed / len(breakdown)) * 100 if breakdown else 0.0
+
         return {
             "score": round(final_score, 1),
-            "verdict": "TRUSTED" if final_score >= 70 else "CAUTION" if final_score >= 40 else "RISKY",
+            "verdict": verdict_for(final_score),
             "breakdown": breakdown
         }
+
+    def evaluate_batch(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Vectorized evaluate() over a whole DataFrame (one row per stock).
+
+        Every rule is compiled to one boolean column mask; no StockData or
+        detail strings are built. Columns missing from `df` take the StockData
+        defaults. Use explain() for the human-readable breakdown of a row.
+
+        Returns:
+            {
+                "score":   float array (0-100, rounded like evaluate),
+                "verdict": object array of TRUSTED / CAUTION / RISKY,
+                "passes":  bool DataFrame (rows x rule names), indexed like df
+            }
+        """
+        defaults = StockData().model_dump()
+        columns = {}
+        for name, default in defaults.items():
+            dtype = object if isinstance(default, str) else float
+            columns[name] = df[name].to_numpy(dtype=dtype) if name in df.columns else np.full(len(df), default, dtype=dtype)
+
+        passes = pd.DataFrame({rule.name: rule.mask(columns) for rule in self.rules}, index=df.index)
+
+        score = np.round(passes.to_numpy().sum(axis=1) / len(self.rules) * 100, 1) if self.rules else np.zeros(len(df))
+        verdict = np.select([score >= cutoff for cutoff, _ in VERDICTS], [v for _, v in VERDICTS],
+                            default=DEFAULT_VERDICT).astype(object)
+
+        return {"score": score, "verdict": verdict, "passes": passes}
+
+    def explain(self, row) -> List[Dict[str, str]]:
+        """
+        Human-readable breakdown for one row of a batch (a Series or dict).
+
+        Only call this for the rows someone actually inspects; it runs the
+        full per-stock evaluate() path.
+        """
+        return self.evaluate(to_stock_data(row))["breakdown"]
+
+
+def to_stock_data(row) -> StockData:
+    """Build StockData from a dict / DataFrame row, ignoring unrelated keys."""
+    data = {k: v for k, v in dict(row).items() if k in StockData.model_fields}
+    for key in ("symbol", "sector"):
+        if key in data and not isinstance(data[key], str):
+            data.pop(key)  # NaN from a CSV -> StockData default
+    return StockData(**data)
+
+
+class RuleChecker:
+    """
+    Tuple-returning wrapper used by the validation and analysis scripts.
+
+    evaluate_stock(dict) -> (score, verdict, ["PASS: Rule - detail", ...])
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.engine = FinancialRuleEngine(rules)
+
+    def evaluate_stock(self, data_dict):
+        result = self.engine.evaluate(to_stock_data(data_dict))
+        breakdown = [f"{item['status']}: {item['rule']} - {item['detail']}" for item in result["breakdown"]]
+        return result["score"], result["verdict"], breakdown
@@ -0,0 +1,193 @@
+"""
+Threshold Sweep (Sensitivity Analysis)
+
+Evaluates a whole grid of rule thresholds against a dataset in one pass and
+reports, for every grid point, the correlation of the resulting Trust_Score
+with realized returns.
+
+A grid parameter is named after a rule in rule_checker.RULES:
+
+    "Solvency"                                      -> the rule's threshold
+    "Valuation:Technology,Communication Services"   -> its sector override(s)
+
+How it stays cheap: the score is (rules passed) * 100 / (number of rules),
+so the correlation only needs three per-grid-point sums over stocks: the
+total count, count x return and count^2. Each swept rule is a (stocks x
+values) pass matrix; the first two sums are separable per rule and count^2
+only needs the pairwise overlaps between rules (M_r^T M_s). The grid is
+then assembled by broadcasting those small tables, never materializing a
+(stocks x grid) array. Large grids are split across all cores.
+
+Correlations are computed on the unrounded score; evaluate() rounds to one
+decimal, which moves r by well under 1e-3.
+"""
+
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from symbolic_engine.rule_checker import RULES, Rule, StockData
+except ImportError:  # Imported as src.symbolic_engine.threshold_sweep
+    from src.symbolic_engine.rule_checker import RULES, Rule, StockData
+
+RETURN_COLUMN = "Actual_Return_1Y"
+PARALLEL_MIN_POINTS = 200_000  # Smaller grids are faster on one thread
+
+
+def parse_parameter(name: str) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """Split "Rule" / "Rule:Sector A,Sector B" into (rule name, sectors or None)."""
+    rule_name, _, sectors = name.partition(":")
+    return rule_name, tuple(s.strip() for s in sectors.split(",")) if sectors else None
+
+
+def override_rule(rule: Rule, sectors: Optional[Tuple[str, ...]], value: float) -> Rule:
+    """Copy of `rule` with its threshold (or the given sector thresholds) set to `value`."""
+    if isinstance(rule.threshold, str):
+        raise ValueError(f"Rule '{rule.name}' compares against field '{rule.threshold}' and has no threshold to sweep")
+    if sectors is None:
+        return rule.model_copy(update={"threshold": float(value)})
+    sector_thresholds = dict(rule.sector_thresholds, **{sector: float(value) for sector in sectors})
+    return rule.model_copy(update={"sector_thresholds": sector_thresholds})
+
+
+def _columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Rule inputs as arrays, with StockData defaults for missing columns (as evaluate_batch)."""
+    columns = {}
+    for name, default in StockData().model_dump().items():
+        dtype = object if isinstance(default, str) else float
+        columns[name] = df[name].to_numpy(dtype=dtype) if name in df.columns else np.full(len(df), default, dtype=dtype)
+    return columns
+
+
+def _rule_axes(grid: Dict[str, Sequence[float]], rules: List[Rule], columns: Dict[str, np.ndarray]):
+    """
+    One grid axis per swept rule.
+
+    Returns (axes, fixed_count): each axis is (rule index, parameter names,
+    list of value tuples, pass matrix stocks x values); fixed_count is the
+    number of unswept rules each stock passes.
+    """
+    by_name = {rule.name: i for i, rule in enumerate(rules)}
+    params_by_rule: Dict[int, List[Tuple[str, Optional[Tuple[str, ...]]]]] = {}
+    for name in grid:
+        rule_name, sectors = parse_parameter(name)
+        if rule_name not in by_name:
+            raise KeyError(f"Unknown rule '{rule_name}' (known: {list(by_name)})")
+        params_by_rule.setdefault(by_name[rule_name], []).append((name, sectors))
+
+    axes = []
+    for index, params in params_by_rule.items():
+        names = [name for name, _ in params]
+        combos = list(itertools.product(*(grid[name] for name in names)))
+        masks = []
+        for combo in combos:
+            rule = rules[index]
+            for (_, sectors), value in zip(params, combo):
+                rule = override_rule(rule, sectors, value)
+            masks.append(rule.mask(columns))
+        axes.append((index, names, combos, np.column_stack(masks).astype(float)))
+
+    n = len(next(iter(columns.values())))
+    fixed_count = np.zeros(n)
+    for i, rule in enumerate(rules):
+        if i not in params_by_rule:
+            fixed_count += rule.mask(columns)
+    return axes, fixed_count
+
+
+def _grid_sums(fixed_count: np.ndarray, returns: np.ndarray, masks: List[np.ndarray], first_slice=slice(None)):
+    """Per-grid-point sums of count, count*return and count^2 (first axis restricted to `first_slice`)."""
+    masks = [masks[0][:, first_slice]] + masks[1:]
+    k = len(masks)
+
+    def along(table, axis):
+        shape = [1] * k
+        shape[axis] = -1
+        return table.reshape(shape)
+
+    def pair(table, a, b):
+        shape = [1] * k
+        shape[a], shape[b] = table.shape
+        return table.reshape(shape)
+
+    s1 = fixed_count.sum() + sum(along(m.sum(axis=0), r) for r, m in enumerate(masks))
+    sy = fixed_count @ returns + sum(along(m.T @ returns, r) for r, m in enumerate(masks))
+
+    # count^2 = c0^2 + 2 c0 m_r + m_r (binary: m_r^2 = m_r) + 2 m_r m_s for r < s
+    s2 = fixed_count @ fixed_count + sum(along(2 * (m.T @ fixed_count) + m.sum(axis=0), r) for r, m in enumerate(masks))
+    for a, b in itertools.combinations(range(k), 2):
+        s2 = s2 + 2 * pair(masks[a].T @ masks[b], a, b)
+    return s1, sy, s2
+
+
+def sweep_thresholds(df: pd.DataFrame,
+                     grid: Dict[str, Sequence[float]],
+                     return_column: str = RETURN_COLUMN,
+                     rules: Optional[List[Rule]] = None,
+                     workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Score every combination of threshold values in `grid`.
+
+    Args:
+        df: Dataset with the rule input columns and `return_column`
+        grid: {parameter: candidate values}, see module docstring for names
+        return_column: Realized return to correlate against
+        rules: Base rule set (defaults to rule_checker.RULES)
+        workers: Threads for large grids (defaults to all cores)
+
+    Returns:
+        DataFrame with one row per grid point: the parameter values, the
+        Pearson `correlation` of Trust_Score with the return (NaN when the
+        score is constant) and the `mean_score`.
+    """
+    rules = list(rules) if rules is not None else RULES
+    if not grid:
+        raise ValueError("Empty threshold grid")
+
+    data = df[df[return_column].notna()]
+    columns = _columns(data)
+    returns = data[return_column].to_numpy(dtype=float)
+    n = len(returns)
+
+    axes, fixed_count = _rule_axes(grid, rules, columns)
+    masks = [m for *_, m in axes]
+    shape = tuple(m.shape[1] for m in masks)
+    points = int(np.prod(shape))
+
+    def statistics(first_slice=slice(None)):
+        """Correlation and mean count for the grid points in `first_slice` of axis 0."""
+        s1, sy, s2 = _grid_sums(fixed_count, returns, masks, first_slice)
+        mean_count = s1 / n
+        cov = sy / n - mean_count * returns.mean()
+        var_count = s2 / n - mean_count ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = np.where(var_count > 1e-12, cov / np.sqrt(var_count * returns.var()), np.nan)
+        sub_shape = (len(range(shape[0])[first_slice]),) + shape[1:]
+        return np.broadcast_to(correlation, sub_shape), np.broadcast_to(mean_count, sub_shape)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and points >= PARALLEL_MIN_POINTS and shape[0] > 1:
+        bounds = np.linspace(0, shape[0], min(workers, shape[0]) + 1).astype(int)
+        slices = [slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        # NumPy releases the GIL inside the broadcast arithmetic, so threads scale
+        with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+            parts = list(executor.map(statistics, slices))
+        correlation = np.concatenate([part[0] for part in parts])
+        mean_count = np.concatenate([part[1] for part in parts])
+    else:
+        correlation, mean_count = statistics()
+
+    result = {}
+    positions = np.unravel_index(np.arange(points), shape)
+    for (_, names, combos, _), index in zip(axes, positions):
+        values = np.array(combos, dtype=float)  # values x params
+        for j, name in enumerate(names):
+            result[name] = values[index, j]
+    result["correlation"] = correlation.ravel()
+    result["mean_score"] = (mean_count * 100 / len(rules)).ravel()
+    return pd.DataFrame(result)[list(grid) + ["correlation", "mean_score"]]
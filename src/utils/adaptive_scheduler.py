@@ -0,0 +1,210 @@
+"""
+Adaptive Concurrency Scheduler
+
+AIMD (additive increase, multiplicative decrease) limits on concurrent calls
+to each external service, replacing hand-tuned worker counts and sleeps:
+
+- every healthy completion (no error, latency under the budget's target)
+  widens the window by 1/limit, i.e. about one slot per window of calls
+- a rate-limit error halves the window (at most once per cooldown, so a
+  burst of 429s from the same window counts once) and briefly pauses new calls
+- while the recent error rate is high, the window stops growing
+
+Each service has its own budget ("yahoo", "groq"), so a Groq 429 storm does
+not throttle price downloads and vice versa. Worker pools are sized at the
+budget's max_limit; the limiter decides how many of them run at once.
+
+Usage:
+    with get_scheduler().slot("yahoo"):
+        info = yf.Ticker(symbol).info
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Configuration
+DEFAULT_BUDGETS = {
+    "yahoo": {"initial": 4, "min_limit": 1, "max_limit": 32, "target_latency": 3.0},
+    "groq": {"initial": 2, "min_limit": 1, "max_limit": 16, "target_latency": 10.0},
+}
+BACKOFF_FACTOR = 0.5      # Window multiplier on a rate-limit error
+RATE_LIMIT_PAUSE = 1.0    # Seconds no new call starts after a rate-limit error
+ERROR_RATE_CEILING = 0.2  # No widening above this recent error rate
+EWMA_ALPHA = 0.1          # Weight of the latest call in latency / error averages
+
+OK = "ok"
+ERROR = "error"
+RATE_LIMITED = "rate_limited"
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for HTTP 429s: groq.RateLimitError, yfinance's YFRateLimitError, "Too Many Requests"."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status == 429 or "RateLimit" in type(error).__name__:
+        return True
+    message = str(error).lower()
+    return "too many requests" in message or "rate limit" in message
+
+
+class Slot:
+    """Handle for one scheduled call; mark() records a failure that did not raise."""
+
+    def __init__(self):
+        self.outcome = OK
+
+    def mark(self, outcome: str):
+        self.outcome = outcome
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency window for one service.
+
+    Args:
+        name: Budget name (for metrics)
+        initial: Starting window
+        min_limit / max_limit: Window bounds
+        target_latency: Calls slower than this (seconds) do not widen the window
+        cooldown: Minimum seconds between two decreases (defaults to target_latency,
+            roughly the time calls already in flight need to come back)
+    """
+
+    def __init__(self, name: str, initial: float = 4, min_limit: float = 1, max_limit: float = 32,
+                 target_latency: float = 3.0, cooldown: Optional[float] = None):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.target_latency = target_latency
+        self.cooldown = target_latency if cooldown is None else cooldown
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self._last_decrease = float("-inf")
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Block until the window has room. Returns the start time to pass to release()."""
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self.in_flight < int(self.limit):
+                    break
+                else:
+                    self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.monotonic()
+
+    def release(self, started: float, outcome: str = OK):
+        """Return a slot and adapt the window to the call's outcome and latency."""
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self.in_flight -= 1
+            failed = outcome != OK
+            self.error_rate += EWMA_ALPHA * (failed - self.error_rate)
+
+            if outcome == RATE_LIMITED:
+                self.rate_limited += 1
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * BACKOFF_FACTOR)
+                    self._last_decrease = now
+                    self._paused_until = now + RATE_LIMIT_PAUSE
+            elif outcome == ERROR:
+                self.errors += 1
+            else:
+                self.completed += 1
+                self.latency = latency if self.latency is None else self.latency + EWMA_ALPHA * (latency - self.latency)
+                if self.error_rate < ERROR_RATE_CEILING and latency <= self.target_latency:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Run the enclosed call in a slot; exceptions are classified, recorded and re-raised."""
+        handle = Slot()
+        started = self.acquire()
+        try:
+            yield handle
+        except Exception as e:
+            handle.mark(RATE_LIMITED if is_rate_limit_error(e) else ERROR)
+            raise
+        finally:
+            self.release(started, handle.outcome)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "latency": None if self.latency is None else round(self.latency, 3),
+                "error_rate": round(self.error_rate, 3),
+            }
+
+
+class AdaptiveScheduler:
+    """One AdaptiveLimiter per service budget."""
+
+    def __init__(self, budgets: Optional[Dict[str, dict]] = None):
+        budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        self.limiters = {name: AdaptiveLimiter(name, **config) for name, config in budgets.items()}
+
+    def limiter(self, budget: str) -> AdaptiveLimiter:
+        try:
+            return self.limiters[budget]
+        except KeyError:
+            raise KeyError(f"Unknown budget '{budget}' (known: {list(self.limiters)})") from None
+
+    def slot(self, budget: str):
+        return self.limiter(budget).slot()
+
+    def max_workers(self, budget: str) -> int:
+        """Thread pool size that never caps the budget's window."""
+        return int(self.limiter(budget).max_limit)
+
+    def metrics(self) -> Dict[str, dict]:
+        return {name: limiter.metrics() for name, limiter in self.limiters.items()}
+
+    def summary(self, budget: str) -> str:
+        """One-line report of a budget, for the end of a run."""
+        m = self.limiter(budget).metrics()
+        latency = "n/a" if m["latency"] is None else f"{m['latency']:.2f}s"
+        return (f"{budget}: window {m['limit']:.1f} (peak {m['peak_in_flight']} in flight), "
+                f"{m['completed']} ok, {m['errors']} errors, {m['rate_limited']} rate-limited, latency {latency}")
+
+
+# Global scheduler instance
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> AdaptiveScheduler:
+    """Get or create the global scheduler (shared by every dataset builder in the process)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = AdaptiveScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[AdaptiveScheduler]):
+    """Replace the global scheduler (e.g. with custom budgets in tests); None resets it."""
+    global _scheduler
+    _scheduler = scheduler
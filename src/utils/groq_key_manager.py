@@ -1,116 +1,395 @@
 """
 Multi-Key Groq API Manager
 
-Automatically rotates between multiple API keys when rate limits are hit.
+Spreads requests over multiple Groq API keys with a per-key token bucket.
+
+Each key tracks three budgets:
+- requests per minute (enforced locally; Groq does not report it)
+- tokens per minute   (synced from x-ratelimit-*-tokens response headers)
+- requests per day    (synced from x-ratelimit-*-requests response headers)
+
+`KeyPool.acquire()` / `acquire_async()` lease the key with the most remaining
+budget and wait only as long as the budget actually needs to refill, so a
+limited key never stalls unrelated workers. The pool is guarded by a lock and
+never sleeps while holding it, so it can be shared by threads and event loops.
 """
 
+import asyncio
 import os
-from dotenv import load_dotenv
+import re
+import threading
 import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from dotenv import load_dotenv
+
+MAX_KEYS = 9  # GROQ_API_KEY plus GROQ_API_KEY_2 .. GROQ_API_KEY_9
+
+# Default free-tier limits (llama-3.1-8b-instant); headers override TPM / RPD
+DEFAULT_RPM = 30
+DEFAULT_TPM = 6000
+DEFAULT_RPD = 14400
+RATE_LIMIT_COOLDOWN = 60  # Seconds a key rests after a 429 without a retry-after header
+DEFAULT_COMPLETION_TOKENS = 300  # Budgeted per request until the real usage is known
+POLL_INTERVAL = 0.01  # Re-check interval while every key is busy (not budget-limited)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def load_api_keys():
+    """All configured Groq keys as (env var name, key) pairs, primary first."""
+    names = ["GROQ_API_KEY"] + [f"GROQ_API_KEY_{i}" for i in range(2, MAX_KEYS + 1)]
+    return [(name, os.getenv(name)) for name in names if os.getenv(name)]
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a Groq reset header ("2m59.56s", "7.66s", "120ms") or a plain number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        parts = _DURATION.findall(value or "")
+        return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts) if parts else None
+
+
+def estimate_tokens(messages: List[Dict[str, str]], completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Rough token cost of a chat request (~4 characters per prompt token)."""
+    return sum(len(message["content"]) for message in messages) // 4 + completion_tokens
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second."""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else (0.0 if missing <= 0 else float("inf"))
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+    def sync(self, now: float, remaining: float, reset: Optional[float], limit: Optional[float] = None):
+        """Adopt the server's view: `remaining` now, back to full after `reset` seconds."""
+        if limit:
+            self.capacity = float(limit)
+        self.tokens = min(float(remaining), self.capacity)
+        self.updated = now
+        if reset and reset > 0 and self.tokens < self.capacity:
+            self.rate = (self.capacity - self.tokens) / reset
+
+    @property
+    def fraction(self) -> float:
+        return max(0.0, self.tokens) / self.capacity if self.capacity else 0.0
+
+
+@dataclass
+class KeyState:
+    """Budget and usage counters of one API key."""
+    name: str
+    key: str
+    rpm: TokenBucket
+    tpm: TokenBucket
+    rpd: TokenBucket
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    requests: int = 0
+    rate_limited: int = 0
+    tokens_used: int = 0
+
+    def headroom(self) -> float:
+        """Smallest remaining fraction across the three budgets."""
+        return min(self.rpm.fraction, self.tpm.fraction, self.rpd.fraction)
+
+
+@dataclass
+class KeyLease:
+    """A key handed out by the pool; give it back with KeyPool.release()."""
+    index: int
+    name: str
+    key: str
+    reserved_tokens: int
+    released: bool = field(default=False, repr=False)
+
+
+class KeyPool:
+    """
+    Thread- and asyncio-safe pool of Groq keys with token-bucket budgets.
+
+    Usage:
+        lease = pool.acquire(tokens)                 # threads (or: await pool.acquire_async(tokens))
+        try:
+            raw = Groq(api_key=lease.key).chat.completions.with_raw_response.create(...)
+            pool.release(lease, headers=raw.headers, tokens_used=...)
+        except RateLimitError as e:
+            pool.release(lease, headers=e.response.headers, rate_limited=True)
+    """
+
+    def __init__(self, keys: List[Tuple[str, str]], rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM,
+                 rpd: int = DEFAULT_RPD, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            keys: (name, key) pairs
+            rpm / tpm / rpd: Initial per-key limits (TPM and RPD follow response headers)
+            max_in_flight: Concurrent requests per key (None = unlimited)
+        """
+        if not keys:
+            raise ValueError("No Groq API keys found in .env file")
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._keys = [
+            KeyState(name, key, rpm=TokenBucket(rpm, 60), tpm=TokenBucket(tpm, 60), rpd=TokenBucket(rpd, 86400))
+            for name, key in keys
+        ]
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def names(self) -> List[str]:
+        return [state.name for state in self._keys]
+
+    @property
+    def keys(self) -> List[str]:
+        return [state.key for state in self._keys]
+
+    def _select(self, tokens: int, now: float) -> Tuple[Optional[int], float]:
+        """Index of the usable key with the most headroom (or None) and the wait otherwise. Hold the lock."""
+        best, best_headroom, wait = None, -1.0, float("inf")
+        for index, state in enumerate(self._keys):
+            for bucket in (state.rpm, state.tpm, state.rpd):
+                bucket.refill(now)
+            if self.max_in_flight is not None and state.in_flight >= self.max_in_flight:
+                wait = min(wait, POLL_INTERVAL)
+                continue
+            key_wait = max(state.cooldown_until - now, state.rpm.wait_time(1),
+                           state.tpm.wait_time(tokens), state.rpd.wait_time(1))
+            if key_wait > 0:
+                wait = min(wait, key_wait)
+            elif state.headroom() > best_headroom:
+                best, best_headroom = index, state.headroom()
+        return best, (0.0 if best is not None else wait)
+
+    def best_index(self, tokens: int = 0) -> Optional[int]:
+        """Key that acquire() would hand out right now, without reserving it."""
+        with self._lock:
+            return self._select(tokens, time.monotonic())[0]
+
+    def try_acquire(self, tokens: int = DEFAULT_COMPLETION_TOKENS) -> Tuple[Optional[KeyLease], float]:
+        """
+        Lease the key with the most remaining budget without waiting.
+
+        Returns:
+            (lease, 0.0) on success, else (None, seconds until a budget allows
+            the request; POLL_INTERVAL if keys are only busy)
+        """
+        with self._lock:
+            best, wait = self._select(tokens, time.monotonic())
+            if best is None:
+                return None, wait
+
+            state = self._keys[best]
+            state.rpm.take(1)
+            state.rpd.take(1)
+            state.tpm.take(tokens)
+            state.in_flight += 1
+            state.requests += 1
+            return KeyLease(best, state.name, state.key, tokens), 0.0
+
+    def acquire(self, tokens: int = DEFAULT_COMPLETION_TOKENS, timeout: Optional[float] = None) -> KeyLease:
+        """Blocking lease for worker threads; waits only for the budget that is short."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            lease, wait = self.try_acquire(tokens)
+            if lease is not None:
+                return lease
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"No Groq key has budget for {tokens} tokens within {timeout}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = DEFAULT_COMPLETION_TOKENS) -> KeyLease:
+        """Non-blocking lease for coroutines."""
+        while True:
+            lease, wait = self.try_acquire(tokens)
+            if lease is not None:
+                return lease
+            await asyncio.sleep(wait)
+
+    def release(self, lease: KeyLease, headers: Optional[Mapping[str, str]] = None,
+                tokens_used: Optional[int] = None, rate_limited: bool = False):
+        """
+        Return a lease and fold in what the API reported.
+
+        Args:
+            lease: Lease from acquire()
+            headers: Response headers (x-ratelimit-* and retry-after), if any
+            tokens_used: Actual total tokens of the completion, if known
+            rate_limited: The request was answered with a 429
+        """
+        with self._lock:
+            if lease.released:
+                return
+            lease.released = True
+            state = self._keys[lease.index]
+            now = time.monotonic()
+            state.in_flight -= 1
+
+            if tokens_used is not None:
+                state.tpm.take(tokens_used - lease.reserved_tokens)  # Settle the estimate
+                state.tokens_used += tokens_used
+            elif rate_limited:
+                state.tpm.take(-lease.reserved_tokens)  # Rejected requests do not spend tokens
+
+            headers = headers or {}
+            self._sync_bucket(state.tpm, headers, "tokens", now)
+            self._sync_bucket(state.rpd, headers, "requests", now)
+
+            if rate_limited:
+                self._bench(state, parse_duration(headers.get("retry-after")), now)
+
+    def mark_rate_limited(self, index: int, retry_after: Optional[float] = None):
+        """Rest a key after a 429 seen outside a lease (retry_after defaults to RATE_LIMIT_COOLDOWN)."""
+        with self._lock:
+            self._bench(self._keys[index], retry_after, time.monotonic())
+
+    @staticmethod
+    def _bench(state: KeyState, retry_after: Optional[float], now: float):
+        state.rate_limited += 1
+        state.cooldown_until = now + (retry_after if retry_after is not None else RATE_LIMIT_COOLDOWN)
+
+    @staticmethod
+    def _sync_bucket(bucket: TokenBucket, headers: Mapping[str, str], kind: str, now: float):
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        if remaining is None:
+            return
+        try:
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            bucket.sync(now, float(remaining), parse_duration(headers.get(f"x-ratelimit-reset-{kind}")),
+                        float(limit) if limit is not None else None)
+        except ValueError:
+            pass  # Malformed header: keep the local estimate
+
+    def metrics(self) -> Dict[str, dict]:
+        """Per-key budget and usage snapshot (utilization = 1 - smallest remaining fraction)."""
+        with self._lock:
+            now = time.monotonic()
+            snapshot = {}
+            for state in self._keys:
+                for bucket in (state.rpm, state.tpm, state.rpd):
+                    bucket.refill(now)
+                snapshot[state.name] = {
+                    "requests_per_minute_left": round(state.rpm.tokens, 2),
+                    "tokens_per_minute_left": round(state.tpm.tokens, 1),
+                    "requests_per_day_left": round(state.rpd.tokens, 1),
+                    "utilization": round(1 - state.headroom(), 4),
+                    "in_flight": state.in_flight,
+                    "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 2),
+                    "requests": state.requests,
+                    "rate_limited": state.rate_limited,
+                    "tokens_used": state.tokens_used,
+                }
+            return snapshot
+
 
 class GroqKeyManager:
     """
-    Manages multiple Groq API keys with automatic rotation on rate limit.
+    Single-key view over the global KeyPool for code that holds one client.
+
+    `get_current_key()` returns the key with the most budget left;
+    `rotate_key()` benches the current key after a rate limit and switches
+    to the best remaining one. It never sleeps: when every key is limited it
+    returns False and the caller decides how to back off (or uses
+    KeyPool.acquire, which waits exactly as long as needed).
     """
-    
-    def __init__(self):
+
+    def __init__(self, pool: Optional[KeyPool] = None):
         load_dotenv()
-        
-        # Load all available keys
-        self.keys = []
-        self.key_names = []
-        
-        # Primary key
-        primary_key = os.getenv("GROQ_API_KEY")
-        if primary_key:
-            self.keys.append(primary_key)
-            self.key_names.append("GROQ_API_KEY")
-        
-        # Secondary keys (GROQ_API_KEY_2, GROQ_API_KEY_3, etc.)
-        for i in range(2, 10):  # Support up to 9 keys
-            key = os.getenv(f"GROQ_API_KEY_{i}")
-            if key:
-                self.keys.append(key)
-                self.key_names.append(f"GROQ_API_KEY_{i}")
-        
-        if not self.keys:
-            raise ValueError("No Groq API keys found in .env file")
-        
-        self.current_key_index = 0
-        self.rate_limit_cooldown = {}  # Track cooldown for each key
-        
+        self.pool = pool or KeyPool(load_api_keys())
+        self.keys = self.pool.keys
+        self.key_names = self.pool.names
+        self.current_key_index = self.pool.best_index() or 0
+
         print(f"✅ Loaded {len(self.keys)} Groq API key(s)")
         for name in self.key_names:
             print(f"   - {name}")
-    
+
     def get_current_key(self):
         """Get the currently active API key"""
         return self.keys[self.current_key_index]
-    
+
     def get_current_key_name(self):
         """Get the name of the currently active key"""
         return self.key_names[self.current_key_index]
-    
-    def rotate_key(self):
+
+    def rotate_key(self, retry_after: Optional[float] = None):
         """
-        Rotate to the next available API key.
-        
+        Bench the current key and switch to the one with the most budget.
+
         Returns:
-            bool: True if rotation successful, False if all keys exhausted
+            bool: True if another key is usable now, False if all keys are limited
         """
-        # Mark current key as rate-limited
-        self.rate_limit_cooldown[self.current_key_index] = time.time()
-        
-        # Try next key
-        original_index = self.current_key_index
-        
-        for _ in range(len(self.keys)):
-            self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-            
-            # Check if this key is still in cooldown (60 seconds)
-            last_limit_time = self.rate_limit_cooldown.get(self.current_key_index, 0)
-            if time.time() - last_limit_time > 60:
-                print(f"🔄 Rotated to {self.key_names[self.current_key_index]}")
-                return True
-        
-        # All keys are rate-limited
-        print(f"⚠️  All {len(self.keys)} API keys are rate-limited")
-        
-        # Wait for cooldown on first key
-        wait_time = 60 - (time.time() - self.rate_limit_cooldown.get(0, 0))
-        if wait_time > 0:
-            print(f"⏳ Waiting {wait_time:.0f} seconds for cooldown...")
-            time.sleep(wait_time)
-            self.current_key_index = 0
-            return True
-        
-        return False
-    
+        self.pool.mark_rate_limited(self.current_key_index, retry_after)
+
+        index = self.pool.best_index()
+        if index is None:
+            print(f"⚠️  All {len(self.keys)} API keys are rate-limited")
+            return False
+        self.current_key_index = index
+        print(f"🔄 Rotated to {self.key_names[index]}")
+        return True
+
     def handle_rate_limit_error(self, error):
         """
         Handle rate limit error by rotating keys.
-        
+
         Args:
             error: The error object
-        
+
         Returns:
             bool: True if successfully rotated, False otherwise
         """
         if "rate_limit" in str(error).lower() or "429" in str(error):
             print(f"⚠️  Rate limit hit on {self.get_current_key_name()}")
-            return self.rotate_key()
+            response = getattr(error, "response", None)
+            retry_after = parse_duration(response.headers.get("retry-after")) if response is not None else None
+            return self.rotate_key(retry_after)
         return False
 
 
-# Global key manager instance
+# Global instances (created on first use, shared by all threads)
 _key_manager = None
+_key_pool = None
+_init_lock = threading.Lock()
+
+
+def get_key_pool() -> KeyPool:
+    """Get or create the global key pool"""
+    global _key_pool
+    with _init_lock:
+        if _key_pool is None:
+            load_dotenv()
+            _key_pool = KeyPool(load_api_keys())
+        return _key_pool
+
 
 def get_key_manager():
     """Get or create the global key manager"""
     global _key_manager
-    if _key_manager is None:
-        _key_manager = GroqKeyManager()
-    return _key_manager
+    pool = get_key_pool()
+    with _init_lock:
+        if _key_manager is None:
+            _key_manager = GroqKeyManager(pool)
+        return _key_manager
 
 def get_groq_api_key():
     """Get the current active Groq API key"""
@@ -120,10 +399,10 @@ def get_groq_api_key():
 def handle_groq_error(error):
     """
     Handle Groq API errors with automatic key rotation.
-    
+
     Args:
         error: The error object
-    
+
     Returns:
         bool: True if should retry, False otherwise
     """
@@ -135,15 +414,19 @@ if __name__ == "__main__":
     # Test the key manager
     print("Testing Groq Key Manager...")
     print("="*60)
-    
+
     manager = GroqKeyManager()
-    
+
     print(f"\nCurrent key: {manager.get_current_key_name()}")
     print(f"Total keys: {len(manager.keys)}")
-    
+
     # Simulate rate limit
     print("\nSimulating rate limit...")
     if manager.rotate_key():
         print(f"✅ Successfully rotated to: {manager.get_current_key_name()}")
     else:
         print("❌ No keys available")
+
+    print("\nKey budgets:")
+    for name, stats in manager.pool.metrics().items():
+        print(f"   - {name}: {stats}")
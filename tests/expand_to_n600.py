@@ -13,33 +13,31 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'utils'))
 
-from orchestrator.data_loader import get_real_stock_data, get_historical_price
+from orchestrator.data_loader import TickerSnapshot
 from orchestrator.main import run_analysis
+from adaptive_scheduler import get_scheduler
 
 # Configuration
-MAX_WORKERS = 15  # Increased for 3 API keys
-RATE_LIMIT_DELAY = 0.05  # Very fast with 3 keys
+MAX_WORKERS = get_scheduler().max_workers("yahoo")  # Pool ceiling; the scheduler sets live concurrency
 
 def process_single_stock(symbol, index, total):
     """Process a single stock"""
     try:
         print(f"[{index}/{total}] {symbol}...", end=" ")
         
-        raw_data = get_real_stock_data(symbol)
+        # One fetch shared by rules, indicators and the return
+        snapshot = TickerSnapshot(symbol)
+        raw_data = snapshot.stock_data()
         
         if raw_data["current_price"] == 0.0:
             print("SKIP")
             return None
         
-        analysis = run_analysis(symbol)
-        hist_price = get_historical_price(symbol, days_ago=365)
+        analysis = run_analysis(snapshot=snapshot, reasoning="none")
         current_price = raw_data["current_price"]
-        
-        if hist_price > 0:
-            actual_return = ((current_price - hist_price) / hist_price) * 100
-        else:
-            actual_return = 0.0
+        actual_return = snapshot.actual_return(days_ago=365)
         
         result = {
             'Symbol': symbol,
@@ -80,7 +78,6 @@ def process_single_stock(symbol, index, total):
         }
         
         print(f"✅ T:{analysis['trust_score']:.0f}, R:{actual_return:.1f}%")
-        time.sleep(RATE_LIMIT_DELAY)
         
         return result
         
@@ -139,6 +136,7 @@ def main():
         print(f"\nTotal stocks: {len(combined_df)}")
         print(f"New stocks added: {len(new_results)}")
         print(f"Processing time: {elapsed/60:.1f} minutes")
+        print(f"Scheduler: {get_scheduler().summary('yahoo')}")
         print(f"Features: {len(combined_df.columns)}")
         
         print(f"\n📊 Statistics:")
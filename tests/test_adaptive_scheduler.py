@@ -0,0 +1,91 @@
+"""
+Adaptive Scheduler Tests
+
+Checks the AIMD window: it widens on healthy calls, halves once per burst of
+rate-limit errors, holds while errors are frequent, never lets more calls run
+than the window allows, and only charges cache misses to the Yahoo budget.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent.parent / "src" / "utils"))
+
+from adaptive_scheduler import ERROR, AdaptiveLimiter, AdaptiveScheduler, get_scheduler, set_scheduler
+
+
+class RateLimitError(Exception):
+    """Same name and status as groq.RateLimitError."""
+    status_code = 429
+
+
+def test_healthy_calls_widen_the_window_up_to_max():
+    limiter = AdaptiveLimiter("yahoo", initial=2, max_limit=5, target_latency=1.0)
+    for _ in range(100):
+        with limiter.slot():
+            pass
+    assert limiter.limit == 5
+    assert limiter.metrics()["completed"] == 100
+
+
+def test_rate_limits_halve_the_window_once_per_burst():
+    limiter = AdaptiveLimiter("groq", initial=8, target_latency=1.0, cooldown=60)
+    for _ in range(3):
+        with pytest.raises(RateLimitError):
+            with limiter.slot():
+                raise RateLimitError("Too Many Requests")
+    assert limiter.limit == 4
+    assert limiter.rate_limited == 3 and limiter.in_flight == 0
+
+    # Plain errors and empty results do not shrink the window, but stop it growing
+    for _ in range(5):
+        with limiter.slot() as slot:
+            slot.mark(ERROR)
+    with limiter.slot():
+        pass
+    assert limiter.limit == 4 and limiter.errors == 5
+
+
+def test_in_flight_never_exceeds_the_window():
+    scheduler = AdaptiveScheduler({"yahoo": {"initial": 3, "max_limit": 3}, "groq": {"initial": 1, "max_limit": 1}})
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with scheduler.slot("yahoo"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 3
+    assert scheduler.metrics()["groq"]["completed"] == 0  # Budgets are independent
+    with pytest.raises(KeyError):
+        scheduler.slot("polygon")
+
+
+def test_market_cache_charges_only_misses_to_yahoo(tmp_path, monkeypatch):
+    from orchestrator import market_cache
+
+    monkeypatch.setattr(market_cache.yf, "Ticker", lambda symbol: type("T", (), {"info": {"currentPrice": 1.0}})())
+    market_cache.set_cache(market_cache.MarketDataCache(path=str(tmp_path / "cache.sqlite")))
+    set_scheduler(AdaptiveScheduler())
+    try:
+        for _ in range(3):
+            market_cache.fetch_info("AAPL")
+        assert get_scheduler().metrics()["yahoo"]["completed"] == 1
+    finally:
+        market_cache.set_cache(None)
+        set_scheduler(None)
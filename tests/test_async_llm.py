@@ -0,0 +1,151 @@
+"""
+Async LLM Runner Tests
+
+Runs AsyncLLMRunner against a local mock of the Groq chat completions
+endpoint and checks the concurrency limits and 429 handling.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from neural_engine.llm_interface import AsyncLLMRunner
+from neural_engine.response_cache import LLMResponseCache
+
+
+class MockGroq(BaseHTTPRequestHandler):
+    """Answers /openai/v1/chat/completions after `delay` seconds, echoing the symbol(s)."""
+
+    def do_POST(self):
+        server = self.server
+        key = self.headers["Authorization"].split()[-1]
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        batch = [stock["symbol"] for stock in json.loads(prompt)] if prompt.startswith("[") else None
+        symbol = None if batch else prompt.split("\n")[0].split(": ")[1]
+
+        with server.lock:
+            server.active[key] = server.active.get(key, 0) + 1
+            server.peak_total = max(server.peak_total, sum(server.active.values()))
+            server.peak_per_key[key] = max(server.peak_per_key.get(key, 0), server.active[key])
+            limited = server.limit_first.get(key, 0) > 0
+            if limited:
+                server.limit_first[key] -= 1
+        try:
+            time.sleep(server.delay)
+            if limited:
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                           headers={"retry-after": "0.2"})
+                return
+            if batch:
+                content = json.dumps({"results": [{"symbol": s, "reasoning": f"Looks fine for {s}",
+                                                   "extracted_metrics": {"P/E": 20.0}} for s in batch]})
+            else:
+                content = json.dumps({"reasoning": f"Looks fine for {symbol}",
+                                      "extracted_metrics": {"ticker": symbol, "P/E": 20.0}})
+            self._send(200, {
+                "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+            })
+        finally:
+            with server.lock:
+                server.active[key] -= 1
+
+    def _send(self, status, payload, headers=None):
+        blob = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(blob)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(blob)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGroq)
+    server.lock = threading.Lock()
+    server.active, server.peak_per_key, server.limit_first = {}, {}, {}
+    server.peak_total = 0
+    server.delay = 0.05
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_runner(server, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    return AsyncLLMRunner(base_url=f"http://127.0.0.1:{server.server_port}", **kwargs)
+
+
+def test_analyze_many_respects_concurrency_limits(mock_server):
+    symbols = [f"SYM{i}" for i in range(24)]
+    runner = make_runner(mock_server, api_keys=["key-1", "key-2"], max_concurrency=6, per_key_concurrency=2)
+
+    results = runner.run_many(symbols, {s: {"pe_ratio": 20.0} for s in symbols})
+
+    assert list(results) == symbols
+    assert results["SYM7"]["reasoning"] == "Looks fine for SYM7"
+    assert results["SYM7"]["extracted_metrics"]["symbol"] == "SYM7"
+    # 2 keys x 2 slots = 4 requests at a time, below the global limit of 6
+    assert mock_server.peak_total == 4
+    assert max(mock_server.peak_per_key.values()) == 2
+
+
+def test_rate_limited_key_rests_and_request_is_retried(mock_server):
+    mock_server.limit_first["key-1"] = 1
+    runner = make_runner(mock_server, api_keys=["key-1", "key-2"], max_concurrency=1)
+
+    results = runner.run_many(["AAA", "BBB", "CCC"], {s: {} for s in ["AAA", "BBB", "CCC"]})
+
+    assert all(r["reasoning"].startswith("Looks fine") for r in results.values())
+    assert runner.rate_limited == 1 and runner.requests == 4
+
+
+def test_exhausted_retries_return_error_payload(mock_server):
+    mock_server.limit_first["key-1"] = 10
+    runner = make_runner(mock_server, api_keys=["key-1"], max_retries=2)
+
+    result = runner.run_many(["AAA"], {"AAA": {}})["AAA"]
+
+    assert result["reasoning"].startswith("API Error")
+    assert runner.requests == 2
+
+
+def test_cached_responses_skip_the_network(mock_server, tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite"))
+    symbols = ["AAA", "BBB"]
+    data = {s: {"pe_ratio": 20.0} for s in symbols}
+
+    first = make_runner(mock_server, api_keys=["key-1"], use_cache=True, cache=cache).run_many(symbols, data)
+    rerun = make_runner(mock_server, api_keys=["key-1"], use_cache=True, cache=cache)
+    second = rerun.run_many(symbols, data)
+
+    assert second == first
+    assert rerun.requests == 0 and cache.hits == 2
+
+
+def test_batched_requests_cover_every_symbol(mock_server):
+    symbols = [f"SYM{i}" for i in range(10)]
+    runner = make_runner(mock_server, api_keys=["key-1"])
+
+    results = runner.run_many(symbols, {s: {"pe_ratio": 20.0} for s in symbols}, batch_size=4)
+
+    assert list(results) == symbols
+    assert results["SYM9"]["reasoning"] == "Looks fine for SYM9"
+    assert results["SYM9"]["extracted_metrics"] == {"pe_ratio": 20.0, "symbol": "SYM9"}
+    assert runner.requests == 3
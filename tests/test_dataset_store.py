@@ -0,0 +1,71 @@
+"""
+Dataset Store Tests
+
+Checks that CSV datasets round-trip through the Parquet store with the
+explicit schema, that reads can be limited to columns and partitions, and
+that rewriting a snapshot replaces it.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator.dataset_store import list_snapshots, load_dataset, write_dataset
+
+DATASETS = Path(__file__).parent.parent / "results" / "datasets"
+
+
+def test_csv_is_imported_with_the_schema(tmp_path):
+    store = str(tmp_path / "store")
+    df = load_dataset("dataset_n600_plus", store_dir=store, source_dir=str(DATASETS))
+    csv = pd.read_csv(DATASETS / "dataset_n600_plus.csv")
+
+    assert list(df.columns) == list(csv.columns) and len(df) == len(csv)
+    assert df["rsi"].dtype == np.float32 and df["Actual_Return_1Y"].dtype == np.float64
+    assert isinstance(df["Verdict"].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(df["Actual_Return_1Y"], csv["Actual_Return_1Y"])
+    np.testing.assert_allclose(df["rsi"], csv["rsi"], rtol=1e-6)
+
+    # The second read comes from the store
+    assert len(list_snapshots("dataset_n600_plus", store)) == 1
+    projected = load_dataset("dataset_n600_plus", columns=["Symbol", "rsi"], store_dir=store, source_dir=str(DATASETS))
+    assert list(projected.columns) == ["Symbol", "rsi"]
+
+
+def test_multiyear_set_is_partitioned_by_year(tmp_path):
+    store = str(tmp_path / "store")
+    csv = pd.read_csv(DATASETS / "dataset_multiyear_2020_2024.csv")
+    path = write_dataset(csv, "multiyear", snapshot_date="2025-01-01", store_dir=store)
+    assert sorted(os.listdir(path)) == [f"Year={year}" for year in sorted(csv["Year"].unique())]
+
+    recent = load_dataset("multiyear", columns=["Symbol", "Year", "rsi"], filters=[("Year", ">=", 2023)],
+                          store_dir=store, source_dir=str(tmp_path))
+    assert recent["Year"].dtype == pd.Int16Dtype()
+    assert len(recent) == (csv["Year"] >= 2023).sum()
+
+    # A missing Year is kept (nullable), and that set is stored unpartitioned
+    gappy = csv.astype({"Year": "float64"})
+    gappy.loc[0, "Year"] = np.nan
+    path = write_dataset(gappy, "gappy", snapshot_date="2025-01-01", store_dir=store)
+    assert os.listdir(path) == ["part-0.parquet"]
+    years = load_dataset("gappy", columns=["Year"], store_dir=store, source_dir=str(tmp_path))["Year"]
+    assert years.isna().sum() == 1 and years.dtype == pd.Int16Dtype()
+
+
+def test_rewriting_a_snapshot_replaces_it_and_exports_csv(tmp_path):
+    store = str(tmp_path / "store")
+    df = pd.DataFrame({"Symbol": ["AAPL", "MSFT"], "Trust_Score": [71.4, 57.1], "rsi": [40.5, 61.2]})
+    write_dataset(df, "tiny", snapshot_date="2025-01-01", store_dir=store)
+    write_dataset(df.head(1), "tiny", snapshot_date="2025-01-01", store_dir=store,
+                  csv_path=str(tmp_path / "tiny.csv"))
+    write_dataset(df, "tiny", snapshot_date="2025-02-01", store_dir=store)
+
+    assert list_snapshots("tiny", store) == ["2025-01-01", "2025-02-01"]
+    assert len(load_dataset("tiny", snapshot="2025-01-01", store_dir=store, source_dir=str(tmp_path / "none"))) == 1
+    assert len(load_dataset("tiny", store_dir=store, source_dir=str(tmp_path / "none"))) == 2
+    assert pd.read_csv(tmp_path / "tiny.csv")["rsi"].tolist() == [40.5]
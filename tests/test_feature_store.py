@@ -0,0 +1,87 @@
+"""
+Feature Store Tests
+
+Checks that as-of joins never return a value dated on or after the cutoff,
+that fundamentals change with the annual report published before each
+cutoff, and that storing a symbol again replaces its rows.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator.feature_store import FeatureStore, fundamentals_history
+from orchestrator.technical_indicators import calculate_indicator_history, indicators_as_of
+
+
+def make_close():
+    dates = pd.bdate_range("2021-01-01", "2023-12-29")
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+                         for symbol in ["AAA", "BBB"]}, index=dates)
+
+
+def test_as_of_join_has_no_look_ahead(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    history = calculate_indicator_history(make_close())
+    store.put("technical", history)
+
+    cutoff = "2023-06-01"  # A trading day
+    strict = store.features_as_of(["AAA", "BBB", "MISSING"], cutoff, tables=("technical",))
+    assert (strict["technical_date"].dropna() < pd.Timestamp(cutoff)).all()
+    assert strict.loc["MISSING"].isna()["rsi"]
+    expected = indicators_as_of(history, cutoff)
+    np.testing.assert_allclose(strict.loc[["AAA", "BBB"], "rsi"], expected.loc[["AAA", "BBB"], "rsi"])
+
+    inclusive = store.features_as_of(["AAA"], cutoff, tables=("technical",), inclusive=True)
+    assert inclusive.loc["AAA", "technical_date"] == pd.Timestamp(cutoff)
+
+
+def test_fundamentals_follow_the_published_report(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    income = pd.DataFrame({pd.Timestamp("2021-12-31"): [100.0, 10.0, 1.0],
+                           pd.Timestamp("2022-12-31"): [120.0, 18.0, 2.0]},
+                          index=["Total Revenue", "Net Income", "Diluted EPS"])
+    store.put("fundamentals", fundamentals_history("AAA", income=income))
+    store.put("technical", calculate_indicator_history(make_close()))
+
+    keys = pd.DataFrame({"symbol": ["AAA"] * 3, "as_of": ["2023-03-01", "2023-04-03", "2022-01-03"]})
+    joined = store.as_of_join(keys)
+
+    # The FY2022 report only counts once it is public (period end + 90 days)
+    assert joined["eps"].tolist()[:2] == [1.0, 2.0]
+    np.testing.assert_allclose(joined.loc[1, ["revenue_growth", "profit_margins"]].astype(float), [0.2, 0.15])
+    assert np.isnan(joined.loc[2, "eps"]) and joined.loc[2, "pe_ratio"] == 0.0
+    assert joined.loc[1, "pe_ratio"] == pytest.approx(joined.loc[1, "close"] / 2.0)
+
+
+def test_put_replaces_a_symbols_rows(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    history = calculate_indicator_history(make_close())
+    store.put("technical", history)
+    store.put("technical", history.loc[["AAA"]].tail(5))
+
+    assert store.symbols("technical") == ["AAA", "BBB"]
+    rows = store.read("technical", ["AAA"], columns=["close"])
+    assert list(rows.columns) == ["symbol", "date", "close"] and len(rows) == 5
+    assert len(store.read("technical", ["BBB"])) == len(history.loc["BBB"])
+
+
+def test_join_columns_do_not_depend_on_stored_rows(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put("technical", calculate_indicator_history(make_close()))
+    income = pd.DataFrame({pd.Timestamp("2021-12-31"): [100.0, 10.0, 1.0]},
+                          index=["Total Revenue", "Net Income", "Diluted EPS"])
+
+    without = store.features_as_of(["AAA"], "2023-06-01")
+    store.put("fundamentals", fundamentals_history("AAA", income=income))
+    with_rows = store.features_as_of(["AAA"], "2023-06-01")
+
+    assert list(without.columns) == list(with_rows.columns)
+    assert "pe_ratio" in without.columns and without["eps"].isna().all()
+    assert without["period_end"].isna().all() and with_rows.loc["AAA", "eps"] == 1.0
@@ -0,0 +1,121 @@
+"""
+Groq Key Pool Tests
+
+Checks the per-key token buckets: best-key selection, header syncing,
+429 cooldowns, thread safety and non-blocking async waits.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src" / "utils"))
+
+from groq_key_manager import GroqKeyManager, KeyPool, parse_duration
+
+KEYS = [("GROQ_API_KEY", "key-a"), ("GROQ_API_KEY_2", "key-b")]
+
+
+def test_parse_duration():
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("3") == 3.0
+    assert parse_duration(None) is None
+
+
+def test_leases_go_to_key_with_most_budget():
+    pool = KeyPool(KEYS, rpm=10)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.name, second.name} == {"GROQ_API_KEY", "GROQ_API_KEY_2"}
+
+    # Headers say key-a has almost no tokens left this minute
+    pool.release(first, headers={"x-ratelimit-remaining-tokens": "50", "x-ratelimit-limit-tokens": "6000",
+                                 "x-ratelimit-reset-tokens": "59s"})
+    pool.release(second, headers={"x-ratelimit-remaining-tokens": "5900", "x-ratelimit-limit-tokens": "6000",
+                                  "x-ratelimit-reset-tokens": "1s"})
+    assert all(pool.acquire(tokens=10).name == "GROQ_API_KEY_2" for _ in range(3))
+
+    metrics = pool.metrics()
+    assert metrics["GROQ_API_KEY"]["tokens_per_minute_left"] < 100
+    assert metrics["GROQ_API_KEY"]["utilization"] > 0.9
+    assert metrics["GROQ_API_KEY_2"]["requests"] == 4 and metrics["GROQ_API_KEY_2"]["in_flight"] == 3
+
+
+def test_rate_limited_key_is_benched_for_retry_after():
+    pool = KeyPool(KEYS[:1])
+    lease = pool.acquire()
+    pool.release(lease, headers={"retry-after": "0.2"}, rate_limited=True)
+
+    assert pool.try_acquire()[0] is None
+    start = time.monotonic()
+    assert pool.acquire(timeout=2).name == "GROQ_API_KEY"
+    assert 0.15 < time.monotonic() - start < 1.0
+    assert pool.metrics()["GROQ_API_KEY"]["rate_limited"] == 1
+
+
+def test_request_budget_is_never_overdrawn_across_threads():
+    pool = KeyPool(KEYS, rpm=60, max_in_flight=3)
+    granted, peak, active, lock = [], [0], [0], threading.Lock()
+
+    def worker():
+        lease, _ = pool.try_acquire(tokens=1)
+        if lease is None:
+            return
+        with lock:
+            granted.append(lease.name)
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.001)
+        with lock:
+            active[0] -= 1
+        pool.release(lease)
+
+    threads = [threading.Thread(target=worker) for _ in range(300)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 60 requests/minute per key: at most ~120 grants however many threads race
+    assert len(granted) <= 121
+    assert max(granted.count(name) for name in ("GROQ_API_KEY", "GROQ_API_KEY_2")) <= 61
+    assert peak[0] <= 6
+
+
+def test_async_acquire_does_not_block_the_event_loop():
+    pool = KeyPool(KEYS[:1])
+    pool.release(pool.acquire(), headers={"retry-after": "0.2"}, rate_limited=True)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        lease = await pool.acquire_async()
+        task.cancel()
+        return lease, ticks
+
+    lease, ticks = asyncio.run(main())
+    assert lease.name == "GROQ_API_KEY" and ticks >= 10
+
+
+def test_manager_rotation_never_sleeps():
+    manager = GroqKeyManager(KeyPool(KEYS))
+    assert manager.get_current_key() == "key-a"
+
+    start = time.monotonic()
+    assert manager.rotate_key() is True
+    assert manager.get_current_key() == "key-b"
+    assert manager.rotate_key() is False  # Both limited: report it, don't wait 60s
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,91 @@
+"""
+Batched LLM Prompt Tests
+
+Checks that several symbols share one completion and that batched replies
+are split back into per-symbol analyze_stock results.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from neural_engine.llm_interface import LLMRunner, parse_batch
+
+
+def entry(symbol, **metrics):
+    return {"symbol": symbol, "reasoning": f"About {symbol}", "extracted_metrics": {"ticker": symbol, **metrics}}
+
+
+class BatchCompletions:
+    """Fake Groq endpoint that answers batched prompts, optionally dropping symbols."""
+
+    def __init__(self, drop=()):
+        self.calls = []
+        self.drop = set(drop)
+
+    def create(self, model, messages, response_format):
+        self.calls.append(messages)
+        content = messages[-1]["content"]
+        if content.startswith("["):
+            stocks = json.loads(content)
+            reply = {"results": [entry(s["symbol"], **{"P/E Ratio": s["data"]["pe_ratio"]})
+                                 for s in stocks if s["symbol"] not in self.drop]}
+        else:
+            symbol = content.split("\n")[0].split(": ")[1]
+            reply = {"reasoning": f"Single {symbol}", "extracted_metrics": {"symbol": symbol}}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(reply)))])
+
+
+def make_runner(completions):
+    runner = LLMRunner(api_key="test-key", use_cache=False)
+    runner.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return runner
+
+
+def test_parse_batch_accepts_common_shapes():
+    symbols = ["AAPL", "MSFT"]
+    wrapped = json.dumps({"results": [entry("MSFT"), entry("AAPL")]})
+    bare = json.dumps([entry("aapl"), entry("msft")])
+    keyed = json.dumps({"AAPL": {"reasoning": "a", "P/E": 30}, "MSFT": {"reasoning": "m", "P/E": 35}})
+
+    for reply in (wrapped, bare, keyed):
+        parsed = parse_batch(reply, symbols)
+        assert set(parsed) == set(symbols)
+        assert all(parsed[s]["extracted_metrics"]["symbol"] == s for s in symbols)
+    assert parse_batch(wrapped, symbols)["MSFT"]["reasoning"] == "About MSFT"
+    assert parse_batch(keyed, symbols)["MSFT"]["extracted_metrics"]["pe_ratio"] == 35
+
+
+def test_unlabelled_entries_match_by_position():
+    reply = json.dumps({"results": [{"reasoning": "first", "extracted_metrics": {"price": 1}},
+                                    {"reasoning": "second", "extracted_metrics": {"price": 2}}]})
+    parsed = parse_batch(reply, ["AAA", "BBB"])
+    assert parsed["BBB"]["reasoning"] == "second"
+    assert parsed["BBB"]["extracted_metrics"] == {"current_price": 2, "symbol": "BBB"}
+
+
+def test_analyze_batch_uses_one_request_per_batch():
+    completions = BatchCompletions()
+    runner = make_runner(completions)
+    symbols = [f"S{i}" for i in range(10)]
+
+    results = runner.analyze_batch(symbols, {s: {"pe_ratio": i} for i, s in enumerate(symbols)}, batch_size=4)
+
+    assert list(results) == symbols
+    assert len(completions.calls) == 3
+    assert results["S5"]["extracted_metrics"]["pe_ratio"] == 5
+    assert results["S5"]["reasoning"] == "About S5"
+
+
+def test_symbols_missing_from_batch_are_asked_individually():
+    completions = BatchCompletions(drop={"BBB"})
+    runner = make_runner(completions)
+
+    results = runner.analyze_batch(["AAA", "BBB", "CCC"], {s: {"pe_ratio": 1.0} for s in ["AAA", "BBB", "CCC"]})
+
+    assert results["BBB"]["reasoning"] == "Single BBB"
+    assert results["AAA"]["reasoning"] == "About AAA"
+    assert len(completions.calls) == 2
@@ -0,0 +1,79 @@
+"""
+LLM Response Cache Tests
+
+Checks keying, TTL expiry and LRU eviction of the persistent completion
+cache, and that LLMRunner only calls the API for prompts it has not seen.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from neural_engine.llm_interface import LLMRunner
+from neural_engine.response_cache import LLMResponseCache, prompt_key
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, response_format):
+        self.calls += 1
+        content = f'{{"reasoning": "call {self.calls}", "extracted_metrics": {{"pe_ratio": 20}}}}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(path=str(tmp_path / "llm.sqlite"))
+
+
+def make_runner(cache, model_id="llama-3.1-8b-instant"):
+    runner = LLMRunner(api_key="test-key", model_id=model_id, cache=cache)
+    runner.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    return runner
+
+
+def test_prompt_key_ignores_whitespace_but_not_model():
+    messages = [{"role": "user", "content": "Symbol: AAPL\nData: {'pe_ratio': 20}"}]
+    reformatted = [{"role": "user", "content": "  Symbol:   AAPL \n\n Data: {'pe_ratio': 20}"}]
+    assert prompt_key("m1", messages) == prompt_key("m1", reformatted)
+    assert prompt_key("m1", messages) != prompt_key("m2", messages)
+
+
+def test_runner_reuses_response_for_unchanged_inputs(cache):
+    runner = make_runner(cache)
+    first = runner.analyze_stock("AAPL", {"pe_ratio": 20.0})
+    again = runner.analyze_stock("AAPL", {"pe_ratio": 20.0})
+    changed = runner.analyze_stock("AAPL", {"pe_ratio": 21.0})
+
+    assert again == first and first["reasoning"] == "call 1"
+    assert changed["reasoning"] == "call 2"
+    assert runner.client.chat.completions.calls == 2
+
+    other_model = make_runner(cache, model_id="llama-3.3-70b-versatile")
+    other_model.analyze_stock("AAPL", {"pe_ratio": 20.0})
+    assert other_model.client.chat.completions.calls == 1
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite"), ttl=0)
+    cache.put("k", "m", "response")
+    assert cache.get("k") is None
+    assert cache.purge_expired() == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite"), max_entries=2)
+    cache.put("a", "m", "A")
+    cache.put("b", "m", "B")
+    assert cache.get("a") == "A"  # "b" is now the least recently used
+    cache.put("c", "m", "C")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
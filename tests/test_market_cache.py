@@ -0,0 +1,108 @@
+"""
+Market Data Cache Tests
+
+Checks that repeated fundamentals/history lookups hit the on-disk cache
+instead of Yahoo Finance. The network is replaced by a counting fake Ticker.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator import market_cache
+from orchestrator.market_cache import MarketDataCache, fetch_history, fetch_info, next_market_close
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        FakeTicker.calls.append(("info", self.symbol))
+        return {"currentPrice": 100.0, "sector": "Technology"}
+
+    def history(self, period=None, start=None, end=None):
+        FakeTicker.calls.append(("history", self.symbol, period))
+        index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=520, tz="America/New_York")
+        close = np.linspace(50, 150, len(index))
+        return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1e6}, index=index)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    FakeTicker.calls = []
+    monkeypatch.setattr(market_cache.yf, "Ticker", FakeTicker)
+    cache = MarketDataCache(path=str(tmp_path / "cache.sqlite"))
+    market_cache.set_cache(cache)
+    yield cache
+    market_cache.set_cache(None)
+
+
+def test_info_is_downloaded_once(cache):
+    assert fetch_info("AAPL")["currentPrice"] == 100.0
+    assert fetch_info("AAPL")["currentPrice"] == 100.0
+    assert FakeTicker.calls == [("info", "AAPL")]
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_history_periods_share_one_download(cache):
+    one_year = fetch_history("AAPL", period="1y")
+    buffered = fetch_history("AAPL", period="395d")
+    assert [c for c in FakeTicker.calls if c[0] == "history"] == [("history", "AAPL", "2y")]
+    assert 0 < len(one_year) < len(buffered) < 520
+
+
+def test_cache_survives_new_instance(cache, tmp_path):
+    fetch_info("MSFT")
+    market_cache.set_cache(MarketDataCache(path=cache.path))
+    fetch_info("MSFT")
+    assert FakeTicker.calls == [("info", "MSFT")]
+
+
+def test_expired_entries_are_refetched(cache):
+    key = cache.make_key("info", "AAPL")
+    cache.put(key, "info", "AAPL", {"currentPrice": 1.0}, expires_at=0)
+    assert fetch_info("AAPL")["currentPrice"] == 100.0
+
+
+def test_next_market_close_skips_weekend():
+    saturday_noon = pd.Timestamp("2024-06-08 12:00", tz="America/New_York").timestamp()
+    close = pd.Timestamp(next_market_close(saturday_noon), unit="s", tz="UTC").tz_convert("America/New_York")
+    assert close == pd.Timestamp("2024-06-10 16:00", tz="America/New_York")
+
+
+def test_snapshot_fetches_each_part_once(cache):
+    from orchestrator.data_loader import TickerSnapshot
+
+    snapshot = TickerSnapshot("AAPL")
+    data = snapshot.stock_data()
+    snapshot.stock_data()
+    snapshot.actual_return(days_ago=20)
+
+    assert data["current_price"] == 100.0
+    assert "rsi" in data and "trend_strength" in data
+    assert sorted(c[0] for c in FakeTicker.calls) == ["history", "info"]
+
+
+def test_strict_snapshot_raises_on_failed_downloads_only():
+    from orchestrator.data_loader import TickerSnapshot
+
+    history = FakeTicker("AAPL").history()
+    with pytest.raises(ConnectionError):
+        TickerSnapshot("AAPL", info={}, history=history).stock_data(strict=True)
+    with pytest.raises(ConnectionError):
+        TickerSnapshot("AAPL", info={"currentPrice": 100.0}, history=history.iloc[:0]).stock_data(strict=True)
+
+    # A ticker without a quote is genuinely empty: zero price, no error
+    delisted = TickerSnapshot("GONE", info={"trailingPegRatio": None}, history=history.iloc[:0])
+    assert delisted.stock_data(strict=True)["current_price"] == 0.0
+    # The lenient default keeps returning the zero-price placeholder
+    assert TickerSnapshot("AAPL", info={}, history=history).stock_data()["current_price"] == 0.0
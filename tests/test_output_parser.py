@@ -0,0 +1,118 @@
+"""
+LLM Output Parser Tests
+
+Feeds completions to the incremental parser in arbitrary chunkings and
+checks it agrees with a one-shot decode, streams the reasoning early, and
+maps metric aliases like the original fuzzy mapper.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from neural_engine.llm_interface import RESPONSE_FORMAT, LLMRunner, build_messages
+from neural_engine.output_parser import (AnalysisStream, StreamingJSONParser, canonical_key, extract_json,
+                                         parse_analysis, parse_sentiment)
+from neural_engine.response_cache import LLMResponseCache, prompt_key
+
+REASONING = 'Strong "moat", cash\\flow\nnote: café \U0001F4C8 {not json} [x]'
+COMPLETION = "Sure! Here is the analysis:\n" + json.dumps({
+    "reasoning": REASONING,
+    "extracted_metrics": {"ticker": "NVDA", "P/E Ratio": "61.2", "Debt/Equity": 17.2, "netIncome": "1,234"},
+}) + "\nLet me know if {you} need more."
+
+
+def feed(text, size):
+    parser = StreamingJSONParser()
+    deltas = [parser.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return parser, deltas
+
+
+def test_any_chunking_matches_one_shot_decode():
+    expected = extract_json(COMPLETION)
+    for size in (1, 2, 3, 7, 64, len(COMPLETION)):
+        parser, deltas = feed(COMPLETION, size)
+        assert parser.value() == expected
+        assert "".join(deltas) == REASONING
+
+
+def test_reasoning_streams_before_the_object_closes():
+    parser, deltas = feed(COMPLETION, 5)
+    first = next(i for i, delta in enumerate(deltas) if delta)
+    assert (first + 1) * 5 < COMPLETION.index("extracted_metrics")
+    assert StreamingJSONParser().feed('{"reasoning": "partial') == "partial"
+
+
+def test_incomplete_or_missing_object_is_an_error():
+    for text in ('{"reasoning": "cut off', "no json here"):
+        assert parse_analysis(text, "AAA")["reasoning"].startswith("Error")
+
+
+def test_malformed_streamed_object_is_an_error_not_an_exception():
+    cached = []
+    text = '{"reasoning": "ok", "extracted_metrics": {"pe": 1,}}'
+    stream = AnalysisStream([text[:10], text[10:]], "AAA", on_complete=cached.append)
+
+    assert "".join(stream) == "ok"
+    assert stream.result()["reasoning"].startswith("Error")
+    assert stream.result()["extracted_metrics"] == {} and cached == []
+
+
+def test_alias_table_matches_substring_mapping():
+    assert canonical_key("P/E Ratio") == "pe_ratio"
+    assert canonical_key("currentPrice") == "current_price"
+    assert canonical_key("Ticker") == "symbol"
+    assert canonical_key("Total Operating Expenses") == "operating_costs"
+    assert canonical_key("sector") == "sector"
+
+    metrics = parse_analysis(COMPLETION, "NVDA")["extracted_metrics"]
+    assert metrics == {"symbol": "NVDA", "pe_ratio": 61.2, "debt_to_equity": 17.2, "net_income": 1234.0}
+
+
+def test_sentiment_schema_defaults_and_clamps():
+    assert parse_sentiment("no json") == {"sentiment": "neutral", "confidence": 50, "brief_reason": "Analysis completed"}
+    result = parse_sentiment('Result: {"sentiment": "Positive", "confidence": 140, "brief_reason": "Beats"} done')
+    assert result == {"sentiment": "positive", "confidence": 100, "brief_reason": "Beats"}
+
+
+class StreamingCompletions:
+    def __init__(self, text, size=4):
+        self.text, self.size, self.calls = text, size, 0
+
+    def create(self, model, messages, stream=False, response_format=None):
+        self.calls += 1
+        return (SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.text[i:i + self.size]))])
+                for i in range(0, len(self.text), self.size))
+
+
+def test_stream_stock_yields_reasoning_and_fills_cache(tmp_path):
+    completions = StreamingCompletions(COMPLETION)
+    runner = LLMRunner(api_key="test", cache=LLMResponseCache(path=str(tmp_path / "llm.sqlite")))
+    runner.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    stream = runner.stream_stock("NVDA", {"pe_ratio": 61.2})
+    assert "".join(stream) == REASONING
+    assert stream.result() == parse_analysis(COMPLETION, "NVDA")
+
+    replay = runner.stream_stock("NVDA", {"pe_ratio": 61.2})
+    assert replay.result()["reasoning"] == REASONING
+    assert completions.calls == 1
+
+
+def test_streamed_text_is_not_served_as_a_json_mode_reply(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite"))
+    runner = LLMRunner(api_key="test", cache=cache)
+    runner.client = SimpleNamespace(chat=SimpleNamespace(completions=StreamingCompletions(COMPLETION)))
+    messages = build_messages("NVDA", {"pe_ratio": 61.2})
+
+    runner.stream_stock("NVDA", {"pe_ratio": 61.2}).result()
+    assert cache.get(prompt_key(runner.model_id, messages, RESPONSE_FORMAT)) is None
+    assert cache.get(prompt_key(runner.model_id, messages)) == COMPLETION
+
+    # A JSON-mode reply is fine to replay as a stream
+    json_reply = json.dumps({"reasoning": "From JSON mode", "extracted_metrics": {}})
+    cache.put(prompt_key(runner.model_id, build_messages("AMD", {}), RESPONSE_FORMAT), runner.model_id, json_reply)
+    assert runner.stream_stock("AMD", {}).result()["reasoning"] == "From JSON mode"
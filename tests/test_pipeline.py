@@ -0,0 +1,124 @@
+"""
+Pipeline Reasoning Mode Tests
+
+Checks that run_analysis only queries the LLM when the caller asks for
+reasoning (never in rules-only mode, on first read in lazy mode) and that
+engines are only constructed when first needed.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+SRC = Path(__file__).parent.parent / "src"
+sys.path.append(str(SRC))
+
+from neural_engine.output_parser import AnalysisStream
+from orchestrator import main
+from orchestrator.data_loader import TickerSnapshot
+
+INFO = {
+    "sector": "Technology", "currentPrice": 120.0, "trailingPE": 25.0, "debtToEquity": 80.0,
+    "revenueGrowth": 0.12, "totalCash": 5e9, "totalOperatingExpenses": 1e9, "netIncomeToCommon": 2e9,
+    "profitMargins": 0.2, "returnOnEquity": 0.18, "freeCashflow": 1.5e9, "targetMeanPrice": 140.0,
+}
+
+
+class CountingRunner:
+    def __init__(self):
+        self.calls = []
+
+    def analyze_stock(self, symbol, data):
+        self.calls.append(symbol)
+        return {"reasoning": f"Reasoning for {symbol}", "extracted_metrics": {}}
+
+
+@pytest.fixture
+def runner():
+    fake = CountingRunner()
+    main.set_pipeline(main.Pipeline(llm_factory=lambda: fake))
+    yield fake
+    main.set_pipeline(None)
+
+
+def snapshot():
+    dates = pd.bdate_range("2024-01-01", periods=260)
+    history = pd.DataFrame({"Close": np.linspace(100, 120, len(dates))}, index=dates)
+    return TickerSnapshot("AAA", info=INFO, history=history)
+
+
+def test_rules_only_skips_the_llm(runner):
+    full = main.run_analysis(snapshot=snapshot())
+    rules_only = main.run_analysis(snapshot=snapshot(), reasoning="none")
+
+    assert runner.calls == ["AAA"]
+    assert rules_only["llm_reasoning"] is None
+    assert rules_only["trust_score"] == full["trust_score"]
+    assert rules_only["breakdown"] == full["breakdown"]
+
+
+def test_lazy_reasoning_resolves_once_on_read(runner):
+    result = main.run_analysis(snapshot=snapshot(), reasoning="lazy")
+    reasoning = result["llm_reasoning"]
+
+    assert runner.calls == [] and not reasoning.done()
+    assert reasoning.result() == "Reasoning for AAA"
+    assert str(reasoning) == "Reasoning for AAA"
+    assert runner.calls == ["AAA"]
+
+
+
+def test_lazy_result_serializes_once_resolved(runner):
+    result = main.run_analysis(snapshot=snapshot(), reasoning="lazy")
+    with pytest.raises(TypeError):
+        json.dumps(result)
+
+    resolved = main.resolve_analysis(result)
+    assert json.loads(json.dumps(resolved))["llm_reasoning"] == "Reasoning for AAA"
+    assert resolved["trust_score"] == result["trust_score"]
+    assert main.resolve_analysis(main.run_analysis(snapshot=snapshot(), reasoning="none"))["llm_reasoning"] is None
+
+
+class StreamingRunner(CountingRunner):
+    def stream_stock(self, symbol, data):
+        self.calls.append(symbol)
+        return AnalysisStream(['{"reasoning": "Cash ', 'rich, ', 'fairly valued"}'], symbol)
+
+
+def test_lazy_reasoning_streams_then_resolves():
+    runner = StreamingRunner()
+    result = main.Pipeline(llm_factory=lambda: runner).run(snapshot=snapshot(), reasoning="lazy")
+    reasoning = result["llm_reasoning"]
+
+    assert list(reasoning.stream()) == ["Cash ", "rich, ", "fairly valued"]
+    assert reasoning.done() and reasoning.result() == "Cash rich, fairly valued"
+    assert list(reasoning.stream()) == ["Cash rich, fairly valued"]
+    assert runner.calls == ["AAA"]
+
+
+def test_unknown_mode_is_rejected(runner):
+    with pytest.raises(ValueError):
+        main.run_analysis(snapshot=snapshot(), reasoning="sometimes")
+
+
+def test_import_does_not_load_engines():
+    code = ("import sys; import orchestrator.main; "
+            "print(sorted(m for m in ('groq', 'yfinance', 'pydantic', 'pandas') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == "[]"
+
+
+def test_engines_are_built_on_first_use():
+    built = []
+    pipeline = main.Pipeline(llm_factory=lambda: built.append("llm") or CountingRunner())
+
+    pipeline.run(snapshot=snapshot(), reasoning="none")
+    assert built == []
+    pipeline.run(snapshot=snapshot())
+    pipeline.run(snapshot=snapshot())
+    assert built == ["llm"]
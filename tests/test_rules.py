@@ -3,10 +3,17 @@ import pytest
 import sys
 import os
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+
+# Add project root (and src) to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, "src"))
 
 from scripts.validation.validate_tier2 import RuleChecker
+from symbolic_engine.rule_checker import FinancialRuleEngine, RULES, RULE_NAMES, to_stock_data
+from symbolic_engine import threshold_sweep
+from symbolic_engine.threshold_sweep import sweep_thresholds, override_rule, parse_parameter
 
 def test_graveyard_zombie_detection():
     """Verify that SVB-like profile is rejected"""
@@ -59,3 +66,61 @@ def test_healthy_compounder():
     print(f"AAPL Score: {score}")
     assert score > 70, f"AAPL should be trusted (Score > 70), got {score}"
     assert verdict == "TRUSTED"
+
+DATASET = os.path.join(PROJECT_ROOT, "results/datasets/dataset_n600_plus.csv")
+
+def test_evaluate_batch_matches_evaluate():
+    """Vectorized batch scoring must agree with the per-stock engine row by row"""
+    df = pd.read_csv(DATASET)
+    engine = FinancialRuleEngine()
+
+    batch = engine.evaluate_batch(df)
+
+    assert list(batch["passes"].columns) == RULE_NAMES
+    for i, (_, row) in enumerate(df.iterrows()):
+        breakdown = engine.explain(row)
+        expected_score = sum(b["status"] == "PASS" for b in breakdown) / len(breakdown) * 100
+        assert batch["score"][i] == round(expected_score, 1)
+        assert [b["status"] == "PASS" for b in breakdown] == batch["passes"].iloc[i].tolist()
+    assert (batch["score"] == df["Trust_Score"].to_numpy()).mean() > 0.95
+
+def test_rule_definitions_drive_both_paths():
+    """A rule defined as data is applied identically by evaluate and evaluate_batch"""
+    assert [rule.name for rule in RULES] == RULE_NAMES
+    strict_valuation = RULES[0].model_copy(update={"threshold": 15.0, "sector_thresholds": {"Technology": 40.0}})
+    engine = FinancialRuleEngine([strict_valuation])
+
+    df = pd.DataFrame({"pe_ratio": [20.0, 20.0, -5.0], "sector": ["Energy", "Technology", "Technology"]})
+    batch = engine.evaluate_batch(df)
+
+    assert batch["passes"]["Valuation"].tolist() == [False, True, False]
+    for i, (_, row) in enumerate(df.iterrows()):
+        assert engine.evaluate(to_stock_data(row))["score"] == batch["score"][i]
+    assert engine.explain(df.iloc[1])[0]["detail"] == "P/E 20.0 is within limit 40.0"
+
+def test_threshold_sweep_matches_direct_evaluation(monkeypatch):
+    """Every grid point's correlation equals re-running the engine with those thresholds"""
+    df = pd.read_csv(DATASET)
+    grid = {
+        "Valuation": [20.0, 30.0],
+        "Valuation:Technology,Communication Services": [40.0, 60.0, 80.0],
+        "Solvency": [150.0, 200.0],
+        "Growth": [0.0, 0.05, 0.1],
+    }
+    sweep = sweep_thresholds(df, grid, workers=1)
+    assert len(sweep) == 2 * 3 * 2 * 3
+
+    data = df[df["Actual_Return_1Y"].notna()]
+    for _, point in sweep.iterrows():
+        rules = list(RULES)
+        for name in grid:
+            rule_name, sectors = parse_parameter(name)
+            i = RULE_NAMES.index(rule_name)
+            rules[i] = override_rule(rules[i], sectors, point[name])
+        passed = FinancialRuleEngine(rules).evaluate_batch(data)["passes"].sum(axis=1)
+        assert point["correlation"] == pytest.approx(passed.corr(data["Actual_Return_1Y"]), abs=1e-9)
+        assert point["mean_score"] == pytest.approx(passed.mean() * 100 / len(RULES), abs=1e-9)
+
+    monkeypatch.setattr(threshold_sweep, "PARALLEL_MIN_POINTS", 1)
+    parallel = sweep_thresholds(df, grid, workers=2)
+    pd.testing.assert_frame_equal(sweep, parallel)
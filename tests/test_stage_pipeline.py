@@ -0,0 +1,116 @@
+"""
+Two-Stage Pipeline Tests
+
+Checks that every item comes out of the fetch -> compute pipeline exactly
+once with its outcome, that the work ledger records those outcomes, and that
+the queue depth report points at the slow stage.
+"""
+
+import operator
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator import stage_pipeline
+from orchestrator.stage_pipeline import StagedPipeline, run_staged_job
+from orchestrator.work_ledger import WorkLedger
+
+
+def fetch(symbol):
+    if symbol == "BAD":
+        raise ConnectionError("download failed")
+    return symbol.lower()
+
+
+def compute(symbol, payload):
+    if symbol == "EMPTY":
+        return None
+    if symbol == "BOOM":
+        raise ValueError("bad data")
+    return {"Symbol": symbol, "payload": payload}
+
+
+def test_every_item_is_yielded_once_with_its_outcome():
+    pipeline = StagedPipeline(fetch, compute, io_workers=3, cpu_workers=2, queue_size=2,
+                              cpu_executor=ThreadPoolExecutor(2))
+    symbols = ["AAPL", "BAD", "MSFT", "EMPTY", "BOOM"] + [f"S{i}" for i in range(20)]
+    outcomes = {symbol: (result, error) for symbol, result, error in pipeline.run(symbols)}
+
+    assert set(outcomes) == set(symbols)
+    assert outcomes["AAPL"] == ({"Symbol": "AAPL", "payload": "aapl"}, None)
+    assert isinstance(outcomes["BAD"][1], ConnectionError)
+    assert isinstance(outcomes["BOOM"][1], ValueError)
+    assert outcomes["EMPTY"] == (None, None)
+
+    report = pipeline.report()
+    assert report["io"]["completed"] == 24 and report["io"]["failed"] == 1
+    assert report["cpu"]["completed"] == 23 and report["cpu"]["failed"] == 1
+    assert report["queue"]["max_depth"] <= 2
+
+
+def test_staged_job_runs_compute_in_processes_and_records_the_ledger(tmp_path):
+    ledger = WorkLedger(path=str(tmp_path / "ledger.sqlite"))
+    pipeline = StagedPipeline(str.lower, operator.add, io_workers=2, cpu_workers=2)
+
+    counts = run_staged_job(ledger, "job", ["AB", "CD"], pipeline)
+
+    assert counts["done"] == 2
+    assert sorted(ledger.results("job")) == ["ABab", "CDcd"]
+
+
+class BreakingExecutor(ThreadPoolExecutor):
+    """Runs `healthy` submissions, then fails like a pool whose worker died."""
+
+    def __init__(self, healthy):
+        super().__init__(1)
+        self.healthy = healthy
+
+    def submit(self, *args, **kwargs):
+        if self.healthy <= 0:
+            raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+        self.healthy -= 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.mark.parametrize("healthy", [0, 2])
+def test_broken_cpu_pool_fails_the_remaining_items_instead_of_hanging(healthy):
+    pipeline = StagedPipeline(fetch, compute, io_workers=2, cpu_workers=1, queue_size=2,
+                              cpu_executor=BreakingExecutor(healthy))
+    symbols = [f"S{i}" for i in range(10)]
+
+    outcomes = {}
+    for symbol, result, error in pipeline.run(symbols):
+        assert symbol not in outcomes
+        outcomes[symbol] = (result, error)
+
+    assert set(outcomes) == set(symbols)
+    failed = [symbol for symbol, (_, error) in outcomes.items() if isinstance(error, BrokenProcessPool)]
+    assert len(failed) >= len(symbols) - healthy
+    if healthy == 0:
+        assert pipeline.depths()["cpu_backlog"] == 0  # The failed submission gave its slot back
+
+
+@pytest.mark.parametrize("slow_stage", ["io", "cpu"])
+def test_report_names_the_slow_stage(slow_stage, monkeypatch):
+    monkeypatch.setattr(stage_pipeline, "SAMPLE_INTERVAL", 0.01)
+
+    def slow_fetch(symbol):
+        if slow_stage == "io":
+            time.sleep(0.03)
+        return symbol
+
+    def slow_compute(symbol, payload):
+        if slow_stage == "cpu":
+            time.sleep(0.03)
+        return payload
+
+    pipeline = StagedPipeline(slow_fetch, slow_compute, io_workers=1, cpu_workers=1, queue_size=4,
+                              cpu_executor=ThreadPoolExecutor(1))
+    list(pipeline.run([f"S{i}" for i in range(30)]))
+    assert pipeline.report()["bottleneck"] == slow_stage
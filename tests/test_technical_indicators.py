@@ -2,7 +2,9 @@
 Unit Tests for Technical Indicators Module
 
 Tests the correctness of technical indicator calculations
-to ensure no data leakage and proper implementation.
+to ensure no data leakage and proper implementation. The vectorized
+panel, history and incremental paths must reproduce the per-ticker scalar
+path (get_technical_indicators on one history) to floating-point tolerance.
 """
 
 import pytest
@@ -17,7 +19,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.orchestrator.technical_indicators import (
     calculate_rsi, calculate_macd, calculate_roc,
     calculate_bollinger_bands, calculate_atr,
-    calculate_volume_trend, calculate_trend_strength
+    calculate_volume_trend, calculate_trend_strength,
+    calculate_indicator_history, calculate_indicator_panel, calculate_indicator_series,
+    calculate_rolling_trend_strength, get_default_indicators, get_technical_indicators,
+    indicators_as_of
+)
+from src.orchestrator.indicator_state import IndicatorState
+from scripts.generation.generate_temporal_dataset import (
+    CUTOFF_DATE, FEATURE_COLUMNS, TARGET_END_DATE, build_temporal_dataset, get_temporal_data
 )
 
 def test_rsi_bounds():
@@ -154,6 +163,154 @@ def test_indicator_consistency():
     
     assert rsi1 == rsi2, "Indicator should be deterministic"
 
+
+def make_history(n_bars, seed):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-12-31", periods=n_bars)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    spread = close * rng.uniform(0.005, 0.03, n_bars)
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000, n_bars).astype(float),
+    }, index=index)
+
+
+@pytest.fixture
+def universe():
+    """Tickers with different history lengths (leading NaNs in the panel), one delisted early."""
+    histories = {
+        "LONG": make_history(252, 1),
+        "MID": make_history(180, 2),
+        "SHORT": make_history(60, 3),
+        "TINY": make_history(30, 4),
+        "DELISTED": make_history(252, 5).iloc[:-15],
+    }
+    panel = pd.concat(histories, axis=1).swaplevel(0, 1, axis=1)
+    return histories, panel
+
+
+def test_panel_matches_scalar(universe):
+    histories, panel = universe
+    result = calculate_indicator_panel(panel["Close"], high=panel["High"], low=panel["Low"], volume=panel["Volume"])
+
+    for symbol, hist in histories.items():
+        expected = get_technical_indicators(symbol, hist=hist)
+        for key, value in expected.items():
+            assert result.loc[symbol, key] == pytest.approx(value, rel=1e-9, abs=1e-9), (symbol, key)
+
+
+def test_short_history_gets_defaults(universe):
+    _, panel = universe
+    result = calculate_indicator_panel(panel["Close"])
+    assert result.loc["TINY"].to_dict() == get_default_indicators()
+    assert list(result.columns) == list(get_default_indicators())
+
+
+def test_history_matches_scalar_on_trailing_window():
+    hist = make_history(400, 6)
+    series = calculate_indicator_series(hist, lookback=252)
+
+    for i in [60, 200, 251, 399]:
+        window = hist.iloc[max(0, i - 251):i + 1]
+        expected = get_technical_indicators("X", hist=window)
+        row = series.loc[hist.index[i]]
+        for key, value in expected.items():
+            # EWM-based features see the full history; everything else is exact
+            tolerance = 1e-6 if key in ("macd", "macd_signal", "ema_20") else 1e-9
+            assert row[key] == pytest.approx(value, rel=1e-9, abs=tolerance), (i, key)
+
+
+def test_indicators_as_of_excludes_cutoff_bar(universe):
+    _, panel = universe
+    history = calculate_indicator_history(panel["Close"], high=panel["High"], low=panel["Low"], volume=panel["Volume"])
+    cutoff = panel.index[-10]
+
+    snapshot = indicators_as_of(history, cutoff)
+    expected = calculate_indicator_panel(panel["Close"].loc[:cutoff].iloc[:-1],
+                                         high=panel["High"], low=panel["Low"], volume=panel["Volume"])
+    assert snapshot.loc["LONG", "rsi"] == pytest.approx(expected.loc["LONG", "rsi"])
+    assert snapshot.loc["MID", "trend_strength"] == pytest.approx(expected.loc["MID", "trend_strength"])
+
+
+def test_temporal_dataset_matches_get_temporal_data():
+    # 150 leading NaNs -> 50-199 bars before the cutoff, where the strict SMA-200 is NaN
+    histories = {"LONG": make_history(470, 10), "YOUNG": make_history(470, 11).iloc[150:]}
+    index = pd.bdate_range(end="2024-06-28", periods=470)
+    for hist in histories.values():
+        hist.index = index[-len(hist):]
+    panel = pd.concat(histories, axis=1).swaplevel(0, 1, axis=1)
+
+    dataset = build_temporal_dataset(panel, [(CUTOFF_DATE, TARGET_END_DATE)], lookback=None).set_index("Symbol")
+    for symbol, hist in histories.items():
+        expected, _ = get_temporal_data(symbol, CUTOFF_DATE, hist=hist)
+        for key in FEATURE_COLUMNS + ["Close_Cutoff", "Actual_Return"]:
+            assert dataset.loc[symbol, key] == pytest.approx(expected[key], rel=1e-9, abs=1e-9, nan_ok=True), (symbol, key)
+    assert np.isnan(dataset.loc["YOUNG", "price_vs_sma200"])
+
+
+def test_gap_in_trend_window_gets_the_default(universe):
+    _, panel = universe
+    close = panel["Close"].copy()
+    close.iloc[-5, close.columns.get_loc("LONG")] = np.nan  # Missing bar inside the last 20
+
+    result = calculate_indicator_panel(close)
+    history = calculate_indicator_history(close)
+    assert result.loc["LONG", "trend_strength"] == 0.0
+    assert history["trend_strength"].notna().all()
+
+
+def test_indicator_state_tracks_history_incrementally():
+    hist = make_history(320, 7)
+    series = calculate_indicator_series(hist, lookback=252)
+
+    state = IndicatorState.from_history(hist.iloc[:250])
+    for i in range(250, len(hist)):
+        if i == 280:
+            state = IndicatorState.from_json(state.to_json())  # survives a nightly save/load
+        bar = hist.iloc[i]
+        state.update(bar["Close"], high=bar["High"], low=bar["Low"], volume=bar["Volume"])
+
+        if i in (250, 279, 280, 319):
+            current = state.indicators()
+            for key, value in series.iloc[i].drop("close").items():
+                assert current[key] == pytest.approx(value, rel=1e-9, abs=1e-9), (i, key)
+
+
+def test_indicator_state_skips_nan_bars():
+    hist = make_history(300, 12)
+    state = IndicatorState.from_history(hist)
+    expected = state.indicators()
+
+    assert not state.update(np.nan, high=np.nan, low=np.nan, volume=np.nan)
+    assert state.indicators() == expected
+
+    # Missing high/low/volume only skip those windows
+    bar = hist.iloc[-1]
+    gapped = IndicatorState.from_history(hist)
+    assert gapped.update(bar["Close"], high=np.nan, low=bar["Low"], volume=np.nan)
+    assert all(np.isfinite(value) for value in gapped.indicators().values())
+
+
+def test_indicator_state_defaults_until_min_history():
+    state = IndicatorState.from_history(make_history(30, 8))
+    assert state.indicators() == get_default_indicators()
+
+
+def test_rolling_trend_strength_matches_polyfit():
+    hist = make_history(2000, 9)
+    close = hist["Close"]
+    close.iloc[:5] = np.nan  # ragged start
+
+    rolling = calculate_rolling_trend_strength(close, period=20)
+
+    assert rolling.iloc[:24].isna().all()
+    for t in [24, 500, 1999]:
+        expected = calculate_trend_strength(close.iloc[t - 19:t + 1], period=20)
+        assert rolling.iloc[t] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"])
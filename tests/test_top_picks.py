@@ -0,0 +1,107 @@
+"""
+Top Picks View Tests
+
+Checks the precomputed view against a direct nlargest over the dataset and
+that refreshes only rebuild (and re-version) when the inputs change.
+"""
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator import top_picks as top_picks_module
+from orchestrator.top_picks import build_top_picks, load_top_picks, load_view_inputs, refresh_top_picks, top_picks
+
+DATA_PATH = Path(__file__).parent.parent / "results" / "datasets" / "dataset_n600_plus.csv"
+
+
+class MomentumModel:
+    """Stand-in predictor: RSI-weighted momentum."""
+    feature_names = ["rsi", "price_vs_sma200"]
+
+    def predict(self, X):
+        return X["price_vs_sma200"].to_numpy() + 0.1 * X["rsi"].to_numpy()
+
+
+def test_view_matches_direct_ranking():
+    df = pd.read_csv(DATA_PATH)
+    view = build_top_picks(df, MomentumModel(), n=10)
+
+    by_trust = top_picks(view, by="trust")
+    assert list(by_trust["Symbol"]) == list(df.nlargest(10, "Trust_Score")["Symbol"])
+
+    predicted = MomentumModel().predict(df)
+    expected = df.assign(p=predicted).nlargest(10, "p")["Symbol"]
+    assert list(top_picks(view, by="prediction")["Symbol"]) == list(expected)
+    assert len(view) <= 20
+
+
+def test_without_a_model_prediction_falls_back_to_trust():
+    df = pd.read_csv(DATA_PATH)
+    view = build_top_picks(df, None, n=5)
+    assert view["Predicted_Return"].isna().all()
+    assert list(top_picks(view, by="prediction", n=5)["Symbol"]) == list(df.nlargest(5, "Trust_Score")["Symbol"])
+
+
+def test_refresh_rebuilds_only_when_inputs_change(tmp_path):
+    data = tmp_path / "dataset.csv"
+    pd.read_csv(DATA_PATH).head(100).to_csv(data, index=False)
+    view_dir = tmp_path / "view"
+    kwargs = dict(data_path=str(data), model_path=str(tmp_path / "no_model.pkl"), view_dir=str(view_dir), n=5)
+
+    first = refresh_top_picks(**kwargs)
+    built = os.path.getmtime(view_dir / f"top_picks_{first}.parquet")
+    assert refresh_top_picks(**kwargs) == first
+    assert os.path.getmtime(view_dir / f"top_picks_{first}.parquet") == built
+
+    pointer, view = load_top_picks(str(view_dir))
+    assert pointer["version"] == first and pointer["rows"] == 100 and len(view) == 5
+
+    pd.read_csv(data).head(50).to_csv(data, index=False)
+    second = refresh_top_picks(**kwargs)
+    assert second != first
+    pointer, view = load_top_picks(str(view_dir))
+    assert pointer["version"] == second and pointer["rows"] == 50
+    assert np.isnan(view["Predicted_Return"]).all()
+
+
+def test_trust_only_view_is_rebuilt_once_the_model_is_usable(tmp_path, monkeypatch):
+    data = tmp_path / "dataset.csv"
+    pd.read_csv(DATA_PATH).head(100).to_csv(data, index=False)
+    model = tmp_path / "model.pkl"
+    model.write_bytes(b"pickled model")
+    kwargs = dict(data_path=str(data), model_path=str(model), view_dir=str(tmp_path / "view"), n=5)
+
+    def without_xgboost():
+        raise ImportError("No module named 'xgboost'")
+
+    # Model file present, predictor not importable
+    monkeypatch.setattr(top_picks_module, "_predictor_class", without_xgboost)
+    trust_only = refresh_top_picks(**kwargs)
+    assert refresh_top_picks(**kwargs) == trust_only
+    assert not load_top_picks(kwargs["view_dir"])[0]["has_predictions"]
+
+    monkeypatch.setattr(top_picks_module, "_predictor_class", lambda: SimpleNamespace(load=lambda path: MomentumModel()))
+    with_model = refresh_top_picks(**kwargs)
+    assert with_model != trust_only
+    assert load_top_picks(kwargs["view_dir"])[0]["has_predictions"]
+
+
+def test_refresh_reads_the_projected_store_snapshot(tmp_path):
+    store = str(tmp_path / "store")
+    df = load_view_inputs(MomentumModel(), store_dir=store)
+    assert list(df.columns) == ["Symbol", "Trust_Score", "Verdict", "Actual_Return_1Y", "sector", "rsi", "price_vs_sma200"]
+    assert df["rsi"].dtype == np.float32
+
+    kwargs = dict(model_path=str(tmp_path / "no_model.pkl"), view_dir=str(tmp_path / "view"), n=5, store_dir=store)
+    version = refresh_top_picks(**kwargs)
+    assert refresh_top_picks(**kwargs) == version
+    pointer, view = load_top_picks(kwargs["view_dir"])
+    assert pointer["source"] == "dataset_n600_plus" and pointer["rows"] == len(pd.read_csv(DATA_PATH))
+    assert list(view["Symbol"]) == list(pd.read_csv(DATA_PATH).nlargest(5, "Trust_Score")["Symbol"])
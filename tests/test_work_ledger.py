@@ -0,0 +1,77 @@
+"""
+Work Ledger Tests
+
+Checks that dataset jobs record every outcome as it completes, resume after
+an interruption without redoing finished items, and retry only failures.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from orchestrator.work_ledger import WorkLedger, run_job
+
+
+class Processor:
+    """Fake per-symbol worker: raises for `failing`, skips `empty`, interrupts at `stop_at`."""
+
+    def __init__(self, failing=(), empty=(), stop_at=None):
+        self.failing, self.empty, self.stop_at = set(failing), set(empty), stop_at
+        self.calls = []
+
+    def __call__(self, symbol, index, total):
+        self.calls.append(symbol)
+        if symbol == self.stop_at:
+            raise KeyboardInterrupt
+        if symbol in self.failing:
+            raise ConnectionError("rate limited")
+        if symbol in self.empty:
+            return None
+        return {"Symbol": symbol, "Trust_Score": float(len(self.calls))}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return WorkLedger(path=str(tmp_path / "ledger.sqlite"))
+
+
+def test_statuses_are_recorded_and_only_failures_retried(ledger):
+    symbols = ["AAA", "BBB", "CCC", "DDD"]
+    counts = run_job(ledger, "job", symbols, Processor(failing={"BBB"}, empty={"CCC"}), max_workers=2)
+
+    assert counts == {"pending": 0, "done": 2, "failed": 1, "skipped": 1}
+    assert ledger.failures("job") == {"BBB": "ConnectionError: rate limited"}
+
+    retry = Processor()
+    counts = run_job(ledger, "job", symbols, retry, max_workers=2)
+    assert retry.calls == ["BBB"]
+    assert counts["done"] == 3 and counts["failed"] == 0
+    assert [row["Symbol"] for row in ledger.results("job")] == ["AAA", "BBB", "DDD"]
+
+
+def test_interrupted_run_resumes_where_it_stopped(ledger):
+    symbols = [f"S{i}" for i in range(6)]
+    with pytest.raises(KeyboardInterrupt):
+        run_job(ledger, "job", symbols, Processor(stop_at="S3"), max_workers=1)
+
+    assert [row["Symbol"] for row in ledger.results("job")] == ["S0", "S1", "S2"]
+    resumed = Processor()
+    run_job(ledger, "job", symbols, resumed, max_workers=1)
+    assert resumed.calls == ["S3", "S4", "S5"]
+
+
+def test_expansion_only_processes_new_symbols(ledger):
+    assert ledger.import_results("job", [{"Symbol": "OLD1", "Trust_Score": 50.0},
+                                         {"Symbol": "OLD2", "Trust_Score": 60.0}]) == 2
+    assert ledger.import_results("job", [{"Symbol": "OLD1", "Trust_Score": 0.0}]) == 0
+
+    expand = Processor()
+    run_job(ledger, "job", ["OLD2", "NEW1", "NEW2"], expand, max_workers=1)
+
+    assert expand.calls == ["NEW1", "NEW2"]
+    results = ledger.results("job")
+    assert [row["Symbol"] for row in results] == ["OLD1", "OLD2", "NEW1", "NEW2"]
+    assert results[0]["Trust_Score"] == 50.0